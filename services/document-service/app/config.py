@@ -23,6 +23,11 @@ class Settings(BaseSettings):
     S3_REGION: str = "us-east-1"
     USE_SSL: bool = False
 
+    # Redis (ingestion job queue)
+    REDIS_URL: str
+    INGESTION_STREAM: str = "ingestion:jobs"
+    CHUNK_EVENTS_CHANNEL: str = "chunks:changed"  # Pub/sub channel the RAG service hot-tenant cache listens on
+
     # Auth Service
     AUTH_SERVICE_URL: str
 
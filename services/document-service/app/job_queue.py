@@ -0,0 +1,91 @@
+# FILE: services/document-service/app/job_queue.py
+
+from typing import Optional
+import redis.asyncio as redis
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionJobQueue:
+    """
+    Producer for the ingestion-worker Redis Stream job queue.
+
+    Jobs are added to the intake stream; the ingestion worker picks each
+    job's scheduling lane (from its size and whether it is incremental),
+    moves it to that user's lane stream and serves users fairly from those.
+    """
+
+    def __init__(self):
+        self.redis_client: Optional[redis.Redis] = None
+        self.stream = settings.INGESTION_STREAM
+
+    async def connect(self):
+        """Connect to Redis."""
+        if not self.redis_client:
+            self.redis_client = await redis.from_url(
+                settings.REDIS_URL,
+                encoding="utf-8",
+                decode_responses=True
+            )
+
+    async def disconnect(self):
+        """Disconnect from Redis."""
+        if self.redis_client:
+            await self.redis_client.close()
+
+    async def enqueue_document(
+        self,
+        document_id: str,
+        user_id: str,
+        s3_key: str,
+        file_extension: str,
+        file_size: Optional[int] = None,
+        incremental: bool = False
+    ) -> str:
+        """
+        Queue a document for processing by the ingestion worker pool.
+
+        Args:
+            document_id: Document ID
+            user_id: Owner of the document
+            s3_key: S3 object key
+            file_extension: File extension
+            file_size: File size in bytes, used by the worker to pick the lane
+            incremental: Only re-embed chunks that changed since the last version
+
+        Returns:
+            Stream entry ID of the queued job
+        """
+        job = {
+            "document_id": document_id,
+            "user_id": user_id,
+            "s3_key": s3_key,
+            "file_extension": file_extension,
+            "incremental": "true" if incremental else "false"
+        }
+        if file_size is not None:
+            job["file_size"] = file_size
+
+        return await self.redis_client.xadd(self.stream, job)
+
+    async def announce_chunks_changed(self, user_id: str):
+        """
+        Tell RAG service replicas that a user's chunks changed.
+
+        Publishes the user ID on CHUNK_EVENTS_CHANNEL so their hot-tenant
+        caches drop it. Best effort: errors are logged, since those caches
+        also expire entries on a TTL.
+
+        Args:
+            user_id: User whose chunks were deleted
+        """
+        try:
+            await self.redis_client.publish(settings.CHUNK_EVENTS_CHANNEL, user_id)
+        except Exception as e:
+            logger.warning(f"Failed to announce changed chunks of user {user_id}: {e}")
+
+
+# Global queue instance
+ingestion_queue = IngestionJobQueue()
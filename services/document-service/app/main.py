@@ -7,6 +7,7 @@ from app.config import settings
 from app.database import init_db
 from app.routes import router as document_router
 from app.s3_client import s3_client
+from app.job_queue import ingestion_queue
 
 
 @asynccontextmanager
@@ -15,9 +16,10 @@ async def lifespan(app: FastAPI):
     # Startup
     await init_db()
     await s3_client.ensure_bucket_exists()
+    await ingestion_queue.connect()
     yield
     # Shutdown
-    pass
+    await ingestion_queue.disconnect()
 
 
 app = FastAPI(
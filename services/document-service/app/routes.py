@@ -15,10 +15,10 @@ from app.schemas import (
 )
 from app.auth_middleware import get_current_user
 from app.s3_client import s3_client
+from app.job_queue import ingestion_queue
 from app.config import settings
 import uuid
 import os
-import httpx
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
@@ -194,6 +194,105 @@ async def update_document(
     return document
 
 
+@router.put("/{document_id}/file", response_model=DocumentResponse)
+async def replace_document_file(
+    document_id: str,
+    file: UploadFile = File(...),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload a new version of a document and queue it for incremental re-processing.
+
+    Only the chunks that changed since the previous version are re-embedded.
+    """
+
+    result = await db.execute(
+        select(Document).where(
+            Document.id == document_id,
+            Document.user_id == current_user['id']
+        )
+    )
+    document = result.scalar_one_or_none()
+
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+
+    if document.status == 'processing':
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Document cannot be replaced while it is being processed"
+        )
+
+    # Validate file extension
+    file_extension = os.path.splitext(file.filename)[1].lstrip('.')
+    if file_extension.lower() not in settings.ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type .{file_extension} not allowed. Allowed types: {', '.join(settings.ALLOWED_EXTENSIONS)}"
+        )
+
+    # Read file content
+    file_content = await file.read()
+    file_size = len(file_content)
+
+    # Validate file size
+    max_size_bytes = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+    if file_size > max_size_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE_MB}MB"
+        )
+
+    # Upload the new version next to the old one
+    s3_key = f"{current_user['id']}/{document.id}/{file.filename}"
+    success = await s3_client.upload_file(
+        file_data=file_content,
+        s3_key=s3_key,
+        content_type=file.content_type
+    )
+
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to upload file to storage"
+        )
+
+    if s3_key != document.s3_key:
+        await s3_client.delete_file(document.s3_key)
+
+    document.filename = file.filename
+    document.original_filename = file.filename
+    document.file_extension = file_extension
+    document.file_size = file_size
+    document.mime_type = file.content_type
+    document.s3_key = s3_key
+    document.status = 'processing'
+    document.processing_error = None
+    await db.commit()
+
+    try:
+        await ingestion_queue.enqueue_document(
+            document_id=document.id,
+            user_id=document.user_id,
+            s3_key=document.s3_key,
+            file_extension=document.file_extension,
+            file_size=document.file_size,
+            incremental=True
+        )
+    except Exception as e:
+        # The new file is stored; processing can be retried via /process
+        document.status = 'failed'
+        document.processing_error = f"Failed to queue for ingestion: {str(e)}"
+        await db.commit()
+
+    await db.refresh(document)
+    return document
+
+
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_document(
     document_id: str,
@@ -223,6 +322,9 @@ async def delete_document(
     await db.delete(document)
     await db.commit()
 
+    # Drop the user's embeddings cached by the RAG service
+    await ingestion_queue.announce_chunks_changed(current_user['id'])
+
 
 @router.get("/{document_id}/download", response_model=PresignedUrlResponse)
 async def get_download_url(
@@ -258,13 +360,13 @@ async def get_download_url(
     return PresignedUrlResponse(url=url, expires_in=3600)
 
 
-@router.post("/{document_id}/process")
+@router.post("/{document_id}/process", status_code=status.HTTP_202_ACCEPTED)
 async def trigger_document_processing(
     document_id: str,
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Trigger processing of a document by sending it to the ingestion worker."""
+    """Queue a document for processing by the ingestion worker pool."""
 
     # Get document
     result = await db.execute(
@@ -290,37 +392,30 @@ async def trigger_document_processing(
 
     # Update status to processing
     document.status = 'processing'
+    document.processing_error = None
     await db.commit()
 
-    # Send to ingestion worker
+    # Hand off to the ingestion queue; workers update the status when done
     try:
-        # Get ingestion worker URL from environment
-        ingestion_url = os.getenv('INGESTION_WORKER_URL', 'http://localhost:8003')
-
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{ingestion_url}/process/document",
-                json={
-                    "document_id": document.id,
-                    "user_id": document.user_id,
-                    "s3_key": document.s3_key,
-                    "file_extension": document.file_extension
-                }
-            )
-            response.raise_for_status()
-            result_data = response.json()
+        job_id = await ingestion_queue.enqueue_document(
+            document_id=document.id,
+            user_id=document.user_id,
+            s3_key=document.s3_key,
+            file_extension=document.file_extension,
+            file_size=document.file_size
+        )
 
         return {
             "message": "Document processing started",
             "document_id": document.id,
             "status": "processing",
-            **result_data
+            "job_id": job_id
         }
 
-    except httpx.HTTPError as e:
-        # Revert status if request failed
+    except Exception as e:
+        # Revert status if the job could not be queued
         document.status = 'failed'
-        document.processing_error = f"Failed to send to ingestion worker: {str(e)}"
+        document.processing_error = f"Failed to queue for ingestion: {str(e)}"
         await db.commit()
 
         raise HTTPException(
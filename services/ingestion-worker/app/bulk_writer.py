@@ -0,0 +1,253 @@
+# FILE: services/ingestion-worker/app/bulk_writer.py
+
+import math
+import struct
+import time
+from typing import List, Optional, Sequence
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import DocumentChunk
+from app.metrics import chunk_rows_written_total, chunk_write_duration_seconds
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Transaction-scoped lock that makes concurrent writers of one document take turns
+LOCK_DOCUMENT_SQL = "SELECT pg_advisory_xact_lock(hashtext($1))"
+
+# Columns written for every chunk, in COPY order
+CHUNK_COLUMNS = [
+    "id", "document_id", "user_id", "chunk_index",
+    "chunk_text", "chunk_size", "content_hash", "embedding", "page_number",
+    "minhash", "lsh_bands", "embedding_half", "embedding_reduced", "embedding_bits",
+]
+
+# Columns refreshed when a chunk ID already exists
+UPDATE_COLUMNS = [column for column in CHUNK_COLUMNS if column not in ("id", "document_id")]
+
+# Embedding columns written: fp32 embedding, unit-normalized fp16 embedding_half, or both
+EMBEDDING_STORAGE_MODES = ("vector", "both", "halfvec")
+
+
+def encode_vector(value: Sequence[float]) -> bytes:
+    """
+    Encode a vector in pgvector's binary wire format.
+
+    The format is a big-endian int16 dimension count, an unused int16 and
+    one big-endian float4 per dimension.
+    """
+    if isinstance(value, str):
+        value = [float(x) for x in value.strip("[]").split(",")]
+    return struct.pack(f">HH{len(value)}f", len(value), 0, *value)
+
+
+def decode_vector(data: bytes) -> List[float]:
+    """Decode a vector from pgvector's binary wire format."""
+    dim, _ = struct.unpack_from(">HH", data)
+    return list(struct.unpack_from(f">{dim}f", data, 4))
+
+
+def encode_halfvec(value: Sequence[float]) -> bytes:
+    """Encode a halfvec in pgvector's binary wire format (as vector, with float2 elements)."""
+    if isinstance(value, str):
+        value = [float(x) for x in value.strip("[]").split(",")]
+    return struct.pack(f">HH{len(value)}e", len(value), 0, *value)
+
+
+def decode_halfvec(data: bytes) -> List[float]:
+    """Decode a halfvec from pgvector's binary wire format."""
+    dim, _ = struct.unpack_from(">HH", data)
+    return list(struct.unpack_from(f">{dim}e", data, 4))
+
+
+def normalize(value: Sequence[float]) -> List[float]:
+    """Scale a vector to unit length, so inner product equals cosine similarity."""
+    norm = math.sqrt(sum(x * x for x in value))
+    return [x / norm for x in value] if norm else list(value)
+
+
+def shorten(value: Sequence[float], dimensions: int) -> List[float]:
+    """
+    Shorten a Matryoshka embedding (text-embedding-3) to its first dimensions.
+
+    Gives the same vector as requesting `dimensions` from the embeddings API:
+    the leading components, re-normalized to unit length.
+    """
+    return normalize(value[:dimensions])
+
+
+def binary_quantize(value: Sequence[float]) -> asyncpg.BitString:
+    """
+    Quantize an embedding to one bit per dimension, set where the component is positive.
+
+    Matches pgvector's binary_quantize(), which the RAG service applies to
+    query embeddings before comparing them by Hamming distance.
+    """
+    bits = bytearray(math.ceil(len(value) / 8))
+    for index, x in enumerate(value):
+        if x > 0:
+            bits[index >> 3] |= 0x80 >> (index & 7)
+    return asyncpg.BitString.frombytes(bytes(bits), len(value))
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    """Teach a bulk-writer connection to send and receive vectors in binary."""
+    await conn.set_type_codec(
+        "vector",
+        schema="public",
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format="binary"
+    )
+    await conn.set_type_codec(
+        "halfvec",
+        schema="public",
+        encoder=encode_halfvec,
+        decoder=decode_halfvec,
+        format="binary"
+    )
+
+
+async def lock_document(db: AsyncSession, document_id: str):
+    """
+    Hold the document's advisory lock until the session's transaction ends.
+
+    Args:
+        db: Database session
+        document_id: Document ID
+    """
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:document_id))"),
+        {"document_id": document_id}
+    )
+
+
+class ChunkBulkWriter:
+    """
+    Write chunk rows with COPY ... FROM STDIN (FORMAT binary).
+
+    Rows are streamed into a per-connection temporary staging table with
+    asyncpg's binary COPY, using a pgvector binary codec for embeddings, and
+    then moved into document_chunks with a single INSERT ... SELECT that
+    upserts on the chunk ID. If COPY cannot be used (the pool cannot be
+    created, or the server rejects COPY) the writer falls back to a
+    multi-row INSERT through the caller's SQLAlchemy session.
+    """
+
+    def __init__(self, table: str = "document_chunks"):
+        self.table = table
+        self.staging_table = f"{table}_staging"
+        self.use_copy = settings.BULK_WRITE_MODE == "copy"
+        if settings.EMBEDDING_STORAGE not in EMBEDDING_STORAGE_MODES:
+            raise ValueError(
+                f"Unknown EMBEDDING_STORAGE '{settings.EMBEDDING_STORAGE}', expected one of {EMBEDDING_STORAGE_MODES}"
+            )
+        if not 0 <= settings.EMBEDDING_REDUCED_DIMENSIONS < 1536:
+            raise ValueError("EMBEDDING_REDUCED_DIMENSIONS must be between 0 (off) and 1535")
+        self._pool: Optional[asyncpg.Pool] = None
+
+    async def connect(self):
+        """Create the asyncpg pool used for COPY."""
+        if not self.use_copy or self._pool is not None:
+            return
+        try:
+            self._pool = await asyncpg.create_pool(
+                settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://"),
+                min_size=1,
+                max_size=settings.BULK_WRITE_POOL_SIZE,
+                init=_init_connection
+            )
+        except Exception as e:
+            logger.warning(f"COPY writer unavailable, falling back to INSERT: {e}")
+            self.use_copy = False
+
+    async def disconnect(self):
+        """Close the asyncpg pool."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def write(self, rows: List[dict], db: AsyncSession, document_id: Optional[str] = None) -> int:
+        """
+        Upsert chunk rows and commit them.
+
+        Args:
+            rows: Chunk rows keyed by CHUNK_COLUMNS
+            db: Session used by the INSERT fallback
+            document_id: Take this document's advisory lock in the write transaction
+
+        Returns:
+            Number of rows written
+        """
+        if not rows:
+            return 0
+
+        if self.use_copy:
+            await self.connect()
+        if self.use_copy:
+            try:
+                return await self.copy_rows(rows, document_id)
+            except (asyncpg.FeatureNotSupportedError, asyncpg.InsufficientPrivilegeError) as e:
+                logger.warning(f"COPY rejected by server, falling back to INSERT: {e}")
+                self.use_copy = False
+
+        return await self.insert_rows(rows, db, document_id=document_id)
+
+    async def copy_rows(self, rows: List[dict], document_id: Optional[str] = None) -> int:
+        """Binary COPY rows into the staging table and upsert them in one transaction."""
+        started = time.perf_counter()
+        records = [tuple(row[column] for column in CHUNK_COLUMNS) for row in rows]
+        columns = ", ".join(CHUNK_COLUMNS)
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in UPDATE_COLUMNS)
+
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                if document_id is not None:
+                    await conn.execute(LOCK_DOCUMENT_SQL, document_id)
+                await conn.execute(f"""
+                    CREATE TEMP TABLE IF NOT EXISTS {self.staging_table}
+                    (LIKE {self.table} INCLUDING DEFAULTS)
+                    ON COMMIT DELETE ROWS
+                """)
+                await conn.copy_records_to_table(
+                    self.staging_table,
+                    records=records,
+                    columns=CHUNK_COLUMNS
+                )
+                await conn.execute(f"""
+                    INSERT INTO {self.table} ({columns})
+                    SELECT {columns} FROM {self.staging_table}
+                    ON CONFLICT (id) DO UPDATE SET {updates}, updated_at = NOW()
+                """)
+        chunk_write_duration_seconds.labels(method="copy").observe(time.perf_counter() - started)
+        chunk_rows_written_total.labels(method="copy").inc(len(records))
+        return len(records)
+
+    async def insert_rows(
+        self,
+        rows: List[dict],
+        db: AsyncSession,
+        commit: bool = True,
+        document_id: Optional[str] = None
+    ) -> int:
+        """Upsert rows with a single multi-row INSERT, committing unless told not to."""
+        started = time.perf_counter()
+        if document_id is not None:
+            await lock_document(db, document_id)
+        statement = pg_insert(DocumentChunk).values(rows)
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[DocumentChunk.id],
+            set_={column: statement.excluded[column] for column in UPDATE_COLUMNS}
+        ))
+        if commit:
+            await db.commit()
+        chunk_write_duration_seconds.labels(method="insert").observe(time.perf_counter() - started)
+        chunk_rows_written_total.labels(method="insert").inc(len(rows))
+        return len(rows)
+
+
+# Singleton instance
+chunk_writer = ChunkBulkWriter()
@@ -0,0 +1,152 @@
+# FILE: services/ingestion-worker/app/checkpoints.py
+
+import asyncio
+from typing import List, Optional, Tuple
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.database import AsyncSessionLocal
+from app.models import IngestionCheckpoint
+from app.storage import s3_client, decode_sections, SectionsUpload
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """
+    Per-document checkpoints that let a failed or redelivered job resume.
+
+    A checkpoint records three stages of one processing attempt for a
+    specific version of a document (identified by the SHA-256 of its
+    bytes, since a replaced document keeps its S3 key): the extracted
+    text, saved as a gzip JSON sidecar object next to the uploads; the
+    manifest of content hashes of the chunks committed so far; and the
+    watermark, the number of leading chunks that are stored with their
+    embeddings. Checkpoints for another version are discarded,
+    and a successful run removes its checkpoint.
+    """
+
+    def __init__(self):
+        self.enabled = settings.CHECKPOINTS_ENABLED
+        self.prefix = settings.CHECKPOINT_S3_PREFIX
+
+    def sidecar_key(self, document_id: str) -> str:
+        """S3 key of the extracted-text sidecar of a document."""
+        return f"{self.prefix}/{document_id}/sections.json.gz"
+
+    async def load(self, document_id: str, content_digest: str) -> Optional[IngestionCheckpoint]:
+        """
+        Get the checkpoint of a document version.
+
+        Args:
+            document_id: Document ID
+            content_digest: SHA-256 of the version being processed
+
+        Returns:
+            The checkpoint, or None if there is none for this version
+        """
+        async with AsyncSessionLocal() as db:
+            checkpoint = await db.get(IngestionCheckpoint, document_id)
+        if checkpoint is None:
+            return None
+        if checkpoint.content_digest != content_digest:
+            logger.info(f"Discarding checkpoint of document {document_id} for an older version")
+            await self.clear(document_id)
+            return None
+        return checkpoint
+
+    async def _upsert(self, document_id: str, content_digest: str, **values):
+        """Create or update a checkpoint row."""
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                pg_insert(IngestionCheckpoint)
+                .values(document_id=document_id, content_digest=content_digest, **values)
+                .on_conflict_do_update(
+                    index_elements=[IngestionCheckpoint.document_id],
+                    set_={"content_digest": content_digest, **values}
+                )
+            )
+            await db.commit()
+
+    def upload_sections(self, document_id: str) -> SectionsUpload:
+        """
+        Start storing the extracted text of a document as a sidecar.
+
+        Call mark_extracted once the upload is complete.
+
+        Args:
+            document_id: Document ID
+
+        Returns:
+            Upload to start, write the sections to in document order, and complete
+        """
+        return SectionsUpload(self.sidecar_key(document_id))
+
+    async def mark_extracted(self, document_id: str, content_digest: str):
+        """
+        Record that the sidecar of a document version is complete.
+
+        Args:
+            document_id: Document ID
+            content_digest: SHA-256 of the version being processed
+        """
+        await self._upsert(document_id, content_digest, text_extracted=True)
+
+    async def load_sections(self, document_id: str) -> List[Tuple[Optional[int], str]]:
+        """
+        Read the extracted-text sidecar of a document.
+
+        Args:
+            document_id: Document ID
+
+        Returns:
+            (page_number, text) tuples in document order
+        """
+        async with s3_client() as s3:
+            response = await s3.get_object(
+                Bucket=settings.S3_BUCKET_NAME,
+                Key=self.sidecar_key(document_id)
+            )
+            async with response['Body'] as stream:
+                body = await stream.read()
+        return await asyncio.to_thread(decode_sections, body)
+
+    async def advance(self, document_id: str, content_digest: str, manifest: List[str]):
+        """
+        Record the chunks committed so far.
+
+        Args:
+            document_id: Document ID
+            content_digest: SHA-256 of the version being processed
+            manifest: Content hashes of the committed chunks, indexed by chunk_index
+                (prefixed with processor.SKIPPED_MARKER for skipped near-duplicates)
+        """
+        await self._upsert(
+            document_id, content_digest, chunk_manifest=manifest, watermark=len(manifest)
+        )
+
+    async def clear(self, document_id: str):
+        """
+        Remove a document's checkpoint and sidecar.
+
+        Args:
+            document_id: Document ID
+        """
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(IngestionCheckpoint).where(IngestionCheckpoint.document_id == document_id)
+            )
+            await db.commit()
+        try:
+            async with s3_client() as s3:
+                await s3.delete_object(
+                    Bucket=settings.S3_BUCKET_NAME,
+                    Key=self.sidecar_key(document_id)
+                )
+        except Exception as e:
+            logger.warning(f"Could not delete checkpoint sidecar of {document_id}: {e}")
+
+
+# Singleton instance
+checkpoint_store = CheckpointStore()
@@ -1,8 +1,143 @@
 # FILE: services/ingestion-worker/app/chunker.py
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List
+from collections import deque
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence, Tuple
 from app.config import settings
+import bisect
+
+SECTION_SEPARATOR = "\n\n"
+
+# Separators in priority order, shared by both chunker backends
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+
+class NativeTextSplitter:
+    """
+    Offset-based equivalent of RecursiveCharacterTextSplitter.
+
+    With keep_separator at the start of each split (langchain's default for
+    the recursive splitter) every split, and every merge of adjacent
+    splits, is a contiguous range of the input. This splitter therefore
+    works on (start, end) offsets into the original string: it finds
+    separators with str.find over a range, merges ranges with the same
+    size/overlap window langchain uses, recurses into oversized ranges with
+    the lower-priority separators, and only slices the string when a chunk
+    is emitted. Chunks are yielded lazily with their start offset.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        separators: Sequence[str] = SEPARATORS
+    ):
+        """
+        Initialize the splitter.
+
+        Args:
+            chunk_size: Maximum size of each chunk
+            chunk_overlap: Overlap between consecutive chunks
+            separators: Literal separators in priority order
+        """
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators)
+
+    def split_text(self, text: str) -> List[str]:
+        """
+        Split text into chunks.
+
+        Args:
+            text: Input text
+
+        Returns:
+            List of text chunks, identical to RecursiveCharacterTextSplitter's
+        """
+        return [chunk for _, chunk in self.iter_chunks(text)]
+
+    def iter_chunks(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        Lazily split text into chunks.
+
+        Args:
+            text: Input text
+
+        Yields:
+            (start_offset, chunk_text) tuples in document order
+        """
+        return self._split(text, 0, len(text), 0)
+
+    def _choose_separator(self, text: str, start: int, end: int, level: int) -> Tuple[str, Optional[int]]:
+        """Pick the first separator present in the range and the level to recurse with."""
+        for index in range(level, len(self.separators)):
+            separator = self.separators[index]
+            if separator == "":
+                return separator, None
+            if text.find(separator, start, end) != -1:
+                return separator, index + 1 if index + 1 < len(self.separators) else None
+        return self.separators[-1], None
+
+    @staticmethod
+    def _iter_splits(text: str, start: int, end: int, separator: str) -> Iterator[Tuple[int, int]]:
+        """Yield non-empty ranges that each begin at an occurrence of the separator."""
+        if separator == "":
+            for position in range(start, end):
+                yield position, position + 1
+            return
+
+        position = start
+        found = text.find(separator, start, end)
+        while found != -1:
+            if found > position:
+                yield position, found
+            position = found
+            found = text.find(separator, found + len(separator), end)
+        if end > position:
+            yield position, end
+
+    @staticmethod
+    def _emit(text: str, start: int, end: int) -> Iterator[Tuple[int, str]]:
+        """Yield a merged range stripped of surrounding whitespace, unless it is blank."""
+        piece = text[start:end]
+        chunk = piece.strip()
+        if chunk:
+            yield start + len(piece) - len(piece.lstrip()), chunk
+
+    def _split(self, text: str, start: int, end: int, level: int) -> Iterator[Tuple[int, str]]:
+        """Split text[start:end] with separators from the given priority level on."""
+        separator, next_level = self._choose_separator(text, start, end, level)
+
+        # Sliding window of adjacent small splits being merged into a chunk
+        window = deque()
+        total = 0
+
+        for split_start, split_end in self._iter_splits(text, start, end, separator):
+            length = split_end - split_start
+            if length < self.chunk_size:
+                if window and total + length > self.chunk_size:
+                    yield from self._emit(text, window[0][0], window[-1][1])
+                    while total > self.chunk_overlap or (
+                        total + length > self.chunk_size and total > 0
+                    ):
+                        first_start, first_end = window.popleft()
+                        total -= first_end - first_start
+                window.append((split_start, split_end))
+                total += length
+                continue
+
+            if window:
+                yield from self._emit(text, window[0][0], window[-1][1])
+                window.clear()
+                total = 0
+            if next_level is None:
+                yield split_start, text[split_start:split_end]
+            else:
+                yield from self._split(text, split_start, split_end, next_level)
+
+        if window:
+            yield from self._emit(text, window[0][0], window[-1][1])
 
 
 class TextChunker:
@@ -11,7 +146,8 @@ class TextChunker:
     def __init__(
         self,
         chunk_size: int = None,
-        chunk_overlap: int = None
+        chunk_overlap: int = None,
+        backend: str = None
     ):
         """
         Initialize text chunker.
@@ -19,16 +155,27 @@ class TextChunker:
         Args:
             chunk_size: Maximum size of each chunk
             chunk_overlap: Overlap between consecutive chunks
+            backend: Splitter implementation, "native" or "langchain"
         """
         self.chunk_size = chunk_size or settings.CHUNK_SIZE
         self.chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
+        self.backend = backend or settings.CHUNKER_BACKEND
 
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
+        if self.backend == "native":
+            self.splitter = NativeTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                separators=SEPARATORS
+            )
+        elif self.backend == "langchain":
+            self.splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                length_function=len,
+                separators=SEPARATORS
+            )
+        else:
+            raise ValueError(f"Unsupported chunker backend: {self.backend}")
 
     def chunk_text(self, text: str) -> List[str]:
         """
@@ -40,13 +187,162 @@ class TextChunker:
         Returns:
             List of text chunks
         """
+        return [chunk for _, chunk in self._chunks_with_offsets(text)]
+
+    def _chunks_with_offsets(self, text: str) -> List[Tuple[int, str]]:
+        """Split text into (start_offset, chunk_text) tuples, capped per document."""
         if not text or not text.strip():
             return []
 
-        chunks = self.splitter.split_text(text)
-
         # Limit number of chunks per document
-        if len(chunks) > settings.MAX_CHUNKS_PER_DOCUMENT:
-            chunks = chunks[:settings.MAX_CHUNKS_PER_DOCUMENT]
+        if isinstance(self.splitter, NativeTextSplitter):
+            return list(islice(self.splitter.iter_chunks(text), settings.MAX_CHUNKS_PER_DOCUMENT))
+
+        chunks = self.splitter.split_text(text)[:settings.MAX_CHUNKS_PER_DOCUMENT]
+
+        located = []
+        start = 0
+        previous_length = 0
+        for chunk in chunks:
+            # Same search window langchain uses for add_start_index
+            start = text.find(chunk, max(0, start + previous_length - self.chunk_overlap))
+            previous_length = len(chunk)
+            located.append((start, chunk))
+        return located
+
+    def chunk_sections(
+        self,
+        sections: Sequence[Tuple[Optional[int], str]]
+    ) -> List[Tuple[str, Optional[int]]]:
+        """
+        Split ordered sections into chunks and tag each chunk with its page.
 
+        Sections are joined exactly as the extractor used to join pages, so the
+        chunk boundaries are the same as chunking the whole text. Each chunk is
+        attributed to the section its first character falls in.
+
+        Args:
+            sections: List of (page_number, text) tuples in document order
+
+        Returns:
+            List of (chunk_text, page_number) tuples
+        """
+        return [
+            (chunk, sections[section][0])
+            for _, section, chunk in self._locate_chunks(sections)
+        ]
+
+    def _locate_chunks(
+        self,
+        sections: Sequence[Tuple[Optional[int], str]]
+    ) -> List[Tuple[int, int, str]]:
+        """
+        Chunk joined sections and find where each chunk starts.
+
+        Args:
+            sections: List of (page_number, text) tuples in document order
+
+        Returns:
+            List of (start_offset, section_index, chunk_text) tuples
+        """
+        section_starts = []
+        offset = 0
+        for i, (_, section_text) in enumerate(sections):
+            if i:
+                offset += len(SECTION_SEPARATOR)
+            section_starts.append(offset)
+            offset += len(section_text)
+
+        text = SECTION_SEPARATOR.join(section_text for _, section_text in sections)
+
+        return [
+            (start, max(0, bisect.bisect_right(section_starts, start) - 1), chunk)
+            for start, chunk in self._chunks_with_offsets(text)
+        ]
+
+
+class IncrementalChunker:
+    """
+    Chunk a document section by section while holding only a small buffer.
+
+    Sections are appended to a buffer; once it reaches buffer_size characters
+    it is split and every chunk except the last is emitted. Text from the
+    start of the last chunk onward becomes the next buffer, so overlap
+    carries across flushes. Boundaries next to a flush can differ slightly from splitting
+    the whole document at once, but memory no longer grows with document size.
+    """
+
+    def __init__(self, chunker: TextChunker, buffer_size: int = None):
+        """
+        Initialize incremental chunker.
+
+        Args:
+            chunker: Chunker providing size, overlap and separators
+            buffer_size: Buffered characters that trigger a flush
+        """
+        self.chunker = chunker
+        self.buffer_size = buffer_size or chunker.chunk_size * 4
+        self.sections: List[Tuple[Optional[int], str]] = []
+        self.buffered = 0
+        self.emitted = 0
+
+    def _take(self, chunks: List[Tuple[str, Optional[int]]]) -> List[Tuple[str, Optional[int]]]:
+        """Apply the per-document chunk limit."""
+        remaining = settings.MAX_CHUNKS_PER_DOCUMENT - self.emitted
+        chunks = chunks[:max(0, remaining)]
+        self.emitted += len(chunks)
         return chunks
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the per-document chunk limit has been reached."""
+        return self.emitted >= settings.MAX_CHUNKS_PER_DOCUMENT
+
+    def feed(self, page_number: Optional[int], text: str) -> List[Tuple[str, Optional[int]]]:
+        """
+        Add a section and return the chunks that are now final.
+
+        Args:
+            page_number: Page the section came from, if any
+            text: Section text
+
+        Returns:
+            List of (chunk_text, page_number) tuples
+        """
+        self.sections.append((page_number, text))
+        self.buffered += len(text)
+        if self.buffered < self.buffer_size:
+            return []
+
+        located = self.chunker._locate_chunks(self.sections)
+        if len(located) < 2:
+            return []
+
+        ready = [(chunk, self.sections[section][0]) for _, section, chunk in located[:-1]]
+
+        # Keep everything from the last chunk's start as the next buffer
+        tail_start, tail_section, _ = located[-1]
+        section_start = sum(
+            len(section_text) + len(SECTION_SEPARATOR)
+            for _, section_text in self.sections[:tail_section]
+        )
+        page_number, section_text = self.sections[tail_section]
+        self.sections = (
+            [(page_number, section_text[tail_start - section_start:])]
+            + self.sections[tail_section + 1:]
+        )
+        self.buffered = sum(len(section_text) for _, section_text in self.sections)
+
+        return self._take(ready)
+
+    def finish(self) -> List[Tuple[str, Optional[int]]]:
+        """
+        Flush the buffer at the end of the document.
+
+        Returns:
+            List of (chunk_text, page_number) tuples
+        """
+        chunks = self.chunker.chunk_sections(self.sections) if self.sections else []
+        self.sections = []
+        self.buffered = 0
+        return self._take(chunks)
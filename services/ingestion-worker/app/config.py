@@ -1,7 +1,7 @@
 # FILE: services/ingestion-worker/app/config.py
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -18,6 +18,26 @@ class Settings(BaseSettings):
     # Redis (for task queue)
     REDIS_URL: str
 
+    # Ingestion Job Queue (Redis Streams)
+    QUEUE_ENABLED: bool = True
+    INGESTION_STREAM: str = "ingestion:jobs"
+    INGESTION_CONSUMER_GROUP: str = "ingestion-workers"
+    INGESTION_DEAD_LETTER_STREAM: str = "ingestion:jobs:dead"
+    QUEUE_CONSUMERS: int = 4  # Jobs run at once per worker process, shared by all lanes
+    QUEUE_BLOCK_MS: int = 1000
+    QUEUE_CLAIM_IDLE_MS: int = 60000
+    QUEUE_MAX_DELIVERIES: int = 5
+    QUEUE_SHUTDOWN_TIMEOUT_SECONDS: int = 30
+    CHUNK_EVENTS_CHANNEL: str = "chunks:changed"  # Pub/sub channel the RAG service hot-tenant cache listens on
+
+    # Fair scheduling (weighted fair queuing across users, priority lanes)
+    SCHEDULER_LANE_WEIGHTS: Dict[str, float] = {"interactive": 8.0, "small": 4.0, "bulk": 1.0}
+    SCHEDULER_USER_WEIGHTS: Dict[str, float] = {}  # user_id -> weight, default 1
+    SCHEDULER_SMALL_MAX_BYTES: int = 2 * 1024 * 1024
+    SCHEDULER_COST_UNIT_BYTES: int = 1024 * 1024
+    SCHEDULER_PREFETCH: int = 8
+    SCHEDULER_TENANTS_PER_FETCH: int = 32
+
     # S3/MinIO Configuration
     S3_ENDPOINT_URL: str
     S3_ACCESS_KEY_ID: str
@@ -29,10 +49,96 @@ class Settings(BaseSettings):
     # LLM Proxy Service
     LLM_PROXY_URL: str
 
+    # Text Extraction (process pool)
+    EXTRACTION_USE_PROCESS_POOL: bool = True
+    EXTRACTION_WORKERS: int = 0  # 0 = one process per CPU core
+    EXTRACTION_TIMEOUT_SECONDS: int = 120
+    EXTRACTION_MAX_MEMORY_MB: int = 1024
+    EXTRACTION_MAX_TASKS_PER_CHILD: int = 50
+
+    # Extractor backends (see app/extractors.py)
+    PDF_EXTRACTOR: str = "pypdf2"  # pypdf2, pypdf, pdfminer
+    DOCX_EXTRACTOR: str = "lxml"  # lxml (streaming, includes tables), python-docx
+    TEXT_EXTRACTOR: str = "utf8"  # utf8, incremental
+
+    # Extracted-text cache (keyed by content SHA-256 and extractor version)
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_S3_PREFIX: str = "extraction-cache"
+
+    # Streaming S3 downloads (spill to disk above the spool size)
+    DOWNLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024
+    DOWNLOAD_SPOOL_MAX_BYTES: int = 8 * 1024 * 1024
+    DOWNLOAD_SPOOL_DIR: str = ""  # Empty uses the system temp directory
+
+    # Page-parallel PDF extraction
+    PDF_PARALLEL_EXTRACTION: bool = True
+    PDF_PARALLEL_MIN_PAGES: int = 50
+    PDF_PAGES_PER_TASK: int = 25
+
     # Text Processing
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
     MAX_CHUNKS_PER_DOCUMENT: int = 500
+    CHUNKER_BACKEND: str = "native"  # native, langchain
+
+    # Streaming pipeline
+    EMBEDDING_BATCH_SIZE: int = 64
+    PIPELINE_QUEUE_SIZE: int = 4
+
+    # Embedding dispatch
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_BATCH_MAX_TOKENS: int = 8000
+    EMBEDDING_BATCH_MAX_ITEMS: int = 128
+    EMBEDDING_CHARS_PER_TOKEN: int = 4
+    EMBEDDING_MAX_CONCURRENCY: int = 4
+    EMBEDDING_MAX_RETRIES: int = 3
+    EMBEDDING_RETRY_BASE_DELAY_SECONDS: float = 1.0
+    EMBEDDING_REQUEST_TIMEOUT_SECONDS: float = 60.0
+    EMBEDDING_COALESCE_WAIT_MS: int = 20  # Pool texts across documents; 0 disables
+    EMBEDDING_BATCH_RETRIES: int = 4  # Pipeline-level retries of a batch after transient errors
+    EMBEDDING_BATCH_RETRY_DELAY_SECONDS: float = 5.0
+
+    # Reuse embeddings of chunks whose text has been seen before
+    EMBEDDING_DEDUP_ENABLED: bool = True
+
+    # Near-duplicate chunk detection (MinHash + LSH over word shingles)
+    NEAR_DUPLICATE_MODE: str = "off"  # off, skip
+    NEAR_DUPLICATE_USER_MODES: Dict[str, str] = {}  # user_id -> mode
+    NEAR_DUPLICATE_THRESHOLD: float = 0.8  # Estimated Jaccard similarity of shingle sets
+    MINHASH_PERMUTATIONS: int = 128
+    MINHASH_BANDS: int = 16  # 8 rows per band: pairs at 0.8 similarity become candidates with p~0.95
+    MINHASH_SHINGLE_WORDS: int = 5
+
+    # Chunk storage
+    BULK_WRITE_MODE: str = "copy"  # copy, insert
+    # vector: fp32 embedding column; halfvec: unit-normalized fp16 embedding_half
+    # column only; both: write both while migrating (see scripts/backfill_halfvec.py)
+    EMBEDDING_STORAGE: str = "vector"
+    # Also store the first N dimensions of each embedding, re-normalized (the
+    # Matryoshka prefix), in embedding_reduced for a smaller search index; 0 = off
+    EMBEDDING_REDUCED_DIMENSIONS: int = 0
+    # Also store a bit(1536) binary-quantized copy (one bit per dimension) in
+    # embedding_bits for Hamming-distance candidate search
+    EMBEDDING_BINARY: bool = False
+    BULK_WRITE_POOL_SIZE: int = 4
+
+    # HNSW vector indexes, built concurrently in the background at startup
+    HNSW_INDEX_ENABLED: bool = True
+    HNSW_INDEX_COLUMNS: List[str] = ["embedding"]  # embedding, embedding_half, embedding_reduced, embedding_bits
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 64
+    HNSW_MAINTENANCE_WORK_MEM: str = "1GB"  # Builds are much faster when the graph fits
+    HNSW_PARALLEL_WORKERS: int = 2
+    # Large tenants that also get per-user partial indexes (see the RAG search planner)
+    HNSW_PARTIAL_INDEX_USERS: List[str] = []
+
+    # Resumable ingestion checkpoints
+    CHECKPOINTS_ENABLED: bool = True
+    CHECKPOINT_S3_PREFIX: str = "checkpoints"
+
+    # Batch ingestion
+    BATCH_MAX_DOCUMENTS: int = 1000
+    BATCH_CONCURRENCY: int = 8
 
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
@@ -4,6 +4,12 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 from sqlalchemy.orm import declarative_base
 from sqlalchemy import text
 from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# halfvec, binary_quantize and bit_hamming_ops need pgvector 0.7+
+MIN_PGVECTOR_VERSION = (0, 7)
 
 # Create async engine
 engine = create_async_engine(
@@ -34,10 +40,69 @@ async def get_db():
             await session.close()
 
 
+async def _update_pgvector(conn):
+    """
+    Upgrade pgvector in databases created with an older image.
+
+    ALTER EXTENSION needs ownership of the extension, so it is only tried
+    when the installed version is too old, and a failure is logged rather
+    than raised (the role running the workers may not own it).
+    """
+    installed = (await conn.execute(text(
+        "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+    ))).scalar()
+    if tuple(int(part) for part in installed.split(".")[:2]) >= MIN_PGVECTOR_VERSION:
+        return
+    try:
+        async with conn.begin_nested():
+            await conn.execute(text("ALTER EXTENSION vector UPDATE"))
+    except Exception as e:
+        logger.warning(
+            f"pgvector {installed} is older than "
+            f"{'.'.join(map(str, MIN_PGVECTOR_VERSION))} and could not be updated "
+            f"(run ALTER EXTENSION vector UPDATE as its owner): {e}"
+        )
+
+
 async def init_db():
     """Initialize database tables and pgvector extension."""
     async with engine.begin() as conn:
         # Enable pgvector extension
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await _update_pgvector(conn)
         # Create tables
         await conn.run_sync(Base.metadata.create_all)
+        # Columns added after the first release
+        await conn.execute(text(
+            "ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"
+        ))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_document_chunks_content_hash "
+            "ON document_chunks (content_hash)"
+        ))
+        for column in (
+            "minhash BYTEA",
+            "lsh_bands BIGINT[]",
+            "embedding_half HALFVEC(1536)",
+            "embedding_reduced VECTOR",
+            "embedding_bits BIT(1536)",
+        ):
+            await conn.execute(text(
+                f"ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS {column}"
+            ))
+        # Near-duplicate links were never resolved at retrieval and are gone
+        await conn.execute(text(
+            "ALTER TABLE document_chunks DROP COLUMN IF EXISTS canonical_chunk_id"
+        ))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_document_chunks_lsh_bands "
+            "ON document_chunks USING gin (lsh_bands)"
+        ))
+        # Checkpoints used to be keyed on the S3 key, which a replaced
+        # document keeps; rows without a digest never match and are discarded
+        await conn.execute(text(
+            "ALTER TABLE ingestion_checkpoints ADD COLUMN IF NOT EXISTS content_digest VARCHAR(64)"
+        ))
+        await conn.execute(text(
+            "ALTER TABLE ingestion_checkpoints DROP COLUMN IF EXISTS source_key"
+        ))
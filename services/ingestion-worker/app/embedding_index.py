@@ -0,0 +1,74 @@
+# FILE: services/ingestion-worker/app/embedding_index.py
+
+import hashlib
+from typing import Dict, List, Sequence
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.database import AsyncSessionLocal
+from app.models import ChunkEmbedding
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest identifying a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingIndex:
+    """
+    Content-hash to embedding index stored in Postgres.
+
+    Every embedding generated by the worker is recorded under the SHA-256 of
+    its chunk text and the embedding model, so boilerplate that appears in
+    many documents (disclaimers, headers, templates) is embedded once and
+    then reused without calling the LLM Proxy.
+    """
+
+    def __init__(self, model: str = settings.EMBEDDING_MODEL):
+        self.model = model
+
+    async def lookup(self, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        """
+        Fetch known embeddings for content hashes.
+
+        Args:
+            hashes: Content hashes to look up
+
+        Returns:
+            Dict of content hash to embedding for the hashes that are indexed
+        """
+        if not hashes:
+            return {}
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ChunkEmbedding.content_hash, ChunkEmbedding.embedding).where(
+                    ChunkEmbedding.model == self.model,
+                    ChunkEmbedding.content_hash.in_(set(hashes))
+                )
+            )
+            return {row.content_hash: [float(x) for x in row.embedding] for row in result}
+
+    async def store(self, embeddings: Dict[str, List[float]]):
+        """
+        Record newly generated embeddings; hashes already indexed are left as they are.
+
+        Args:
+            embeddings: Dict of content hash to embedding
+        """
+        if not embeddings:
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                pg_insert(ChunkEmbedding).values([
+                    {"content_hash": key, "model": self.model, "embedding": embedding}
+                    for key, embedding in embeddings.items()
+                ]).on_conflict_do_nothing()
+            )
+            await db.commit()
+
+
+# Singleton instance
+embedding_index = EmbeddingIndex()
@@ -0,0 +1,264 @@
+# FILE: services/ingestion-worker/app/embeddings.py
+
+import asyncio
+import time
+from typing import List, Optional, Set, Tuple
+import httpx
+from app.metrics import embedding_request_batch_size, embedding_request_duration_seconds
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying unchanged
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Status codes that usually mean the request was too large; the batch is split
+OVERSIZED_STATUS_CODES = {400, 413}
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an embedding error is worth retrying later (outage, throttling, timeout)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting batches (no tokenizer dependency)."""
+    return len(text) // settings.EMBEDDING_CHARS_PER_TOKEN + 1
+
+
+def pack_batches(texts: List[str]) -> List[List[int]]:
+    """
+    Group text indices into batches under the token and item budgets.
+
+    Args:
+        texts: Texts to embed
+
+    Returns:
+        List of batches, each a list of indices into texts, in order
+    """
+    batches = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (
+            current_tokens + tokens > settings.EMBEDDING_BATCH_MAX_TOKENS
+            or len(current) >= settings.EMBEDDING_BATCH_MAX_ITEMS
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class EmbeddingDispatcher:
+    """
+    Send embedding requests to the LLM Proxy in budgeted, concurrent batches.
+
+    Texts are packed into batches by estimated tokens and item count, and up
+    to EMBEDDING_MAX_CONCURRENCY requests run at once across the whole
+    worker over one shared HTTP client. Each batch is retried on its own
+    with exponential backoff, and a batch the proxy rejects as too large is
+    split in half and retried, so one bad request does not fail a document.
+    Results are always returned in input order.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(settings.EMBEDDING_MAX_CONCURRENCY)
+
+    async def connect(self):
+        """Create the shared HTTP client."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=settings.LLM_PROXY_URL,
+                timeout=settings.EMBEDDING_REQUEST_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=settings.EMBEDDING_MAX_CONCURRENCY)
+            )
+
+    async def disconnect(self):
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, preserving their order.
+
+        Args:
+            texts: List of text strings
+
+        Returns:
+            List of embedding vectors, one per text
+        """
+        if not texts:
+            return []
+        await self.connect()
+
+        batches = pack_batches(texts)
+        results = await asyncio.gather(*[
+            self._embed_batch([texts[index] for index in batch])
+            for batch in batches
+        ])
+
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        for batch, batch_embeddings in zip(batches, results):
+            for index, embedding in zip(batch, batch_embeddings):
+                embeddings[index] = embedding
+        return embeddings
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch with retries, splitting it if the proxy rejects its size."""
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    started = time.perf_counter()
+                    response = await self._client.post(
+                        "/llm/embeddings",
+                        json={
+                            "texts": texts,
+                            "model": settings.EMBEDDING_MODEL
+                        }
+                    )
+                embedding_request_batch_size.observe(len(texts))
+                embedding_request_duration_seconds.labels(
+                    status="success" if response.is_success else "error"
+                ).observe(time.perf_counter() - started)
+                response.raise_for_status()
+                return response.json()["embeddings"]
+
+            except httpx.HTTPStatusError as e:
+                status_code = e.response.status_code
+                if status_code in OVERSIZED_STATUS_CODES and len(texts) > 1:
+                    middle = len(texts) // 2
+                    logger.warning(
+                        f"Embedding batch of {len(texts)} rejected ({status_code}), splitting"
+                    )
+                    first, second = await asyncio.gather(
+                        self._embed_batch(texts[:middle]),
+                        self._embed_batch(texts[middle:])
+                    )
+                    return first + second
+                if status_code not in RETRYABLE_STATUS_CODES:
+                    logger.error(f"Error generating embeddings: {e}")
+                    raise
+                error = e
+
+            except httpx.TransportError as e:
+                error = e
+
+            attempt += 1
+            if attempt > settings.EMBEDDING_MAX_RETRIES:
+                logger.error(f"Error generating embeddings after {attempt} attempts: {error}")
+                raise error
+            delay = settings.EMBEDDING_RETRY_BASE_DELAY_SECONDS * (2 ** (attempt - 1))
+            logger.warning(f"Embedding batch failed ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+class EmbeddingCoalescer:
+    """
+    Pool embedding requests from concurrent documents into full-size batches.
+
+    Callers (one per document pipeline) add texts to a shared pending list.
+    The list is sent as one dispatcher call once it reaches the batch item
+    or token budget, or after EMBEDDING_COALESCE_WAIT_MS, whichever comes
+    first, and each caller receives the embeddings for its own texts. If a
+    pooled call fails, each caller's texts are retried separately so one
+    document's failure is not reported against the others.
+    """
+
+    def __init__(self, dispatcher: EmbeddingDispatcher):
+        self.dispatcher = dispatcher
+        self.wait_seconds = settings.EMBEDDING_COALESCE_WAIT_MS / 1000
+        self._pending: List[Tuple[int, str, asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._next_caller = 0
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts as part of the next pooled batch.
+
+        Args:
+            texts: List of text strings
+
+        Returns:
+            List of embedding vectors, one per text
+        """
+        if not texts:
+            return []
+        if self.wait_seconds <= 0:
+            return await self.dispatcher.embed(texts)
+
+        loop = asyncio.get_running_loop()
+        caller = self._next_caller
+        self._next_caller += 1
+
+        futures = []
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if self._pending and (
+                self._pending_tokens + tokens > settings.EMBEDDING_BATCH_MAX_TOKENS
+                or len(self._pending) >= settings.EMBEDDING_BATCH_MAX_ITEMS
+            ):
+                self._flush()
+            future = loop.create_future()
+            self._pending.append((caller, text, future))
+            self._pending_tokens += tokens
+            futures.append(future)
+
+        if self._pending and self._timer is None:
+            self._timer = loop.call_later(self.wait_seconds, self._flush)
+
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self):
+        """Send the pending texts as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[int, str, asyncio.Future]]):
+        """Embed a pooled batch and resolve every caller's futures."""
+        batch = [entry for entry in batch if not entry[2].done()]
+        if not batch:
+            return
+        try:
+            embeddings = await self.dispatcher.embed([text for _, text, _ in batch])
+        except Exception as e:
+            callers = {caller for caller, _, _ in batch}
+            if len(callers) == 1:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            # Retry each caller on its own so a failure stays with its document
+            await asyncio.gather(*[
+                self._send([entry for entry in batch if entry[0] == caller])
+                for caller in callers
+            ])
+            return
+
+        for (_, _, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+
+# Singleton instances
+embedding_dispatcher = EmbeddingDispatcher()
+embedding_coalescer = EmbeddingCoalescer(embedding_dispatcher)
@@ -0,0 +1,93 @@
+# FILE: services/ingestion-worker/app/extraction_cache.py
+
+import asyncio
+from typing import List, Optional, Tuple
+from botocore.exceptions import ClientError
+from app.storage import s3_client, decode_sections, SectionsUpload
+from app.text_extractor import EXTRACTOR_VERSION
+from app.extractors import get_backend
+from app.metrics import extraction_cache_lookups_total
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    Extracted-text cache keyed by the content of the source file.
+
+    Sections produced by the extractors are stored as gzip JSON objects in
+    the documents bucket under the SHA-256 of the file bytes, the configured
+    extractor backend and EXTRACTOR_VERSION. Re-processing the same bytes
+    (retries, chunking changes, re-ingesting the corpus) skips parsing
+    entirely; switching backends or bumping the extractor version makes
+    every entry a miss. Cache failures are logged and never fail a job.
+    """
+
+    def __init__(self):
+        self.enabled = settings.EXTRACTION_CACHE_ENABLED
+        self.prefix = settings.EXTRACTION_CACHE_S3_PREFIX
+
+    def object_key(self, digest: str, file_extension: str) -> str:
+        """S3 key of a cache entry."""
+        backend = get_backend(file_extension).name
+        return (
+            f"{self.prefix}/v{EXTRACTOR_VERSION}/{backend}/"
+            f"{digest[:2]}/{digest}.{file_extension.lower()}.json.gz"
+        )
+
+    async def get(
+        self,
+        digest: str,
+        file_extension: str
+    ) -> Optional[List[Tuple[Optional[int], str]]]:
+        """
+        Look up the extracted sections of a file.
+
+        Args:
+            digest: SHA-256 hex digest of the file bytes
+            file_extension: File extension
+
+        Returns:
+            (page_number, text) tuples, or None on a miss
+        """
+        try:
+            async with s3_client() as s3:
+                response = await s3.get_object(
+                    Bucket=settings.S3_BUCKET_NAME,
+                    Key=self.object_key(digest, file_extension)
+                )
+                async with response['Body'] as stream:
+                    body = await stream.read()
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                extraction_cache_lookups_total.labels(result="miss").inc()
+            else:
+                extraction_cache_lookups_total.labels(result="error").inc()
+                logger.warning(f"Extraction cache lookup failed for {digest}: {e}")
+            return None
+        except Exception as e:
+            extraction_cache_lookups_total.labels(result="error").inc()
+            logger.warning(f"Extraction cache lookup failed for {digest}: {e}")
+            return None
+
+        extraction_cache_lookups_total.labels(result="hit").inc()
+        return await asyncio.to_thread(decode_sections, body)
+
+    def upload(self, digest: str, file_extension: str) -> SectionsUpload:
+        """
+        Start storing the extracted sections of a file as they are produced.
+
+        Args:
+            digest: SHA-256 hex digest of the file bytes
+            file_extension: File extension
+
+        Returns:
+            Upload to start, write the sections to in document order, and complete
+        """
+        return SectionsUpload(self.object_key(digest, file_extension))
+
+
+# Singleton instance
+extraction_cache = ExtractionCache()
@@ -0,0 +1,254 @@
+# FILE: services/ingestion-worker/app/extraction_pool.py
+
+import asyncio
+import os
+import resource
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+from app.text_extractor import TextExtractor, DocumentSource, split_page_ranges
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+STREAM_WINDOW = 256  # Blocks of a streaming backend pulled per thread hop
+
+
+def _init_worker(max_memory_mb: int):
+    """Cap the address space of a pool child so one bad file cannot exhaust the pod."""
+    if max_memory_mb > 0:
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+class ExtractionEngine:
+    """
+    Run CPU-bound text extraction in a process pool.
+
+    PyPDF2 and python-docx hold the GIL for the whole parse, so running them
+    inline freezes the event loop. Jobs are dispatched to a
+    ProcessPoolExecutor whose children are recycled after
+    EXTRACTION_MAX_TASKS_PER_CHILD jobs and capped at
+    EXTRACTION_MAX_MEMORY_MB of address space. A job that exceeds
+    EXTRACTION_TIMEOUT_SECONDS causes the pool to be torn down and rebuilt,
+    since a running child cannot be interrupted individually. The other
+    jobs that were running on a pool when it broke are retried once, each
+    in a process of its own, so only the job at fault fails.
+    """
+
+    def __init__(self):
+        self.enabled = settings.EXTRACTION_USE_PROCESS_POOL
+        self.max_workers = settings.EXTRACTION_WORKERS or os.cpu_count() or 1
+        self.timeout = settings.EXTRACTION_TIMEOUT_SECONDS
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _create_pool(self, max_workers: int) -> ProcessPoolExecutor:
+        """A process pool with the per-child task and memory limits."""
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(settings.EXTRACTION_MAX_MEMORY_MB,),
+            max_tasks_per_child=settings.EXTRACTION_MAX_TASKS_PER_CHILD or None
+        )
+
+    @staticmethod
+    def _terminate(executor: ProcessPoolExecutor):
+        """Kill every child of a pool without waiting for running jobs."""
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def start(self):
+        """Create the process pool."""
+        if self.enabled and self._executor is None:
+            self._executor = self._create_pool(self.max_workers)
+            logger.info(f"Started extraction pool with {self.max_workers} processes")
+
+    def shutdown(self):
+        """Shut down the process pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        """
+        Kill every child of a broken pool and start a fresh one.
+
+        Does nothing if `executor` was already replaced, so failures
+        surfacing from a stale pool cannot tear down its successor.
+        """
+        if self._executor is not executor:
+            return
+        self._executor = None
+        self._terminate(executor)
+        self.start()
+
+    async def _submit(self, executor: ProcessPoolExecutor, func: Callable[..., Any], *args) -> Any:
+        """Run a job on `executor`; on timeout, recycle it and raise TimeoutError."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(executor, func, *args),
+                timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            if executor is self._executor:
+                logger.error(
+                    f"Extraction job exceeded {self.timeout}s, recycling pool; "
+                    f"other jobs running on it will be retried"
+                )
+                self._restart(executor)
+            raise TimeoutError(f"Text extraction timed out after {self.timeout} seconds")
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Run a picklable function in the pool with the per-job timeout.
+
+        When the pool breaks under a job (a child died, or another job timed
+        out and the pool was recycled) the job may not be the one at fault,
+        so it is retried in a single-process pool of its own; only a failure
+        there is reported as the job's.
+
+        Args:
+            func: Module-level function to execute
+            *args: Positional arguments for func
+
+        Returns:
+            The function's return value
+        """
+        if not self.enabled:
+            return func(*args)
+
+        if self._executor is None:
+            self.start()
+
+        executor = self._executor
+        try:
+            return await self._submit(executor, func, *args)
+        except BrokenProcessPool:
+            if executor is self._executor:
+                logger.error("Extraction worker died (likely memory limit), recycling pool")
+                self._restart(executor)
+
+        logger.warning("Extraction pool broke while a job was running on it, retrying the job in its own process")
+        isolated = self._create_pool(1)
+        try:
+            return await self._submit(isolated, func, *args)
+        except BrokenProcessPool:
+            raise RuntimeError("Text extraction worker terminated unexpectedly")
+        finally:
+            self._terminate(isolated)
+
+    async def extract_text(self, source: DocumentSource, file_extension: str) -> str:
+        """
+        Extract text without blocking the event loop.
+
+        Args:
+            source: File content as bytes or the path of a file holding it
+            file_extension: File extension (pdf, docx, txt, md, etc.)
+
+        Returns:
+            Extracted text content
+        """
+        return await self.run(TextExtractor.extract_text, source, file_extension)
+
+    async def iter_sections(
+        self,
+        source: DocumentSource,
+        file_extension: str
+    ) -> AsyncIterator[Tuple[Optional[int], str]]:
+        """
+        Stream extracted text as ordered (page_number, text) sections.
+
+        PDFs are split into page ranges. With PDF_PARALLEL_EXTRACTION enabled,
+        PDFs of at least PDF_PARALLEL_MIN_PAGES pages keep up to one range per
+        pool process in flight; pages are yielded in order as soon as their
+        range is done, so downstream stages start before the whole document
+        is parsed and at most a window of ranges is held in memory. Without
+        the pool, sections are pulled from the extractor's generator as
+        they are consumed.
+
+        Formats whose backend parses incrementally (the lxml DOCX backend)
+        are not sent to the pool, which could only return the whole
+        document at once: their generator runs in this process and is
+        advanced in a worker thread, STREAM_WINDOW blocks at a time, so the
+        event loop stays responsive and memory stays flat.
+
+        Args:
+            source: File content as bytes or the path of a file holding it
+            file_extension: File extension (pdf, docx, txt, md, etc.)
+
+        Yields:
+            (page_number, text) tuples; page_number is None for formats without pages
+        """
+        if not self.enabled:
+            # No process boundary to cross: feed the extractor's generator
+            # straight to the consumer, so streaming backends never
+            # materialise the whole document
+            for section in TextExtractor.iter_sections(source, file_extension):
+                yield section
+            return
+
+        if TextExtractor.streams_sections(file_extension):
+            sections = TextExtractor.iter_sections(source, file_extension)
+            try:
+                while True:
+                    window = await asyncio.to_thread(list, islice(sections, STREAM_WINDOW))
+                    if not window:
+                        return
+                    for section in window:
+                        yield section
+            finally:
+                sections.close()
+
+        if file_extension.lower() != 'pdf':
+            for section in await self.run(TextExtractor.extract_sections, source, file_extension):
+                yield section
+            return
+
+        page_count = await self.run(TextExtractor.count_pdf_pages, source)
+        if settings.PDF_PARALLEL_EXTRACTION and page_count >= settings.PDF_PARALLEL_MIN_PAGES:
+            window = self.max_workers
+        else:
+            window = 1
+        ranges = split_page_ranges(page_count, settings.PDF_PAGES_PER_TASK)
+
+        in_flight = deque()
+        try:
+            for start, end in ranges:
+                in_flight.append(asyncio.ensure_future(
+                    self.run(TextExtractor.extract_pdf_pages, source, start, end)
+                ))
+                if len(in_flight) >= window:
+                    for page in await in_flight.popleft():
+                        yield page
+            while in_flight:
+                for page in await in_flight.popleft():
+                    yield page
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    async def extract_sections(
+        self,
+        source: DocumentSource,
+        file_extension: str
+    ) -> List[Tuple[Optional[int], str]]:
+        """
+        Extract all sections of a document at once.
+
+        Args:
+            source: File content as bytes or the path of a file holding it
+            file_extension: File extension (pdf, docx, txt, md, etc.)
+
+        Returns:
+            List of (page_number, text) tuples; page_number is None for formats without pages
+        """
+        return [section async for section in self.iter_sections(source, file_extension)]
+
+
+# Singleton instance
+extraction_engine = ExtractionEngine()
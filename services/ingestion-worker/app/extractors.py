@@ -0,0 +1,395 @@
+# FILE: services/ingestion-worker/app/extractors.py
+
+import codecs
+import importlib.util
+import mmap
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Type
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Document format handled by each supported file extension
+FORMAT_BY_EXTENSION = {
+    "pdf": "pdf",
+    "docx": "docx",
+    "doc": "docx",
+    "txt": "text",
+    "md": "text",
+}
+
+
+class ExtractorBackend:
+    """
+    A text extraction implementation for one document format.
+
+    Backends read from an open, seekable binary stream. Those that depend on
+    an optional library name it in `requires`; the library is imported only
+    when the backend is used.
+    """
+
+    name: str = ""
+    format: str = ""
+    requires: Optional[str] = None
+    streams: bool = False  # iter_blocks parses incrementally instead of extracting everything first
+
+    def available(self) -> bool:
+        """Whether the backend's library is installed."""
+        return self.requires is None or importlib.util.find_spec(self.requires) is not None
+
+    def extract_text(self, stream: BinaryIO) -> str:
+        """
+        Extract the text of a whole document.
+
+        Args:
+            stream: Readable, seekable stream over the file
+
+        Returns:
+            Extracted text content
+        """
+        raise NotImplementedError
+
+    def iter_blocks(self, stream: BinaryIO) -> Iterator[str]:
+        """
+        Lazily extract a document as non-empty blocks of text in document order.
+
+        Joining the blocks with blank lines gives the document text. Backends
+        that can parse incrementally override this so callers can consume
+        blocks while the rest of the file is still being read; the default
+        yields the whole text as one block.
+
+        Args:
+            stream: Readable, seekable stream over the file
+
+        Yields:
+            Text blocks
+        """
+        text = self.extract_text(stream)
+        if text:
+            yield text
+
+
+class PdfBackend(ExtractorBackend):
+    """Base class for PDF backends, which can also work on page ranges."""
+
+    format = "pdf"
+
+    def count_pages(self, stream: BinaryIO) -> int:
+        """Number of pages in the PDF."""
+        raise NotImplementedError
+
+    def extract_pages(
+        self,
+        stream: BinaryIO,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> List[Tuple[int, str]]:
+        """
+        Extract text from a range of pages.
+
+        Args:
+            stream: Readable, seekable stream over the PDF
+            start: Index of the first page to extract
+            end: Index one past the last page to extract (defaults to the last page)
+
+        Returns:
+            List of (page_number, text) tuples with 1-based page numbers,
+            skipping pages without text
+        """
+        raise NotImplementedError
+
+    def extract_text(self, stream: BinaryIO) -> str:
+        return "\n\n".join(text for _, text in self.extract_pages(stream))
+
+
+_REGISTRY: Dict[str, Dict[str, ExtractorBackend]] = {}
+
+
+def register_backend(backend_class: Type[ExtractorBackend]) -> Type[ExtractorBackend]:
+    """Class decorator adding a backend to the registry under its format and name."""
+    backend = backend_class()
+    _REGISTRY.setdefault(backend.format, {})[backend.name] = backend
+    return backend_class
+
+
+def format_for(file_extension: str) -> str:
+    """
+    Map a file extension to its document format.
+
+    Raises:
+        ValueError: If the extension is not supported
+    """
+    ext = file_extension.lower()
+    if ext not in FORMAT_BY_EXTENSION:
+        raise ValueError(f"Unsupported file extension: {ext}")
+    return FORMAT_BY_EXTENSION[ext]
+
+
+def backend_names(document_format: str) -> List[str]:
+    """Names of the registered backends for a format."""
+    return list(_REGISTRY.get(document_format, {}))
+
+
+def configured_backend(document_format: str) -> str:
+    """Name of the backend selected in settings for a format."""
+    return {
+        "pdf": settings.PDF_EXTRACTOR,
+        "docx": settings.DOCX_EXTRACTOR,
+        "text": settings.TEXT_EXTRACTOR,
+    }[document_format]
+
+
+def get_backend(file_extension: str, name: Optional[str] = None) -> ExtractorBackend:
+    """
+    Look up the extraction backend for a file extension.
+
+    Args:
+        file_extension: File extension (pdf, docx, txt, md, etc.)
+        name: Backend name; defaults to the one configured for the format
+
+    Returns:
+        The backend
+
+    Raises:
+        ValueError: If the extension or backend is unknown
+    """
+    document_format = format_for(file_extension)
+    name = name or configured_backend(document_format)
+    backends = _REGISTRY.get(document_format, {})
+    if name not in backends:
+        raise ValueError(
+            f"Unknown {document_format} extractor '{name}', "
+            f"available: {', '.join(backends)}"
+        )
+    return backends[name]
+
+
+@register_backend
+class PyPDF2Backend(PdfBackend):
+    """PyPDF2 (the original extractor)."""
+
+    name = "pypdf2"
+    requires = "PyPDF2"
+
+    def _reader(self, stream: BinaryIO):
+        from PyPDF2 import PdfReader
+        return PdfReader(stream)
+
+    def count_pages(self, stream: BinaryIO) -> int:
+        return len(self._reader(stream).pages)
+
+    def extract_pages(self, stream, start=0, end=None):
+        reader = self._reader(stream)
+        end = len(reader.pages) if end is None else end
+        pages = []
+        for index in range(start, end):
+            text = reader.pages[index].extract_text()
+            if text:
+                pages.append((index + 1, text))
+        return pages
+
+
+@register_backend
+class PypdfBackend(PyPDF2Backend):
+    """pypdf, the maintained successor of PyPDF2 with the same API."""
+
+    name = "pypdf"
+    requires = "pypdf"
+
+    def _reader(self, stream: BinaryIO):
+        from pypdf import PdfReader
+        return PdfReader(stream)
+
+
+@register_backend
+class PdfminerBackend(PdfBackend):
+    """pdfminer.six layout analysis; slower but keeps reading order on complex layouts."""
+
+    name = "pdfminer"
+    requires = "pdfminer"
+
+    def count_pages(self, stream: BinaryIO) -> int:
+        from pdfminer.pdfpage import PDFPage
+        return sum(1 for _ in PDFPage.get_pages(stream))
+
+    def extract_pages(self, stream, start=0, end=None):
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+        end = self.count_pages(stream) if end is None else end
+        stream.seek(0)
+
+        pages = []
+        indexes = range(start, end)
+        for index, layout in zip(indexes, extract_pages(stream, page_numbers=set(indexes))):
+            text = "".join(
+                element.get_text() for element in layout if isinstance(element, LTTextContainer)
+            ).strip()
+            if text:
+                pages.append((index + 1, text))
+        return pages
+
+
+@register_backend
+class PythonDocxBackend(ExtractorBackend):
+    """python-docx document model; paragraphs only."""
+
+    name = "python-docx"
+    format = "docx"
+    requires = "docx"
+
+    def extract_text(self, stream: BinaryIO) -> str:
+        from docx import Document
+        doc = Document(stream)
+        return "\n\n".join(
+            paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()
+        )
+
+
+@register_backend
+class LxmlDocxBackend(ExtractorBackend):
+    """
+    Stream word/document.xml out of the DOCX zip with lxml.etree.iterparse.
+
+    No document model is built: each body paragraph is yielded as a block
+    when its closing tag is parsed, and each table row as one block of
+    tab-separated cell text (paragraphs of nested tables are folded into
+    the enclosing cell). Parsed elements are cleared as soon as they are
+    consumed, so memory stays flat on large, table-heavy files. Unlike
+    python-docx, table text is included.
+    """
+
+    name = "lxml"
+    format = "docx"
+    requires = "lxml"
+    streams = True
+
+    W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+    def extract_text(self, stream: BinaryIO) -> str:
+        return "\n\n".join(self.iter_blocks(stream))
+
+    def _paragraph_text(self, paragraph) -> str:
+        """Text of the runs of a paragraph; deleted text (w:delText) is skipped."""
+        parts = []
+        for element in paragraph.iter(f"{self.W}t", f"{self.W}tab", f"{self.W}br", f"{self.W}cr"):
+            if element.tag == f"{self.W}t":
+                parts.append(element.text or "")
+            elif element.tag == f"{self.W}tab":
+                parts.append("\t")
+            else:
+                parts.append("\n")
+        return "".join(parts)
+
+    @staticmethod
+    def _release(element):
+        """Free a consumed element and the already-consumed siblings before it."""
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+    def iter_blocks(self, stream: BinaryIO) -> Iterator[str]:
+        from lxml import etree
+
+        paragraph, table, row, cell = (
+            f"{self.W}p", f"{self.W}tbl", f"{self.W}tr", f"{self.W}tc"
+        )
+        stream.seek(0)
+        with zipfile.ZipFile(stream) as archive, archive.open("word/document.xml") as xml:
+            depth = 0
+            cells: List[str] = []
+            cell_parts: List[str] = []
+            events = etree.iterparse(
+                xml,
+                events=("start", "end"),
+                tag=(paragraph, table, row, cell),
+                resolve_entities=False,
+                no_network=True
+            )
+            for event, element in events:
+                if element.tag == table:
+                    depth += 1 if event == "start" else -1
+                    if event == "end" and depth == 0:
+                        self._release(element)
+                    continue
+                if event == "start":
+                    continue
+
+                if element.tag == paragraph:
+                    text = self._paragraph_text(element)
+                    if depth:
+                        if text.strip():
+                            cell_parts.append(text)
+                    else:
+                        if text.strip():
+                            yield text
+                        self._release(element)
+                elif element.tag == cell and depth == 1:
+                    cells.append(" ".join(cell_parts))
+                    cell_parts = []
+                elif element.tag == row and depth == 1:
+                    if any(text.strip() for text in cells):
+                        yield "\t".join(cells)
+                    cells = []
+                    self._release(element)
+
+
+@register_backend
+class Utf8Backend(ExtractorBackend):
+    """Decode the whole buffer as UTF-8, falling back to latin-1."""
+
+    name = "utf8"
+    format = "text"
+
+    def extract_text(self, stream: BinaryIO) -> str:
+        if isinstance(stream, mmap.mmap):
+            # Decode straight from the mapping without an intermediate bytes copy
+            with memoryview(stream) as data:
+                return self._decode(data)
+        return self._decode(stream.read())
+
+    @staticmethod
+    def _decode(data) -> str:
+        try:
+            return str(data, 'utf-8')
+        except UnicodeDecodeError:
+            # Try with latin-1 encoding as fallback
+            return str(data, 'latin-1')
+
+
+@register_backend
+class IncrementalTextBackend(ExtractorBackend):
+    """
+    Decode fixed-size blocks with an incremental UTF-8 decoder.
+
+    Stops at the first invalid block and re-decodes as latin-1, so the
+    output matches the utf8 backend while large files are never held as
+    one bytes object next to their text.
+    """
+
+    name = "incremental"
+    format = "text"
+    block_size = 1024 * 1024
+
+    def extract_text(self, stream: BinaryIO) -> str:
+        stream.seek(0)
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        parts = []
+        try:
+            while True:
+                block = stream.read(self.block_size)
+                if not block:
+                    parts.append(decoder.decode(b"", final=True))
+                    return "".join(parts)
+                parts.append(decoder.decode(block))
+        except UnicodeDecodeError:
+            parts = []
+            stream.seek(0)
+            decoder = codecs.getincrementaldecoder('latin-1')()
+            while True:
+                block = stream.read(self.block_size)
+                if not block:
+                    return "".join(parts)
+                parts.append(decoder.decode(block))
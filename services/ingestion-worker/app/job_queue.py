@@ -0,0 +1,493 @@
+# FILE: services/ingestion-worker/app/job_queue.py
+
+import asyncio
+import os
+import socket
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import redis.asyncio as redis
+from redis.exceptions import ResponseError, WatchError
+from app.scheduler import FairScheduler, job_scheduler, LANES, classify_job, job_cost
+from app.metrics import queue_backlog
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, str]], Awaitable[None]]
+DeadLetterHandler = Callable[[Dict[str, str], str], Awaitable[None]]
+
+
+class IngestionQueue:
+    """
+    Durable, tenant-fair ingestion job queue backed by Redis Streams.
+
+    Each job is added to a stream per lane and user
+    ({INGESTION_STREAM}:{lane}:{user_id}), so one user's backlog never sits
+    in front of another user's jobs. Users with queued work are registered
+    in a sorted set per lane scored by the virtual time they have consumed;
+    workers read one job at a time from the least-served users of every
+    lane and charge them cost / weight, which gives weighted fair queuing
+    across the whole deployment. Fetched jobs go through the worker's
+    FairScheduler, which picks between lanes and users locally.
+
+    Producers that do not pick a lane (the document service) add jobs to
+    the intake stream, INGESTION_STREAM itself; workers move each one to
+    its lane stream with classify_job, in the same transaction that
+    acknowledges it, so lanes are only ever chosen here.
+
+    Jobs are acknowledged only after the handler succeeds. Messages left
+    pending by a crashed or stalled worker are reclaimed once they have been
+    idle for QUEUE_CLAIM_IDLE_MS, and jobs that keep failing are moved to a
+    dead-letter stream after QUEUE_MAX_DELIVERIES attempts.
+    """
+
+    def __init__(self, scheduler: FairScheduler = job_scheduler):
+        self.redis_client: Optional[redis.Redis] = None
+        self.stream = settings.INGESTION_STREAM
+        self.group = settings.INGESTION_CONSUMER_GROUP
+        self.dead_letter_stream = settings.INGESTION_DEAD_LETTER_STREAM
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.scheduler = scheduler
+        self._handler: Optional[JobHandler] = None
+        self._on_dead_letter: Optional[DeadLetterHandler] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._released = asyncio.Event()
+        # Stream key -> IDs of messages handed to the scheduler and not yet finished
+        self._held: Dict[str, Set[str]] = defaultdict(set)
+
+    def tenant_stream(self, lane: str, user_id: str) -> str:
+        """Stream holding one user's jobs in one lane."""
+        return f"{self.stream}:{lane}:{user_id}"
+
+    def tenants_key(self, lane: str) -> str:
+        """Sorted set of users with queued work in a lane, scored by virtual time."""
+        return f"{self.stream}:tenants:{lane}"
+
+    def new_tenants_key(self, lane: str) -> str:
+        """Set of users whose lane stream received jobs and may need registering."""
+        return f"{self.stream}:tenants:{lane}:new"
+
+    async def connect(self):
+        """Connect to Redis and make sure the consumer group exists."""
+        if not self.redis_client:
+            self.redis_client = await redis.from_url(
+                settings.REDIS_URL,
+                encoding="utf-8",
+                decode_responses=True
+            )
+        await self._ensure_group(self.stream)
+
+    async def disconnect(self):
+        """Disconnect from Redis."""
+        if self.redis_client:
+            await self.redis_client.close()
+            self.redis_client = None
+
+    async def _ensure_group(self, key: str):
+        """Create the consumer group on a stream if it does not exist yet."""
+        try:
+            await self.redis_client.xgroup_create(key, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def enqueue(self, job: Dict[str, Any]) -> str:
+        """
+        Add a job to its user's lane stream.
+
+        Args:
+            job: Flat mapping of job fields; booleans are stored as "true"/"false"
+                and None values are dropped
+
+        Returns:
+            Stream entry ID of the job
+        """
+        fields = {
+            key: str(value).lower() if isinstance(value, bool) else value
+            for key, value in job.items()
+            if value is not None
+        }
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            self._add_to_lane(pipe, fields)
+            message_id, _ = await pipe.execute()
+        return message_id
+
+    def _add_to_lane(self, pipe, fields: Dict[str, str]):
+        """Queue the commands adding a job to its user's lane stream on a pipeline."""
+        lane = classify_job(fields)
+        pipe.xadd(self.tenant_stream(lane, fields["user_id"]), fields)
+        pipe.sadd(self.new_tenants_key(lane), fields["user_id"])
+
+    async def _route(self, message_id: str, job: Dict[str, str]):
+        """Move a job from the intake stream to its lane stream and acknowledge it, atomically."""
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            if job.get("user_id"):
+                self._add_to_lane(pipe, job)
+            elif job:
+                pipe.xadd(self.dead_letter_stream, {**job, "original_id": message_id, "error": "Job has no user_id"})
+            pipe.xack(self.stream, self.group, message_id)
+            pipe.xdel(self.stream, message_id)
+            await pipe.execute()
+
+    async def _route_intake(self):
+        """Route jobs waiting on the intake stream."""
+        response = await self.redis_client.xreadgroup(
+            self.group,
+            self.consumer,
+            streams={self.stream: ">"},
+            count=settings.SCHEDULER_TENANTS_PER_FETCH
+        )
+        for _, messages in response or []:
+            for message_id, job in messages:
+                await self._route(message_id, job)
+
+    async def announce_chunks_changed(self, user_id: str):
+        """
+        Tell RAG service replicas that a user's chunks changed.
+
+        Publishes the user ID on CHUNK_EVENTS_CHANNEL so their hot-tenant
+        caches drop it. Best effort: errors are logged, since those caches
+        also expire entries on a TTL.
+
+        Args:
+            user_id: User whose chunks were written or deleted
+        """
+        if not self.redis_client:
+            return
+        try:
+            await self.redis_client.publish(settings.CHUNK_EVENTS_CHANNEL, user_id)
+        except Exception as e:
+            logger.warning(f"Failed to announce changed chunks of user {user_id}: {e}")
+
+    async def start(
+        self,
+        handler: JobHandler,
+        on_dead_letter: Optional[DeadLetterHandler] = None
+    ):
+        """
+        Start fetching jobs into the scheduler.
+
+        Args:
+            handler: Coroutine run for every job; raising leaves the job pending
+            on_dead_letter: Coroutine run when a job is moved to the dead-letter stream
+        """
+        self._stopping.clear()
+        self._handler = handler
+        self._on_dead_letter = on_dead_letter
+        self._tasks = [
+            asyncio.create_task(self._fetch_loop()),
+            asyncio.create_task(self._heartbeat_loop()),
+            asyncio.create_task(self._reclaim_loop())
+        ]
+        logger.info(f"Started ingestion consumer {self.consumer} on {self.stream}")
+
+    async def stop(self):
+        """
+        Stop fetching jobs.
+
+        Jobs already handed to the scheduler are finished or cancelled by its
+        shutdown; cancelled ones stay pending and are reclaimed by other workers.
+        """
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def get_stats(self) -> dict:
+        """Get per-lane tenants, backlog and pending counts plus intake and dead-letter lengths."""
+        if not self.redis_client:
+            return {"status": "disconnected"}
+
+        backlog = await self._lane_backlog()
+        lanes = {}
+        for lane in LANES:
+            undelivered, pending = backlog[lane]
+            lanes[lane] = {
+                "tenants": await self.redis_client.zcard(self.tenants_key(lane)),
+                "backlog": undelivered,
+                "pending": pending,
+                "scheduled_locally": self.scheduler.queued(lane),
+            }
+        return {
+            "status": "connected",
+            "lanes": lanes,
+            "intake_length": await self.redis_client.xlen(self.stream),
+            "dead_letter_length": await self.redis_client.xlen(self.dead_letter_stream),
+        }
+
+    async def _lane_streams(self, limit: int = 0) -> Dict[str, Tuple[str, str]]:
+        """
+        Map stream keys to (lane, user_id), least-served users first.
+
+        Args:
+            limit: Users to take per lane; 0 takes all
+
+        Returns:
+            Dict of stream key to (lane, user_id)
+        """
+        streams = {}
+        for lane in LANES:
+            users = await self.redis_client.zrange(self.tenants_key(lane), 0, limit - 1)
+            for user_id in users:
+                streams[self.tenant_stream(lane, user_id)] = (lane, user_id)
+        return streams
+
+    async def _lane_backlog(self) -> Dict[str, Tuple[int, int]]:
+        """Undelivered and pending job counts per lane, refreshing the backlog gauge."""
+        streams = await self._lane_streams()
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for key in streams:
+                pipe.xinfo_groups(key)
+            replies = await pipe.execute(raise_on_error=False)
+
+        totals = {lane: [0, 0] for lane in LANES}
+        for (lane, _), groups in zip(streams.values(), replies):
+            if isinstance(groups, Exception):
+                continue
+            for group in groups:
+                if group["name"] == self.group:
+                    totals[lane][0] += group.get("lag") or 0
+                    totals[lane][1] += group["pending"]
+        for lane, (undelivered, _) in totals.items():
+            queue_backlog.labels(lane=lane).set(undelivered)
+        return {lane: (undelivered, pending) for lane, (undelivered, pending) in totals.items()}
+
+    async def _activate_tenants(self):
+        """Register users whose lane stream received jobs, at the lane's lowest virtual time."""
+        for lane in LANES:
+            while True:
+                user_id = await self.redis_client.spop(self.new_tenants_key(lane))
+                if user_id is None:
+                    break
+                await self._ensure_group(self.tenant_stream(lane, user_id))
+                lowest = await self.redis_client.zrange(
+                    self.tenants_key(lane), 0, 0, withscores=True
+                )
+                floor = lowest[0][1] if lowest else 0.0
+                # An idle user re-enters at the current minimum instead of with banked credit
+                await self.redis_client.zadd(self.tenants_key(lane), {user_id: floor}, nx=True)
+
+    async def _retire_if_drained(self, lane: str, user_id: str):
+        """Unregister a user and drop their stream once every job in it is acknowledged."""
+        key = self.tenant_stream(lane, user_id)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                try:
+                    groups = await pipe.xinfo_groups(key)
+                except ResponseError:
+                    # Stream is gone; only the registry entry is left
+                    pipe.multi()
+                    pipe.zrem(self.tenants_key(lane), user_id)
+                    await pipe.execute()
+                    return
+
+                group = next((g for g in groups if g["name"] == self.group), None)
+                # lag is None when Redis cannot tell, which keeps the user registered
+                if group is None or group["pending"] or group.get("lag") != 0:
+                    await pipe.unwatch()
+                    return
+
+                pipe.multi()
+                pipe.zrem(self.tenants_key(lane), user_id)
+                pipe.delete(key)
+                await pipe.execute()
+            except WatchError:
+                # A job was added meanwhile; the user stays registered
+                pass
+
+    async def _fetch(self):
+        """
+        Read one job from each of the least-served users and hand them to the scheduler.
+
+        The intake stream is read too, so a new job wakes an idle worker;
+        jobs read from it are routed to their lane.
+        """
+        streams = await self._lane_streams(settings.SCHEDULER_TENANTS_PER_FETCH)
+        try:
+            response = await self.redis_client.xreadgroup(
+                self.group,
+                self.consumer,
+                streams={**{key: ">" for key in streams}, self.stream: ">"},
+                count=1,
+                block=settings.QUEUE_BLOCK_MS
+            )
+        except ResponseError as e:
+            if "NOGROUP" not in str(e):
+                raise
+            # Another worker retired a user between listing and reading; list again
+            return
+
+        delivered = set()
+        charges = defaultdict(dict)
+        for key, messages in response or []:
+            if key == self.stream:
+                for message_id, job in messages:
+                    await self._route(message_id, job)
+                continue
+            delivered.add(key)
+            lane, user_id = streams[key]
+            for message_id, job in messages:
+                self._submit(key, message_id, job, lane)
+                weight = float(self.scheduler.user_weights.get(user_id, 1.0)) or 1.0
+                charges[lane][user_id] = charges[lane].get(user_id, 0.0) + job_cost(job) / weight
+
+        for lane, users in charges.items():
+            for user_id, charge in users.items():
+                await self.redis_client.zadd(
+                    self.tenants_key(lane), {user_id: charge}, xx=True, incr=True
+                )
+
+        for key, (lane, user_id) in streams.items():
+            if key not in delivered and not self._held.get(key):
+                await self._retire_if_drained(lane, user_id)
+
+    def _held_count(self) -> int:
+        return sum(len(ids) for ids in self._held.values())
+
+    async def _fetch_loop(self):
+        """Keep up to SCHEDULER_PREFETCH jobs beyond the running ones in the scheduler."""
+        while not self._stopping.is_set():
+            try:
+                await self._route_intake()
+                await self._activate_tenants()
+                if self._held_count() >= self.scheduler.slots + settings.SCHEDULER_PREFETCH:
+                    self._released.clear()
+                    try:
+                        await asyncio.wait_for(
+                            self._released.wait(), timeout=settings.QUEUE_BLOCK_MS / 1000
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._fetch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Consumer {self.consumer} failed to read from {self.stream}: {e}")
+                await asyncio.sleep(1)
+
+    def _submit(self, key: str, message_id: str, job: Dict[str, str], lane: str):
+        """Queue a delivered message in the scheduler."""
+        self._held[key].add(message_id)
+        future = self.scheduler.submit(
+            lane,
+            job.get("user_id", ""),
+            job_cost(job),
+            lambda: self._process(key, message_id, job),
+            enqueued_at=int(message_id.split("-")[0]) / 1000
+        )
+        future.add_done_callback(lambda done: self._release(key, message_id, done))
+
+    def _release(self, key: str, message_id: str, future: asyncio.Future):
+        """Forget a finished or cancelled message."""
+        ids = self._held.get(key)
+        if ids is not None:
+            ids.discard(message_id)
+            if not ids:
+                del self._held[key]
+        self._released.set()
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Job {message_id} on {key} could not be settled: {future.exception()}")
+
+    async def _heartbeat_loop(self):
+        """Keep held jobs' idle time low so they are not reclaimed while queued or running."""
+        interval = settings.QUEUE_CLAIM_IDLE_MS / 3000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for key, ids in self._held.items():
+                        pipe.xclaim(
+                            key, self.group, self.consumer,
+                            min_idle_time=0, message_ids=list(ids), justid=True
+                        )
+                    await pipe.execute()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Heartbeat for held jobs failed: {e}")
+
+    async def _reclaim_loop(self):
+        """Periodically take over jobs abandoned by dead workers and refresh backlog gauges."""
+        interval = settings.QUEUE_CLAIM_IDLE_MS / 2000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # Intake jobs read by a worker that died before routing them
+                claimed = await self.redis_client.xautoclaim(
+                    self.stream,
+                    self.group,
+                    self.consumer,
+                    min_idle_time=settings.QUEUE_CLAIM_IDLE_MS,
+                    start_id="0-0",
+                    count=settings.SCHEDULER_TENANTS_PER_FETCH
+                )
+                for message_id, job in claimed[1]:
+                    await self._route(message_id, job)
+                for key, (lane, user_id) in (await self._lane_streams()).items():
+                    try:
+                        claimed = await self.redis_client.xautoclaim(
+                            key,
+                            self.group,
+                            self.consumer,
+                            min_idle_time=settings.QUEUE_CLAIM_IDLE_MS,
+                            start_id="0-0",
+                            count=settings.SCHEDULER_PREFETCH
+                        )
+                    except ResponseError:
+                        continue
+                    for message_id, job in claimed[1]:
+                        if job and message_id not in self._held.get(key, ()):
+                            self._submit(key, message_id, job, lane)
+                await self._lane_backlog()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Reclaiming stale jobs failed: {e}")
+
+    async def _delivery_count(self, key: str, message_id: str) -> int:
+        """Number of times a pending message has been delivered."""
+        entries = await self.redis_client.xpending_range(
+            key, self.group, min=message_id, max=message_id, count=1
+        )
+        return entries[0]["times_delivered"] if entries else 1
+
+    async def _dead_letter(self, key: str, message_id: str, job: Dict[str, str], error: str):
+        """Move a job to the dead-letter stream and acknowledge it."""
+        await self.redis_client.xadd(
+            self.dead_letter_stream,
+            {**job, "original_id": message_id, "error": error[:1000]}
+        )
+        await self.redis_client.xack(key, self.group, message_id)
+        logger.error(f"Job {message_id} moved to {self.dead_letter_stream}: {error}")
+        if self._on_dead_letter:
+            await self._on_dead_letter(job, error)
+
+    async def _process(self, key: str, message_id: str, job: Dict[str, str]):
+        """Run the handler for one message and acknowledge or dead-letter it."""
+        deliveries = await self._delivery_count(key, message_id)
+        if deliveries > settings.QUEUE_MAX_DELIVERIES:
+            await self._dead_letter(key, message_id, job, "Exceeded maximum deliveries")
+            return
+
+        try:
+            await self._handler(job)
+            await self.redis_client.xack(key, self.group, message_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(
+                f"Job {message_id} failed on delivery {deliveries}/"
+                f"{settings.QUEUE_MAX_DELIVERIES}: {e}"
+            )
+            if deliveries >= settings.QUEUE_MAX_DELIVERIES:
+                await self._dead_letter(key, message_id, job, str(e))
+            # Otherwise leave the job pending; it is reclaimed after QUEUE_CLAIM_IDLE_MS
+
+
+# Global queue instance
+ingestion_queue = IngestionQueue()
@@ -1,11 +1,31 @@
 # FILE: services/ingestion-worker/app/main.py
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config import settings
 from app.database import init_db
 from app.routes import router as process_router
+from app.job_queue import ingestion_queue
+from app.scheduler import job_scheduler
+from app.extraction_pool import extraction_engine
+from app.bulk_writer import chunk_writer
+from app.embeddings import embedding_dispatcher
+from app.vector_index import vector_index_manager
+from app.schemas import ProcessDocumentRequest
+from app.worker import run_document_job, mark_document_failed
+from app.metrics import MetricsMiddleware
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+
+
+async def handle_queued_job(job: dict):
+    """Run a document job delivered by the ingestion queue."""
+    await run_document_job(ProcessDocumentRequest(**job))
+
+
+async def handle_dead_letter(job: dict, error: str):
+    """Mark a document failed once its job has exhausted its deliveries."""
+    await mark_document_failed(job["document_id"], error)
 
 
 @asynccontextmanager
@@ -13,9 +33,23 @@ async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
     await init_db()
+    vector_index_manager.start()
+    extraction_engine.start()
+    await chunk_writer.connect()
+    await embedding_dispatcher.connect()
+    job_scheduler.start()
+    await ingestion_queue.connect()
+    if settings.QUEUE_ENABLED:
+        await ingestion_queue.start(handle_queued_job, on_dead_letter=handle_dead_letter)
     yield
     # Shutdown
-    pass
+    await ingestion_queue.stop()
+    await job_scheduler.stop(settings.QUEUE_SHUTDOWN_TIMEOUT_SECONDS)
+    await ingestion_queue.disconnect()
+    await vector_index_manager.stop()
+    await embedding_dispatcher.disconnect()
+    await chunk_writer.disconnect()
+    extraction_engine.shutdown()
 
 
 app = FastAPI(
@@ -25,6 +59,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Metrics middleware (must be first)
+app.add_middleware(MetricsMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -55,3 +92,9 @@ async def root():
         "service": settings.SERVICE_NAME,
         "message": "Ingestion Worker API"
     }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,212 @@
+# FILE: services/ingestion-worker/app/metrics.py
+
+from contextlib import contextmanager
+from typing import Dict
+from prometheus_client import Counter, Gauge, Histogram, Info
+import time
+
+# Service information
+service_info = Info('ingestion_worker', 'Ingestion Worker Information')
+service_info.info({'version': '0.1.0', 'service': 'ingestion-worker'})
+
+# Request metrics
+http_requests_total = Counter(
+    'ingestion_http_requests_total',
+    'Total HTTP requests',
+    ['method', 'endpoint', 'status']
+)
+
+http_request_duration_seconds = Histogram(
+    'ingestion_http_request_duration_seconds',
+    'HTTP request latency in seconds',
+    ['method', 'endpoint']
+)
+
+# Pipeline metrics
+jobs_in_progress = Gauge(
+    'ingestion_jobs_in_progress',
+    'Document jobs currently being downloaded or processed'
+)
+
+documents_processed_total = Counter(
+    'ingestion_documents_processed_total',
+    'Document jobs finished',
+    ['outcome']  # success, failed
+)
+
+stage_duration_seconds = Histogram(
+    'ingestion_stage_duration_seconds',
+    'Time a document spends busy in each pipeline stage',
+    ['stage'],  # download, extract, chunk, dedup, embed, write, total
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600]
+)
+
+document_bytes = Histogram(
+    'ingestion_document_bytes',
+    'Size of downloaded documents',
+    buckets=[1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8, 5e8]
+)
+
+document_pages = Histogram(
+    'ingestion_document_pages',
+    'Pages with text per processed PDF',
+    buckets=[1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+)
+
+document_chunks = Histogram(
+    'ingestion_document_chunks',
+    'Chunks per processed document',
+    buckets=[1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+)
+
+embedding_request_batch_size = Histogram(
+    'ingestion_embedding_request_batch_size',
+    'Texts per embedding request sent to the LLM Proxy',
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256]
+)
+
+embedding_request_duration_seconds = Histogram(
+    'ingestion_embedding_request_duration_seconds',
+    'Latency of embedding requests to the LLM Proxy',
+    ['status'],  # success, error
+    buckets=[0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60]
+)
+
+chunk_rows_written_total = Counter(
+    'ingestion_chunk_rows_written_total',
+    'Chunk rows upserted into document_chunks',
+    ['method']  # copy, insert
+)
+
+chunk_write_duration_seconds = Histogram(
+    'ingestion_chunk_write_duration_seconds',
+    'Time to upsert one batch of chunk rows',
+    ['method'],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+)
+
+# Embedding deduplication metrics
+embedding_dedup_lookups_total = Counter(
+    'ingestion_embedding_dedup_lookups_total',
+    'Chunks looked up in the content-hash embedding index',
+    ['result']  # hit, miss
+)
+
+embeddings_generated_total = Counter(
+    'ingestion_embeddings_generated_total',
+    'Embeddings requested from the LLM Proxy'
+)
+
+# Near-duplicate detection metrics
+near_duplicate_chunks_total = Counter(
+    'ingestion_near_duplicate_chunks_total',
+    'Chunks classified by the near-duplicate detector',
+    ['mode', 'result']  # mode: skip, link; result: unique, duplicate
+)
+
+near_duplicate_ratio = Histogram(
+    'ingestion_near_duplicate_ratio',
+    'Fraction of a processed document\'s chunks that were near-duplicates',
+    ['mode'],
+    buckets=[0, 0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9, 1.0]
+)
+
+# Extraction cache metrics
+extraction_cache_lookups_total = Counter(
+    'ingestion_extraction_cache_lookups_total',
+    'Extracted-text cache lookups',
+    ['result']  # hit, miss, error
+)
+
+# Scheduling metrics
+scheduler_queue_depth = Gauge(
+    'ingestion_scheduler_queue_depth',
+    'Jobs waiting in this worker\'s fair scheduler',
+    ['lane']  # interactive, small, bulk
+)
+
+queue_backlog = Gauge(
+    'ingestion_queue_backlog',
+    'Jobs in the Redis lane streams not yet delivered to any worker',
+    ['lane']
+)
+
+scheduler_wait_seconds = Histogram(
+    'ingestion_scheduler_wait_seconds',
+    'Time from enqueue until a job starts processing',
+    ['lane'],
+    buckets=[0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600]
+)
+
+scheduler_jobs_started_total = Counter(
+    'ingestion_scheduler_jobs_started_total',
+    'Jobs dispatched by the fair scheduler',
+    ['lane']
+)
+
+
+class StageTimer:
+    """
+    Accumulate the time one document spends in each pipeline stage.
+
+    The streaming pipeline runs its stages concurrently, so each stage
+    records only the time it is busy with its own work, not the time it
+    waits for the stage before it. Concurrent embedding batches each count
+    their full latency. The stage with the largest total is the document's
+    bottleneck. Totals are observed once per document.
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        """Add time to a stage."""
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Time the enclosed block as part of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def observe(self):
+        """Record the accumulated stage times."""
+        for stage, seconds in self.durations.items():
+            stage_duration_seconds.labels(stage=stage).observe(seconds)
+
+
+class MetricsMiddleware:
+    """Middleware to track HTTP request metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        path = scope["path"]
+
+        # Skip metrics endpoint itself
+        if path == "/metrics":
+            return await self.app(scope, receive, send)
+
+        start_time = time.time()
+        status_code = 200
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.time() - start_time
+            http_requests_total.labels(method=method, endpoint=path, status=status_code).inc()
+            http_request_duration_seconds.labels(method=method, endpoint=path).observe(duration)
@@ -1,12 +1,40 @@
 # FILE: services/ingestion-worker/app/models.py
 
-from sqlalchemy import Column, String, DateTime, Integer, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Integer, Text, Boolean, ForeignKey, LargeBinary, BigInteger
+from sqlalchemy.dialects.postgresql import JSONB, ARRAY, BIT
 from sqlalchemy.sql import func
+from sqlalchemy.types import UserDefinedType
 from pgvector.sqlalchemy import Vector
 from app.database import Base
 import uuid
 
 
+class HalfVector(UserDefinedType):
+    """pgvector halfvec column (half-precision elements, pgvector 0.7+)."""
+
+    cache_ok = True
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def get_col_spec(self, **kw) -> str:
+        return f"HALFVEC({self.dim})"
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None or isinstance(value, str):
+                return value
+            return "[" + ",".join(str(float(x)) for x in value) + "]"
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None or not isinstance(value, str):
+                return value
+            return [float(x) for x in value.strip("[]").split(",")]
+        return process
+
+
 class DocumentChunk(Base):
     """Document chunk model with vector embeddings."""
 
@@ -20,9 +48,22 @@ class DocumentChunk(Base):
     chunk_index = Column(Integer, nullable=False)
     chunk_text = Column(Text, nullable=False)
     chunk_size = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of chunk_text
 
     # Vector embedding (1536 dimensions for OpenAI text-embedding-3-small)
     embedding = Column(Vector(1536), nullable=True)
+    # Unit-normalized half-precision copy, searched by inner product (EMBEDDING_STORAGE)
+    embedding_half = Column(HalfVector(1536), nullable=True)
+    # Re-normalized Matryoshka prefix of the embedding (EMBEDDING_REDUCED_DIMENSIONS);
+    # unconstrained so the tier size can change, one size at a time
+    embedding_reduced = Column(Vector(), nullable=True)
+    # One bit per dimension (component > 0), searched by Hamming distance (EMBEDDING_BINARY)
+    embedding_bits = Column(BIT(1536), nullable=True)
+
+    # Near-duplicate detection: canonical chunks carry their MinHash signature
+    # and LSH band keys
+    minhash = Column(LargeBinary, nullable=True)  # uint32 signature
+    lsh_bands = Column(ARRAY(BigInteger), nullable=True)
 
     # Metadata
     page_number = Column(Integer, nullable=True)
@@ -31,3 +72,35 @@ class DocumentChunk(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class ChunkEmbedding(Base):
+    """Embedding index keyed by the content hash of a chunk's text."""
+
+    __tablename__ = "chunk_embeddings"
+
+    content_hash = Column(String(64), primary_key=True)
+    model = Column(String, primary_key=True)
+    embedding = Column(Vector(1536), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class IngestionCheckpoint(Base):
+    """Progress of a document's last processing attempt, used to resume retries."""
+
+    __tablename__ = "ingestion_checkpoints"
+
+    document_id = Column(String, primary_key=True)
+    content_digest = Column(String(64), nullable=False)  # SHA-256 of the version being processed
+
+    # Stage 1: extracted text stored as a sidecar object
+    text_extracted = Column(Boolean, nullable=False, default=False)
+
+    # Stage 2-3: content hashes of committed chunks, in chunk order; skipped
+    # near-duplicates are recorded with a "skipped:" prefix
+    chunk_manifest = Column(JSONB, nullable=False, default=list)
+    watermark = Column(Integer, nullable=False, default=0)  # Chunks [0, watermark) are stored
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,270 @@
+# FILE: services/ingestion-worker/app/near_duplicates.py
+
+import asyncio
+import hashlib
+import re
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select, or_
+from app.database import AsyncSessionLocal
+from app.models import DocumentChunk
+from app.metrics import near_duplicate_chunks_total, near_duplicate_ratio
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+NEAR_DUPLICATE_MODES = ("off", "skip")
+
+# Modulus of the universal hash family used for the permutations
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+
+class ChunkFingerprint(NamedTuple):
+    """MinHash signature, LSH band keys and near-duplicate verdict of a chunk."""
+
+    signature: Optional[bytes]
+    bands: Optional[List[int]]
+    duplicate: bool = False  # Nearly matches an earlier chunk, so it is not stored
+    similarity: float = 0.0
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles, banded for locality-sensitive hashing.
+
+    Each shingle (SHINGLE_WORDS consecutive lowercased words) is hashed to
+    32 bits with CRC-32 and pushed through `permutations` hash functions
+    (a * x + b) mod (2^61 - 1) with fixed seeds, so signatures are stable
+    across processes and restarts. The fraction of equal signature
+    positions estimates the Jaccard similarity of two chunks' shingle sets.
+    The signature is cut into `bands` bands; chunks sharing the key of any
+    band are candidate near-duplicates.
+    """
+
+    def __init__(
+        self,
+        permutations: int = settings.MINHASH_PERMUTATIONS,
+        bands: int = settings.MINHASH_BANDS,
+        shingle_words: int = settings.MINHASH_SHINGLE_WORDS,
+        seed: int = 1
+    ):
+        if permutations % bands:
+            raise ValueError(
+                f"MINHASH_PERMUTATIONS ({permutations}) must be a multiple of MINHASH_BANDS ({bands})"
+            )
+        self.permutations = permutations
+        self.bands = bands
+        self.shingle_words = shingle_words
+        rng = np.random.RandomState(seed)
+        # a, b and the shingle hashes are below 2^32, so a * x + b never overflows uint64
+        self.a = rng.randint(1, 1 << 32, size=permutations, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=permutations, dtype=np.uint64)
+
+    def shingle_hashes(self, text: str) -> np.ndarray:
+        """32-bit hashes of the distinct word shingles of a text."""
+        words = re.findall(r"\w+", text.lower())
+        size = self.shingle_words
+        shingles = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        shingles.discard("")
+        return np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        MinHash signature of a text.
+
+        Args:
+            text: Chunk text
+
+        Returns:
+            uint32 array of length `permutations`, or None if the text has no words
+        """
+        hashes = self.shingle_hashes(text)
+        if not hashes.size:
+            return None
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME
+        return (permuted & np.uint64(0xFFFFFFFF)).min(axis=0).astype(np.uint32)
+
+    def band_keys(self, signature: np.ndarray, scope: str) -> List[int]:
+        """
+        LSH bucket keys of a signature, one per band, as signed 64-bit integers.
+
+        The scope (the user ID) is mixed into every key, so buckets of
+        different users never collide in the index.
+        """
+        keys = []
+        for index, band in enumerate(signature.reshape(self.bands, -1)):
+            digest = hashlib.blake2b(f"{scope}:{index}:".encode() + band.tobytes(), digest_size=8)
+            keys.append(int.from_bytes(digest.digest(), "big", signed=True))
+        return keys
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return float(np.mean(first == second))
+
+
+class DuplicateScope:
+    """
+    Near-duplicate classification of the chunks of one document run.
+
+    Candidates come from two places: canonical chunks of the user's other
+    documents stored in document_chunks (found through the GIN index on
+    lsh_bands), and unique chunks seen earlier in this run. Stored chunks of
+    the document itself are ignored, since they belong to the version being
+    replaced, except for the first `committed_below` chunks that a resumed
+    attempt already stored for this version. Chunks must be classified in
+    chunk order.
+    """
+
+    def __init__(
+        self,
+        detector: "NearDuplicateDetector",
+        user_id: str,
+        document_id: str,
+        mode: str,
+        committed_below: int = 0
+    ):
+        self.detector = detector
+        self.user_id = user_id
+        self.document_id = document_id
+        self.mode = mode
+        self.committed_below = committed_below
+        self.checked = 0
+        self.duplicates = 0
+        self._local: Dict[int, List[Tuple[str, np.ndarray]]] = {}
+
+    def _fingerprint(self, texts: List[str]) -> List[Tuple[Optional[np.ndarray], Optional[List[int]]]]:
+        hasher = self.detector.hasher
+        fingerprints = []
+        for text in texts:
+            signature = hasher.signature(text)
+            bands = hasher.band_keys(signature, self.user_id) if signature is not None else None
+            fingerprints.append((signature, bands))
+        return fingerprints
+
+    async def _stored_candidates(self, keys: Sequence[int]) -> List[Tuple[str, List[int], np.ndarray]]:
+        """Canonical chunks of the user sharing at least one band key."""
+        if not keys:
+            return []
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(DocumentChunk.id, DocumentChunk.lsh_bands, DocumentChunk.minhash).where(
+                    DocumentChunk.user_id == self.user_id,
+                    DocumentChunk.lsh_bands.overlap(list(keys)),
+                    or_(
+                        DocumentChunk.document_id != self.document_id,
+                        DocumentChunk.chunk_index < self.committed_below
+                    )
+                )
+            )
+            return [
+                (row.id, row.lsh_bands, np.frombuffer(row.minhash, dtype=np.uint32))
+                for row in result
+                if row.minhash is not None
+            ]
+
+    def observe(self):
+        """Record the duplicate ratio of the run."""
+        if self.checked:
+            near_duplicate_ratio.labels(mode=self.mode).observe(self.duplicates / self.checked)
+
+    async def classify(self, chunks: Sequence[Tuple[str, str]]) -> List[ChunkFingerprint]:
+        """
+        Fingerprint chunks and find those that nearly match a canonical chunk.
+
+        Args:
+            chunks: (chunk_id, chunk_text) tuples in chunk order
+
+        Returns:
+            One fingerprint per chunk
+        """
+        hashed = await asyncio.to_thread(self._fingerprint, [text for _, text in chunks])
+
+        stored_by_key: Dict[int, List[Tuple[str, np.ndarray]]] = {}
+        keys = {key for _, bands in hashed if bands for key in bands}
+        for chunk, bands, signature in await self._stored_candidates(sorted(keys)):
+            for key in bands:
+                if key in keys:
+                    stored_by_key.setdefault(key, []).append((chunk, signature))
+
+        results = []
+        threshold = self.detector.threshold
+        for (own_id, _), (signature, bands) in zip(chunks, hashed):
+            if signature is None:
+                results.append(ChunkFingerprint(None, None))
+                continue
+
+            best_id, best = None, 0.0
+            seen = set()
+            for key in bands:
+                for candidate_id, candidate in stored_by_key.get(key, []) + self._local.get(key, []):
+                    if candidate_id in seen:
+                        continue
+                    seen.add(candidate_id)
+                    score = self.detector.hasher.similarity(signature, candidate)
+                    if score > best:
+                        best_id, best = candidate_id, score
+
+            self.checked += 1
+            if best_id is not None and best >= threshold:
+                self.duplicates += 1
+                near_duplicate_chunks_total.labels(mode=self.mode, result="duplicate").inc()
+                results.append(ChunkFingerprint(None, None, duplicate=True, similarity=best))
+            else:
+                near_duplicate_chunks_total.labels(mode=self.mode, result="unique").inc()
+                for key in bands:
+                    self._local.setdefault(key, []).append((own_id, signature))
+                results.append(ChunkFingerprint(signature.tobytes(), bands))
+        return results
+
+
+class NearDuplicateDetector:
+    """
+    MinHash + LSH near-duplicate detection for chunks at ingestion time.
+
+    Revised contracts, versioned reports and re-exported PDFs produce chunks
+    that differ only in a few words. With the mode for a user set to
+    "skip", such a chunk is not stored or embedded at all. Only chunks
+    stored while detection is on carry a signature and can serve as
+    canonicals.
+    """
+
+    def __init__(self):
+        self.hasher = MinHasher()
+        self.threshold = settings.NEAR_DUPLICATE_THRESHOLD
+        self.default_mode = settings.NEAR_DUPLICATE_MODE
+        self.user_modes = settings.NEAR_DUPLICATE_USER_MODES
+        for mode in [self.default_mode, *self.user_modes.values()]:
+            if mode not in NEAR_DUPLICATE_MODES:
+                raise ValueError(f"Unknown near-duplicate mode '{mode}', expected one of {NEAR_DUPLICATE_MODES}")
+
+    def mode_for(self, user_id: str) -> str:
+        """Near-duplicate mode configured for a user."""
+        return self.user_modes.get(user_id, self.default_mode)
+
+    def scope(self, user_id: str, document_id: str, committed_below: int = 0) -> Optional[DuplicateScope]:
+        """
+        Start classifying the chunks of a document run.
+
+        Args:
+            user_id: Owner of the document
+            document_id: Document ID
+            committed_below: Chunks of this version already stored by a resumed attempt
+
+        Returns:
+            A scope, or None if detection is off for the user
+        """
+        mode = self.mode_for(user_id)
+        if mode == "off":
+            return None
+        return DuplicateScope(self, user_id, document_id, mode, committed_below)
+
+
+# Singleton instance
+near_duplicate_detector = NearDuplicateDetector()
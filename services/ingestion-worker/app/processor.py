@@ -1,122 +1,844 @@
 # FILE: services/ingestion-worker/app/processor.py
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from app.models import DocumentChunk
-from app.text_extractor import TextExtractor
-from app.chunker import TextChunker
-import httpx
+from sqlalchemy import delete, select, update, case, bindparam, func, literal, all_, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.models import DocumentChunk, IngestionCheckpoint
+from app.extraction_pool import extraction_engine
+from app.text_extractor import DocumentSource
+from app.bulk_writer import chunk_writer, lock_document, binary_quantize, normalize, shorten
+from app.embeddings import embedding_coalescer, is_transient
+from app.embedding_index import embedding_index, content_hash
+from app.metrics import (
+    embedding_dedup_lookups_total, embeddings_generated_total,
+    document_pages, document_chunks, StageTimer
+)
+from app.chunker import TextChunker, IncrementalChunker
+from app.checkpoints import checkpoint_store
+from app.extraction_cache import extraction_cache
+from app.near_duplicates import near_duplicate_detector, ChunkFingerprint, DuplicateScope
+import asyncio
+import difflib
+import time
+import uuid
 from app.config import settings
 import logging
-from typing import List
+from collections import deque
+from typing import AsyncIterator, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Marks the end of a pipeline stage's output
+_DONE = object()
+
+# Prefix of the checkpoint manifest entry of a chunk skipped as a near-duplicate
+SKIPPED_MARKER = "skipped:"
+
+
+def chunk_id(document_id: str, chunk_index: int) -> str:
+    """
+    Deterministic primary key for a document chunk.
+
+    Reprocessing a document (for example after a queue redelivery) writes
+    the same IDs again, so rows are replaced instead of duplicated.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{document_id}/{chunk_index}"))
+
+
+def delete_other_chunks(document_id: str, keep_ids: List[str]):
+    """DELETE of a document's chunks whose ID is not in keep_ids (one array parameter)."""
+    return delete(DocumentChunk).where(
+        DocumentChunk.document_id == document_id,
+        DocumentChunk.id != all_(literal(keep_ids, ARRAY(String)))
+    )
+
+
+def diff_chunks(
+    old_hashes: List[str],
+    new_hashes: List[str]
+) -> Tuple[List[Tuple[int, int]], List[int], List[int]]:
+    """
+    Align the stored chunks of a document with a new version by content hash.
+
+    Args:
+        old_hashes: Content hashes of the stored chunks, in chunk order
+        new_hashes: Content hashes of the new chunks, in chunk order
+
+    Returns:
+        Tuple of (kept (old position, new position) pairs, removed old
+        positions, added new positions)
+    """
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    kept = [
+        (block.a + offset, block.b + offset)
+        for block in matcher.get_matching_blocks()
+        for offset in range(block.size)
+    ]
+    kept_old = {old for old, _ in kept}
+    kept_new = {new for _, new in kept}
+    removed = [old for old in range(len(old_hashes)) if old not in kept_old]
+    added = [new for new in range(len(new_hashes)) if new not in kept_new]
+    return kept, removed, added
+
 
 class DocumentProcessor:
     """Process documents: extract text, chunk, and generate embeddings."""
 
     def __init__(self):
-        self.text_extractor = TextExtractor()
+        self.extraction_engine = extraction_engine
+        self.chunk_writer = chunk_writer
+        self.embedding_coalescer = embedding_coalescer
+        self.embedding_index = embedding_index
+        self.checkpoints = checkpoint_store
+        self.extraction_cache = extraction_cache
+        self.near_duplicates = near_duplicate_detector
         self.chunker = TextChunker()
 
     async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings using LLM Proxy service.
 
+        Texts whose content hash is already in the embedding index reuse the
+        stored vector; only unseen texts are sent to the LLM Proxy, once
+        each, and are then added to the index.
+
         Args:
             texts: List of text strings
 
         Returns:
             List of embedding vectors
         """
+        if not settings.EMBEDDING_DEDUP_ENABLED:
+            embeddings_generated_total.inc(len(texts))
+            return await self.embedding_coalescer.embed(texts)
+
+        hashes = [content_hash(text) for text in texts]
+        known = await self.embedding_index.lookup(hashes)
+
+        missing = {}
+        for text, key in zip(texts, hashes):
+            if key not in known:
+                missing.setdefault(key, text)
+        embedding_dedup_lookups_total.labels(result="hit").inc(len(texts) - len(missing))
+        embedding_dedup_lookups_total.labels(result="miss").inc(len(missing))
+
+        if missing:
+            embeddings_generated_total.inc(len(missing))
+            generated = await self.embedding_coalescer.embed(list(missing.values()))
+            generated = dict(zip(missing.keys(), generated))
+            await self.embedding_index.store(generated)
+            known.update(generated)
+
+        return [known[key] for key in hashes]
+
+    @staticmethod
+    def _chunk_row(
+        document_id: str,
+        user_id: str,
+        chunk_index: int,
+        chunk_text: str,
+        page_number: Optional[int],
+        embedding: Optional[List[float]],
+        fingerprint: Optional[ChunkFingerprint] = None
+    ) -> dict:
+        """Build a document_chunks row."""
+        fingerprint = fingerprint or ChunkFingerprint(None, None)
+        storage = settings.EMBEDDING_STORAGE
+        reduced = settings.EMBEDDING_REDUCED_DIMENSIONS
+        return {
+            "id": chunk_id(document_id, chunk_index),
+            "document_id": document_id,
+            "user_id": user_id,
+            "chunk_index": chunk_index,
+            "chunk_text": chunk_text,
+            "chunk_size": len(chunk_text),
+            "content_hash": content_hash(chunk_text),
+            "embedding": embedding if storage != "halfvec" else None,
+            "page_number": page_number,
+            "minhash": fingerprint.signature,
+            "lsh_bands": fingerprint.bands,
+            "embedding_half": normalize(embedding) if embedding is not None and storage != "vector" else None,
+            "embedding_reduced": shorten(embedding, reduced) if embedding is not None and reduced else None,
+            "embedding_bits": (
+                binary_quantize(embedding) if embedding is not None and settings.EMBEDDING_BINARY else None
+            ),
+        }
+
+    async def _collect_chunks(
+        self,
+        document_id: str,
+        source: DocumentSource,
+        file_extension: str,
+        timer: StageTimer,
+        content_digest: Optional[str] = None
+    ) -> Tuple[List[Tuple[str, Optional[int]]], int]:
+        """Extract and chunk a whole document, returning (chunks, total characters)."""
+        incremental = IncrementalChunker(self.chunker)
+        chunks: List[Tuple[str, Optional[int]]] = []
+        total_characters = 0
+
+        sections = self._sections(document_id, source, file_extension, content_digest)
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{settings.LLM_PROXY_URL}/llm/embeddings",
-                    json={
-                        "texts": texts,
-                        "model": "text-embedding-3-small"
-                    }
+            waiting_since = time.perf_counter()
+            async for page_number, section_text in sections:
+                timer.add("extract", time.perf_counter() - waiting_since)
+                total_characters += len(section_text)
+                with timer.stage("chunk"):
+                    chunks.extend(incremental.feed(page_number, section_text))
+                if incremental.exhausted:
+                    break
+                waiting_since = time.perf_counter()
+        finally:
+            await sections.aclose()
+
+        with timer.stage("chunk"):
+            chunks.extend(incremental.finish())
+        return chunks, total_characters
+
+    async def _sections(
+        self,
+        document_id: str,
+        source: DocumentSource,
+        file_extension: str,
+        content_digest: Optional[str] = None,
+        checkpoint_digest: Optional[str] = None,
+        checkpoint: Optional[IngestionCheckpoint] = None
+    ) -> AsyncIterator[Tuple[Optional[int], str]]:
+        """
+        Stream a document's (page_number, text) sections from the cheapest place that has them.
+
+        Sources are tried in order: the checkpoint sidecar of an interrupted
+        attempt, the extraction cache (by content SHA-256), then the
+        extractor. Freshly extracted text is streamed to the cache, or to the
+        checkpoint sidecar when the cache is off.
+        """
+        if checkpoint is not None and checkpoint.text_extracted:
+            try:
+                stored = await self.checkpoints.load_sections(document_id)
+            except Exception as e:
+                logger.warning(f"Could not read checkpointed text of {document_id}: {e}")
+            else:
+                for section in stored:
+                    yield section
+                return
+
+        use_cache = bool(content_digest) and self.extraction_cache.enabled
+        if use_cache:
+            cached = await self.extraction_cache.get(content_digest, file_extension)
+            if cached is not None:
+                logger.info(f"Using cached extraction for document {document_id}")
+                for section in cached:
+                    yield section
+                return
+            upload = self.extraction_cache.upload(content_digest, file_extension)
+            saved = None
+        elif checkpoint_digest:
+            upload = self.checkpoints.upload_sections(document_id)
+            saved = lambda: self.checkpoints.mark_extracted(document_id, checkpoint_digest)
+        else:
+            sections = self.extraction_engine.iter_sections(source, file_extension)
+            try:
+                async for section in sections:
+                    yield section
+            finally:
+                await sections.aclose()
+            return
+
+        # Extraction runs up to PIPELINE_QUEUE_SIZE sections ahead of
+        # chunking, streaming each section into the upload as it goes
+        section_queue = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+
+        async def save(step):
+            nonlocal upload
+            try:
+                await step()
+            except Exception as e:
+                logger.warning(f"Could not save extracted text of {document_id}: {e}")
+                await upload.abort()
+                upload = None
+
+        async def extract():
+            nonlocal upload
+            await save(upload.start)
+            try:
+                try:
+                    async for section in self.extraction_engine.iter_sections(source, file_extension):
+                        if upload is not None:
+                            await save(lambda: upload.write(section))
+                        await section_queue.put(section)
+                except Exception:
+                    await section_queue.put(_DONE)
+                    raise
+                await section_queue.put(_DONE)
+                if upload is not None:
+                    await save(upload.complete)
+                    if upload is not None and saved is not None:
+                        await save(saved)
+                    upload = None
+            finally:
+                if upload is not None:
+                    # Extraction failed or was cancelled; the text is incomplete
+                    await upload.abort()
+
+        task = asyncio.create_task(extract())
+        try:
+            while True:
+                section = await section_queue.get()
+                if section is _DONE:
+                    break
+                yield section
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+
+    async def _extract_and_chunk(
+        self,
+        document_id: str,
+        source: DocumentSource,
+        file_extension: str,
+        chunk_queue: asyncio.Queue,
+        stats: dict,
+        timer: StageTimer,
+        content_digest: Optional[str] = None,
+        checkpoint_digest: Optional[str] = None,
+        checkpoint: Optional[IngestionCheckpoint] = None
+    ):
+        """
+        Stage 1-2: stream sections from the extractor through the incremental chunker.
+
+        When resuming, chunks the manifest records with the same content
+        hash are counted (as stored or skipped) but not queued for embedding. Time spent waiting for the
+        next section counts as extraction; time blocked on a full chunk
+        queue counts toward neither stage.
+        """
+        logger.info(f"Extracting and chunking document {document_id}")
+        incremental = IncrementalChunker(self.chunker)
+        manifest = checkpoint.chunk_manifest if checkpoint else []
+        chunk_index = 0
+
+        async def emit(chunk_text: str, page_number: Optional[int]):
+            nonlocal chunk_index
+            recorded = manifest[chunk_index] if chunk_index < len(manifest) else None
+            if recorded == content_hash(chunk_text):
+                stats["chunks_count"] += 1
+                stats["chunks_resumed"] += 1
+            elif recorded == SKIPPED_MARKER + content_hash(chunk_text):
+                stats["chunks_skipped"] += 1
+                stats["chunks_duplicate"] += 1
+                stats["chunks_resumed"] += 1
+            else:
+                await chunk_queue.put((chunk_index, chunk_text, page_number))
+            chunk_index += 1
+
+        sections = self._sections(
+            document_id, source, file_extension, content_digest, checkpoint_digest, checkpoint
+        )
+        try:
+            waiting_since = time.perf_counter()
+            async for page_number, section_text in sections:
+                timer.add("extract", time.perf_counter() - waiting_since)
+                stats["total_characters"] += len(section_text)
+                if page_number is not None:
+                    stats["pages"] += 1
+                with timer.stage("chunk"):
+                    ready = incremental.feed(page_number, section_text)
+                for chunk in ready:
+                    await emit(*chunk)
+                if incremental.exhausted:
+                    break
+                waiting_since = time.perf_counter()
+        finally:
+            await sections.aclose()
+
+        with timer.stage("chunk"):
+            ready = incremental.finish()
+        for chunk in ready:
+            await emit(*chunk)
+
+        await chunk_queue.put(_DONE)
+
+    async def _embed_batch(self, document_id: str, texts: List[str]) -> List[List[float]]:
+        """Embed one pipeline batch, retrying transient provider errors with backoff."""
+        attempt = 0
+        while True:
+            try:
+                return await self.generate_embeddings(texts)
+            except Exception as e:
+                if not is_transient(e) or attempt >= settings.EMBEDDING_BATCH_RETRIES:
+                    raise
+                attempt += 1
+                delay = settings.EMBEDDING_BATCH_RETRY_DELAY_SECONDS * (2 ** (attempt - 1))
+                logger.warning(
+                    f"Embedding batch of document {document_id} failed ({e}), "
+                    f"retry {attempt}/{settings.EMBEDDING_BATCH_RETRIES} in {delay:.1f}s"
                 )
-                response.raise_for_status()
-                data = response.json()
-                return data["embeddings"]
-        except Exception as e:
-            logger.error(f"Error generating embeddings: {e}")
-            raise
+                await asyncio.sleep(delay)
+
+    async def _embed_unique(
+        self,
+        document_id: str,
+        texts: List[str],
+        fingerprints: List[Optional[ChunkFingerprint]],
+        timer: StageTimer
+    ) -> List[Optional[List[float]]]:
+        """Embed the texts of a batch that are not near-duplicates; duplicates get None."""
+        unique = [
+            i for i, fingerprint in enumerate(fingerprints)
+            if not (fingerprint and fingerprint.duplicate)
+        ]
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        if unique:
+            with timer.stage("embed"):
+                generated = await self._embed_batch(document_id, [texts[i] for i in unique])
+            for i, embedding in zip(unique, generated):
+                embeddings[i] = embedding
+        return embeddings
+
+    async def _embed(
+        self,
+        document_id: str,
+        chunk_queue: asyncio.Queue,
+        write_queue: asyncio.Queue,
+        timer: StageTimer,
+        duplicates: Optional[DuplicateScope] = None
+    ):
+        """
+        Stage 3: group chunks into embedding batches.
+
+        With near-duplicate detection on, each batch is classified first (in
+        chunk order) and only its unique chunks are embedded. Up to
+        EMBEDDING_MAX_CONCURRENCY batches are in flight at once; they are
+        handed to the writer in chunk order as each one completes.
+        """
+        batch: List[Tuple[int, str, Optional[int]]] = []
+        in_flight = deque()
+
+        async def hand_off():
+            items, fingerprints, task = in_flight[0]
+            embeddings = await task
+            in_flight.popleft()
+            await write_queue.put(list(zip(items, embeddings, fingerprints)))
+
+        try:
+            while True:
+                item = await chunk_queue.get()
+                if item is not _DONE:
+                    batch.append(item)
+                if batch and (item is _DONE or len(batch) >= settings.EMBEDDING_BATCH_SIZE):
+                    texts = [chunk_text for _, chunk_text, _ in batch]
+                    if duplicates is not None:
+                        with timer.stage("dedup"):
+                            fingerprints = await duplicates.classify([
+                                (chunk_id(document_id, chunk_index), chunk_text)
+                                for chunk_index, chunk_text, _ in batch
+                            ])
+                    else:
+                        fingerprints = [None] * len(batch)
+                    task = asyncio.create_task(
+                        self._embed_unique(document_id, texts, fingerprints, timer)
+                    )
+                    in_flight.append((batch, fingerprints, task))
+                    batch = []
+                    if len(in_flight) >= settings.EMBEDDING_MAX_CONCURRENCY:
+                        await hand_off()
+                if item is _DONE:
+                    while in_flight:
+                        await hand_off()
+                    await write_queue.put(_DONE)
+                    return
+        finally:
+            for _, _, task in in_flight:
+                task.cancel()
+
+    async def _write(
+        self,
+        document_id: str,
+        user_id: str,
+        write_queue: asyncio.Queue,
+        db: AsyncSession,
+        stats: dict,
+        timer: StageTimer,
+        checkpoint_digest: Optional[str] = None,
+        checkpoint: Optional[IngestionCheckpoint] = None
+    ):
+        """
+        Stage 4: upsert each embedded batch and commit so it is searchable immediately.
+
+        Every write transaction holds the document's advisory lock, so it
+        does not interleave with another job writing the same document.
+        Skipped near-duplicates leave their position empty. With
+        checkpointing, the manifest and watermark advance after every
+        committed batch.
+        """
+        manifest = list(checkpoint.chunk_manifest) if checkpoint else []
+        while True:
+            item = await write_queue.get()
+            if item is _DONE:
+                break
+
+            with timer.stage("write"):
+                rows, skipped = [], []
+                for (chunk_index, chunk_text, page_number), embedding, fingerprint in item:
+                    if fingerprint is not None and fingerprint.duplicate:
+                        stats["chunks_duplicate"] += 1
+                        skipped.append(chunk_id(document_id, chunk_index))
+                        continue
+                    rows.append(self._chunk_row(
+                        document_id, user_id, chunk_index, chunk_text, page_number, embedding, fingerprint
+                    ))
+                stats["chunks_count"] += await self.chunk_writer.write(rows, db, document_id)
+
+                if skipped:
+                    # A skipped position may still hold a row of an older version
+                    await lock_document(db, document_id)
+                    await db.execute(delete(DocumentChunk).where(DocumentChunk.id.in_(skipped)))
+                    await db.commit()
+                    stats["chunks_skipped"] += len(skipped)
+
+                if checkpoint_digest:
+                    for (chunk_index, chunk_text, _), _, fingerprint in item:
+                        entry = content_hash(chunk_text)
+                        if fingerprint is not None and fingerprint.duplicate:
+                            entry = SKIPPED_MARKER + entry
+                        if chunk_index < len(manifest):
+                            manifest[chunk_index] = entry
+                        else:
+                            manifest.append(entry)
+                    await self.checkpoints.advance(document_id, checkpoint_digest, manifest)
+
+        # Drop chunks left over from a previous version: positions past the
+        # new end, and rows stored before chunk IDs were deterministic
+        written = [
+            chunk_id(document_id, chunk_index)
+            for chunk_index in range(stats["chunks_count"] + stats["chunks_skipped"])
+        ]
+        with timer.stage("write"):
+            await lock_document(db, document_id)
+            await db.execute(delete_other_chunks(document_id, written))
+            await db.commit()
 
     async def process_document(
         self,
         document_id: str,
         user_id: str,
-        file_bytes: bytes,
+        source: DocumentSource,
         file_extension: str,
-        db: AsyncSession
+        db: AsyncSession,
+        content_digest: Optional[str] = None
     ) -> dict:
         """
         Process a document: extract text, chunk, generate embeddings, and store.
 
+        The stages run concurrently, connected by bounded queues: pages are
+        chunked as they are extracted, chunks are embedded in batches, and
+        each batch is committed as soon as it is embedded. Memory use is
+        bounded by the queue sizes rather than by the document size, and the
+        first chunks become searchable while later pages are still parsed.
+
+        With a content digest and checkpoints enabled, progress is
+        checkpointed (extracted text, chunk manifest, committed-batch
+        watermark) and a failed attempt keeps its committed batches; the
+        next attempt for the same bytes reuses the extracted text and embeds
+        only chunks past the watermark.
+
+        With near-duplicate detection on for the user, chunks that nearly
+        match a chunk of another document (or an earlier chunk of this one)
+        are skipped: neither embedded nor stored.
+
         Args:
             document_id: Document ID
             user_id: User ID
-            file_bytes: File content as bytes
+            source: File content as bytes or the path of a file holding it
             file_extension: File extension
             db: Database session
+            content_digest: SHA-256 of the file bytes; enables checkpoints and the extraction cache
 
         Returns:
             Processing result dict
         """
-        try:
-            # 1. Extract text
-            logger.info(f"Extracting text from document {document_id}")
-            text = self.text_extractor.extract_text(file_bytes, file_extension)
+        checkpoint = None
+        prior_ids: List[str] = []
+        checkpoint_digest = content_digest if self.checkpoints.enabled else None
+        if checkpoint_digest:
+            checkpoint = await self.checkpoints.load(document_id, checkpoint_digest)
+            if checkpoint is not None:
+                logger.info(
+                    f"Resuming document {document_id} from checkpoint "
+                    f"(text extracted: {checkpoint.text_extracted}, watermark: {checkpoint.watermark})"
+                )
+        else:
+            # Rows of the stored version, kept if this attempt fails
+            result = await db.execute(
+                select(DocumentChunk.id).where(DocumentChunk.document_id == document_id)
+            )
+            prior_ids = list(result.scalars())
+            await db.rollback()
 
-            if not text or not text.strip():
-                raise ValueError("No text content extracted from document")
+        duplicates = self.near_duplicates.scope(
+            user_id, document_id, committed_below=checkpoint.watermark if checkpoint else 0
+        )
+        stats = {
+            "chunks_count": 0,
+            "chunks_resumed": 0,
+            "chunks_skipped": 0,
+            "chunks_duplicate": 0,
+            "pages": 0,
+            "total_characters": 0,
+        }
+        timer = StageTimer()
+        chunk_queue = asyncio.Queue(maxsize=settings.EMBEDDING_BATCH_SIZE * 2)
+        write_queue = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
 
-            # 2. Chunk text
-            logger.info(f"Chunking text for document {document_id}")
-            chunks = self.chunker.chunk_text(text)
-
-            if not chunks:
-                raise ValueError("No chunks generated from document")
-
-            logger.info(f"Generated {len(chunks)} chunks for document {document_id}")
-
-            # 3. Generate embeddings (batch process)
-            logger.info(f"Generating embeddings for document {document_id}")
-            embeddings = await self.generate_embeddings(chunks)
-
-            # 4. Store chunks with embeddings in database
-            logger.info(f"Storing chunks for document {document_id}")
-            for idx, (chunk_text, embedding) in enumerate(zip(chunks, embeddings)):
-                chunk = DocumentChunk(
-                    document_id=document_id,
-                    user_id=user_id,
-                    chunk_index=idx,
-                    chunk_text=chunk_text,
-                    chunk_size=len(chunk_text),
-                    embedding=embedding
-                )
-                db.add(chunk)
+        stages = [
+            asyncio.create_task(self._extract_and_chunk(
+                document_id, source, file_extension, chunk_queue, stats, timer,
+                content_digest, checkpoint_digest, checkpoint
+            )),
+            asyncio.create_task(self._embed(document_id, chunk_queue, write_queue, timer, duplicates)),
+            asyncio.create_task(self._write(
+                document_id, user_id, write_queue, db, stats, timer, checkpoint_digest, checkpoint
+            )),
+        ]
 
-            await db.commit()
+        try:
+            await asyncio.gather(*stages)
 
-            logger.info(f"Successfully processed document {document_id}")
+            if not stats["chunks_count"] + stats["chunks_skipped"]:
+                raise ValueError("No text content extracted from document")
+
+            if duplicates is not None:
+                duplicates.observe()
+            document_chunks.observe(stats["chunks_count"] + stats["chunks_skipped"])
+            if stats["pages"]:
+                document_pages.observe(stats["pages"])
+            logger.info(
+                f"Successfully processed document {document_id} "
+                f"({stats['chunks_count']} chunks, {stats['chunks_resumed']} resumed, "
+                f"{stats['chunks_duplicate']} near-duplicates)"
+            )
+            if checkpoint_digest:
+                try:
+                    await self.checkpoints.clear(document_id)
+                except Exception as e:
+                    logger.warning(f"Could not clear checkpoint of {document_id}: {e}")
 
             return {
                 "status": "success",
                 "document_id": document_id,
-                "chunks_count": len(chunks),
-                "total_characters": len(text)
+                "chunks_count": stats["chunks_count"],
+                "total_characters": stats["total_characters"],
+                "chunks_duplicate": stats["chunks_duplicate"]
             }
 
         except Exception as e:
             logger.error(f"Error processing document {document_id}: {e}")
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            await db.rollback()
+
+            if checkpoint_digest:
+                # Committed batches stay so the next attempt resumes after them
+                raise
+
+            # Remove the rows this attempt added; positions it overwrote keep
+            # their new text, but the stored version is never dropped entirely
+            try:
+                await lock_document(db, document_id)
+                await db.execute(delete_other_chunks(document_id, prior_ids))
+                await db.commit()
+            except Exception as cleanup_error:
+                logger.warning(f"Could not remove partial chunks for {document_id}: {cleanup_error}")
+            raise
+
+        finally:
+            timer.observe()
+
+    async def process_document_incremental(
+        self,
+        document_id: str,
+        user_id: str,
+        source: DocumentSource,
+        file_extension: str,
+        db: AsyncSession,
+        content_digest: Optional[str] = None
+    ) -> dict:
+        """
+        Re-process a new version of a document, touching only what changed.
+
+        The new version is chunked and aligned with the stored chunks by
+        content hash. Unchanged chunks keep their rows and embeddings and are
+        only renumbered if their position moved or their ID predates
+        deterministic chunk IDs; chunks that disappeared are deleted and new
+        chunks are embedded and inserted. All writes happen in a single
+        transaction that holds the document's advisory lock, so searches see
+        either the old or the new version and concurrent jobs for the
+        document take turns. Documents with no stored chunks are processed
+        in full.
+
+        Args:
+            document_id: Document ID
+            user_id: User ID
+            source: File content as bytes or the path of a file holding it
+            file_extension: File extension
+            db: Database session
+            content_digest: SHA-256 of the file bytes; enables the extraction cache, and
+                checkpoints if the document is processed in full
+
+        Returns:
+            Processing result dict
+        """
+        result = await db.execute(
+            select(
+                DocumentChunk.id,
+                DocumentChunk.chunk_index,
+                DocumentChunk.page_number,
+                DocumentChunk.content_hash,
+                # Rows written before content hashes existed are hashed here
+                case(
+                    (DocumentChunk.content_hash.is_(None), DocumentChunk.chunk_text),
+                    else_=None
+                ).label("chunk_text")
+            )
+            .where(DocumentChunk.document_id == document_id)
+            .order_by(DocumentChunk.chunk_index)
+        )
+        stored = result.all()
+        await db.rollback()
+
+        if not stored:
+            logger.info(f"No stored chunks for document {document_id}, processing in full")
+            return await self.process_document(
+                document_id, user_id, source, file_extension, db, content_digest
+            )
+
+        timer = StageTimer()
+        chunks, total_characters = await self._collect_chunks(
+            document_id, source, file_extension, timer, content_digest
+        )
+        if not chunks:
+            raise ValueError("No text content extracted from document")
+
+        old_hashes = [row.content_hash or content_hash(row.chunk_text) for row in stored]
+        new_hashes = [content_hash(chunk_text) for chunk_text, _ in chunks]
+        kept, removed, added = diff_chunks(old_hashes, new_hashes)
+
+        moved = [
+            (stored[old], new)
+            for old, new in kept
+            if stored[old].id != chunk_id(document_id, new)
+            or stored[old].chunk_index != new
+            or stored[old].page_number != chunks[new][1]
+            or stored[old].content_hash is None
+        ]
+
+        duplicates = self.near_duplicates.scope(user_id, document_id)
+        if duplicates is not None:
+            with timer.stage("dedup"):
+                fingerprints = await duplicates.classify([
+                    (chunk_id(document_id, new), chunks[new][0]) for new in added
+                ])
+        else:
+            fingerprints = [None] * len(added)
+        to_embed = [
+            new for new, fingerprint in zip(added, fingerprints)
+            if not (fingerprint and fingerprint.duplicate)
+        ]
+        with timer.stage("embed"):
+            embeddings = dict(zip(
+                to_embed, await self.generate_embeddings([chunks[new][0] for new in to_embed])
+            ))
+
+        write_started = time.perf_counter()
+        try:
+            await lock_document(db, document_id)
+            if removed:
+                await db.execute(
+                    delete(DocumentChunk).where(
+                        DocumentChunk.id.in_([stored[old].id for old in removed])
+                    )
+                )
+
+            if moved:
+                # Renumber in two passes so no row takes an ID another row still holds
+                table = DocumentChunk.__table__
+                await db.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("old_id"))
+                    .values(id=bindparam("temp_id")),
+                    [{"old_id": row.id, "temp_id": f"{row.id}:moving"} for row, _ in moved]
+                )
+                await db.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("temp_id"))
+                    .values(
+                        id=bindparam("new_id"),
+                        chunk_index=bindparam("new_index"),
+                        page_number=bindparam("new_page"),
+                        content_hash=bindparam("new_hash"),
+                        updated_at=func.now()
+                    ),
+                    [
+                        {
+                            "temp_id": f"{row.id}:moving",
+                            "new_id": chunk_id(document_id, new),
+                            "new_index": new,
+                            "new_page": chunks[new][1],
+                            "new_hash": new_hashes[new],
+                        }
+                        for row, new in moved
+                    ]
+                )
+
+            rows = [
+                self._chunk_row(document_id, user_id, new, *chunks[new], embeddings.get(new), fingerprint)
+                for new, fingerprint in zip(added, fingerprints)
+                if not (fingerprint and fingerprint.duplicate)
+            ]
+            for start in range(0, len(rows), settings.EMBEDDING_BATCH_SIZE):
+                await self.chunk_writer.insert_rows(
+                    rows[start:start + settings.EMBEDDING_BATCH_SIZE], db, commit=False
+                )
+
+            await db.commit()
+
+        except Exception as e:
+            logger.error(f"Error updating chunks of document {document_id}: {e}")
             await db.rollback()
             raise
 
+        finally:
+            timer.add("write", time.perf_counter() - write_started)
+            timer.observe()
+
+        duplicate_count = sum(1 for fingerprint in fingerprints if fingerprint and fingerprint.duplicate)
+        if duplicates is not None:
+            duplicates.observe()
+        document_chunks.observe(len(chunks))
+        logger.info(
+            f"Incrementally processed document {document_id}: {len(added)} added "
+            f"({duplicate_count} near-duplicates), {len(removed)} removed, "
+            f"{len(moved)} reindexed, {len(kept) - len(moved)} unchanged"
+        )
+        if content_digest and self.checkpoints.enabled:
+            # The stored chunks now match this version; an older attempt's checkpoint is stale
+            try:
+                await self.checkpoints.clear(document_id)
+            except Exception as e:
+                logger.warning(f"Could not clear checkpoint of {document_id}: {e}")
+
+        return {
+            "status": "success",
+            "document_id": document_id,
+            "chunks_count": len(chunks),
+            "total_characters": total_characters,
+            "chunks_added": len(added),
+            "chunks_removed": len(removed),
+            "chunks_reindexed": len(moved),
+            "chunks_duplicate": duplicate_count
+        }
+
 
 # Singleton instance
 document_processor = DocumentProcessor()
@@ -1,13 +1,17 @@
 # FILE: services/ingestion-worker/app/routes.py
 
-from fastapi import APIRouter, HTTPException, status, Depends
-from pydantic import BaseModel
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, text
-from app.database import get_db
-from app.processor import document_processor
-import aioboto3
+from fastapi import APIRouter, HTTPException, status
+from app.schemas import (
+    ProcessDocumentRequest,
+    ProcessDocumentResponse,
+    EnqueueDocumentResponse,
+    BatchProcessRequest,
+    BatchDocumentResult,
+    BatchProcessResponse
+)
+from app.worker import schedule_document_job, run_document_batch, mark_document_failed
 from app.config import settings
+from app.job_queue import ingestion_queue
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,96 +19,96 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/process", tags=["Processing"])
 
 
-class ProcessDocumentRequest(BaseModel):
-    """Request to process a document."""
-    document_id: str
-    user_id: str
-    s3_key: str
-    file_extension: str
-
-
-class ProcessDocumentResponse(BaseModel):
-    """Response from document processing."""
-    status: str
-    document_id: str
-    chunks_count: int
-    total_characters: int
-
-
 @router.post("/document", response_model=ProcessDocumentResponse)
-async def process_document(
-    request: ProcessDocumentRequest,
-    db: AsyncSession = Depends(get_db)
-):
+async def process_document(request: ProcessDocumentRequest):
     """
     Process a document: download from S3, extract text, chunk, embed, and store.
+
+    The job waits for its turn in the fair scheduler like queued jobs do.
     """
     try:
-        # Download file from S3
-        logger.info(f"Downloading document {request.document_id} from S3")
-        session = aioboto3.Session(
-            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
-            region_name=settings.S3_REGION,
-        )
-
-        async with session.client(
-            's3',
-            endpoint_url=settings.S3_ENDPOINT_URL,
-            use_ssl=settings.USE_SSL
-        ) as s3:
-            response = await s3.get_object(
-                Bucket=settings.S3_BUCKET_NAME,
-                Key=request.s3_key
-            )
-            async with response['Body'] as stream:
-                file_bytes = await stream.read()
-
-        # Process document
-        result = await document_processor.process_document(
-            document_id=request.document_id,
-            user_id=request.user_id,
-            file_bytes=file_bytes,
-            file_extension=request.file_extension,
-            db=db
-        )
-
-        # Update document status in documents table (if it exists)
-        try:
-            await db.execute(
-                text("""
-                    UPDATE documents
-                    SET status = 'completed',
-                        processed_at = NOW()
-                    WHERE id = :doc_id
-                """),
-                {"doc_id": request.document_id}
-            )
-            await db.commit()
-        except Exception as e:
-            logger.warning(f"Could not update document status: {e}")
-
+        result = await schedule_document_job(request)
         return ProcessDocumentResponse(**result)
 
     except Exception as e:
         logger.error(f"Error processing document {request.document_id}: {e}")
 
         # Update document status to failed
-        try:
-            await db.execute(
-                text("""
-                    UPDATE documents
-                    SET status = 'failed',
-                        processing_error = :error
-                    WHERE id = :doc_id
-                """),
-                {"doc_id": request.document_id, "error": str(e)}
-            )
-            await db.commit()
-        except Exception:
-            pass
+        await mark_document_failed(request.document_id, str(e))
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Document processing failed: {str(e)}"
         )
+
+
+@router.post("/batch", response_model=BatchProcessResponse)
+async def process_batch(request: BatchProcessRequest):
+    """
+    Process many documents in one call.
+
+    Documents are downloaded and processed concurrently and their chunks are
+    embedded in shared batches. Each document is stored and its status
+    updated on its own; the response reports the outcome per document.
+    """
+    if not request.documents:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No documents in batch"
+        )
+    if len(request.documents) > settings.BATCH_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch exceeds maximum of {settings.BATCH_MAX_DOCUMENTS} documents"
+        )
+
+    results = [
+        BatchDocumentResult(**result)
+        for result in await run_document_batch(request.documents)
+    ]
+    succeeded = sum(1 for result in results if result.status == "success")
+
+    return BatchProcessResponse(
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results
+    )
+
+
+@router.post(
+    "/enqueue",
+    response_model=EnqueueDocumentResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def enqueue_document(request: ProcessDocumentRequest):
+    """
+    Queue a document for asynchronous processing by the consumer pool.
+    """
+    try:
+        job_id = await ingestion_queue.enqueue(request.model_dump())
+    except Exception as e:
+        logger.error(f"Error enqueueing document {request.document_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Ingestion queue unavailable: {str(e)}"
+        )
+
+    return EnqueueDocumentResponse(
+        status="queued",
+        document_id=request.document_id,
+        job_id=job_id
+    )
+
+
+@router.get("/queue/stats")
+async def get_queue_stats():
+    """
+    Get ingestion queue statistics.
+
+    Returns, per scheduling lane, the users with queued work, undelivered
+    and pending (unacknowledged) jobs and jobs waiting in this worker's
+    scheduler, plus the number of jobs not yet routed to a lane and the
+    dead-letter size.
+    """
+    return await ingestion_queue.get_stats()
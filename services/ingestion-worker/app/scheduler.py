@@ -0,0 +1,254 @@
+# FILE: services/ingestion-worker/app/scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+from app.metrics import (
+    scheduler_queue_depth,
+    scheduler_wait_seconds,
+    scheduler_jobs_started_total
+)
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Lanes in priority order (used to break ties)
+LANES = ("interactive", "small", "bulk")
+
+
+def classify_job(job: Mapping[str, Any]) -> str:
+    """
+    Pick the scheduling lane for a job.
+
+    An explicit "priority" wins; incremental re-processing is interactive;
+    documents up to SCHEDULER_SMALL_MAX_BYTES go to the small lane and
+    everything else (including jobs of unknown size) to bulk.
+
+    Args:
+        job: Job fields; values may be strings as stored in Redis
+
+    Returns:
+        Lane name
+    """
+    priority = job.get("priority")
+    if priority in LANES:
+        return priority
+    if str(job.get("incremental", "")).lower() == "true":
+        return "interactive"
+    file_size = job.get("file_size")
+    if file_size not in (None, "") and int(file_size) <= settings.SCHEDULER_SMALL_MAX_BYTES:
+        return "small"
+    return "bulk"
+
+
+def job_cost(job: Mapping[str, Any]) -> float:
+    """Scheduling cost of a job: its size in SCHEDULER_COST_UNIT_BYTES units, at least 1."""
+    file_size = job.get("file_size")
+    if file_size in (None, ""):
+        return 1.0
+    return max(1.0, int(file_size) / settings.SCHEDULER_COST_UNIT_BYTES)
+
+
+@dataclass
+class _Job:
+    """A unit of work waiting in a lane."""
+    func: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    lane: str
+    cost: float
+    enqueued_at: float
+
+
+@dataclass
+class _Lane:
+    """Per-lane start-time fair queue across users."""
+    weight: float
+    heap: List = field(default_factory=list)
+    finish: Dict[str, float] = field(default_factory=dict)
+    virtual_time: float = 0.0
+    pass_value: float = 0.0
+
+
+class FairScheduler:
+    """
+    Two-level weighted fair scheduler for ingestion work.
+
+    Jobs are placed in a lane (interactive, small, bulk). Within a lane,
+    start-time fair queuing orders jobs across user_id: each job is tagged
+    with max(lane virtual time, the user's last finish tag) and the user's
+    finish tag advances by cost / user weight, so a user with thousands of
+    queued documents gets their share and no more. Lanes share the worker's
+    execution slots by stride scheduling with SCHEDULER_LANE_WEIGHTS, so
+    small and interactive jobs keep flowing under a bulk backlog without
+    starving bulk entirely. At most `slots` jobs run at once.
+    """
+
+    def __init__(
+        self,
+        slots: int = None,
+        lane_weights: Mapping[str, float] = None,
+        user_weights: Mapping[str, float] = None
+    ):
+        self.slots = slots or settings.QUEUE_CONSUMERS
+        lane_weights = lane_weights or settings.SCHEDULER_LANE_WEIGHTS
+        self.user_weights = user_weights if user_weights is not None else settings.SCHEDULER_USER_WEIGHTS
+        self._lanes = {lane: _Lane(weight=float(lane_weights.get(lane, 1.0))) for lane in LANES}
+        self._sequence = itertools.count()
+        self._pass = 0.0
+        self._wakeup = asyncio.Event()
+        self.dispatched = asyncio.Event()
+        self._runners: List[asyncio.Task] = []
+        self._stopping = False
+
+    def start(self):
+        """Start the execution slots."""
+        if self._runners:
+            return
+        self._stopping = False
+        self._runners = [asyncio.create_task(self._run_slot()) for _ in range(self.slots)]
+        logger.info(f"Started fair scheduler with {self.slots} slots")
+
+    async def stop(self, timeout: float):
+        """
+        Stop dispatching, cancel queued jobs and let running jobs finish within the timeout.
+
+        Args:
+            timeout: Seconds to wait for running jobs
+        """
+        self._stopping = True
+        for lane_name, lane in self._lanes.items():
+            for _, _, job in lane.heap:
+                job.future.cancel()
+            lane.heap.clear()
+            lane.finish.clear()
+            scheduler_queue_depth.labels(lane=lane_name).set(0)
+        self._wakeup.set()
+
+        if self._runners:
+            _, pending = await asyncio.wait(self._runners, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._runners = []
+
+    def queued(self, lane: Optional[str] = None) -> int:
+        """Number of jobs waiting (not running), in one lane or in all."""
+        lanes = [self._lanes[lane]] if lane else self._lanes.values()
+        return sum(len(state.heap) for state in lanes)
+
+    def submit(
+        self,
+        lane: str,
+        user_id: str,
+        cost: float,
+        func: Callable[[], Awaitable[Any]],
+        enqueued_at: Optional[float] = None
+    ) -> asyncio.Future:
+        """
+        Queue a job without waiting for it.
+
+        Args:
+            lane: Lane name
+            user_id: Tenant the job is charged to
+            cost: Relative cost of the job
+            func: Coroutine function run when the job is dispatched
+            enqueued_at: Epoch seconds the job was first queued (defaults to now)
+
+        Returns:
+            Future resolved with the job's result
+        """
+        state = self._lanes[lane]
+        weight = float(self.user_weights.get(user_id, 1.0)) or 1.0
+
+        start = max(state.virtual_time, state.finish.get(user_id, 0.0))
+        state.finish[user_id] = start + cost / weight
+        if not state.heap:
+            # An idle lane does not bank credit while it has nothing to run
+            state.pass_value = max(state.pass_value, self._pass)
+
+        job = _Job(
+            func=func,
+            future=asyncio.get_running_loop().create_future(),
+            lane=lane,
+            cost=cost,
+            enqueued_at=enqueued_at or time.time()
+        )
+        heapq.heappush(state.heap, (start, next(self._sequence), job))
+        scheduler_queue_depth.labels(lane=lane).set(len(state.heap))
+        self._wakeup.set()
+        return job.future
+
+    async def run(
+        self,
+        lane: str,
+        user_id: str,
+        cost: float,
+        func: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Queue a job and wait for its result.
+
+        Args:
+            lane: Lane name
+            user_id: Tenant the job is charged to
+            cost: Relative cost of the job
+            func: Coroutine function run when the job is dispatched
+
+        Returns:
+            The job's result
+        """
+        return await self.submit(lane, user_id, cost, func)
+
+    def _next(self) -> Optional[_Job]:
+        """Pop the next job: lane by lowest pass, then job by lowest start tag."""
+        while True:
+            active = [(state.pass_value, index, name) for index, (name, state) in enumerate(self._lanes.items()) if state.heap]
+            if not active:
+                return None
+            _, _, name = min(active)
+            state = self._lanes[name]
+
+            start, _, job = heapq.heappop(state.heap)
+            scheduler_queue_depth.labels(lane=name).set(len(state.heap))
+            if not state.heap:
+                state.finish.clear()
+            if job.future.done():
+                continue
+
+            state.virtual_time = start
+            self._pass = state.pass_value
+            state.pass_value += job.cost / state.weight
+            return job
+
+    async def _run_slot(self):
+        """Execution slot: run the next job whenever one is available."""
+        while not self._stopping:
+            job = self._next()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            scheduler_wait_seconds.labels(lane=job.lane).observe(max(0.0, time.time() - job.enqueued_at))
+            scheduler_jobs_started_total.labels(lane=job.lane).inc()
+            self.dispatched.set()
+
+            try:
+                result = await job.func()
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+
+
+# Singleton instance
+job_scheduler = FairScheduler()
@@ -0,0 +1,55 @@
+# FILE: services/ingestion-worker/app/schemas.py
+
+from typing import List, Literal, Optional
+from pydantic import BaseModel
+
+
+class ProcessDocumentRequest(BaseModel):
+    """Request to process a document."""
+    document_id: str
+    user_id: str
+    s3_key: str
+    file_extension: str
+    incremental: bool = False  # Diff against the stored chunks instead of rebuilding
+    file_size: Optional[int] = None  # Used to pick the scheduling lane and cost
+    priority: Optional[Literal["interactive", "small", "bulk"]] = None  # Overrides the lane
+
+
+class ProcessDocumentResponse(BaseModel):
+    """Response from document processing."""
+    status: str
+    document_id: str
+    chunks_count: int
+    total_characters: int
+    chunks_added: Optional[int] = None
+    chunks_removed: Optional[int] = None
+    chunks_reindexed: Optional[int] = None
+
+
+class EnqueueDocumentResponse(BaseModel):
+    """Response for a document job placed on the ingestion queue."""
+    status: str
+    document_id: str
+    job_id: str
+
+
+class BatchProcessRequest(BaseModel):
+    """Request to process many documents at once."""
+    documents: List[ProcessDocumentRequest]
+
+
+class BatchDocumentResult(BaseModel):
+    """Outcome of one document in a batch."""
+    document_id: str
+    status: str  # success, failed
+    chunks_count: int = 0
+    total_characters: int = 0
+    error: Optional[str] = None
+
+
+class BatchProcessResponse(BaseModel):
+    """Response from batch processing."""
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchDocumentResult]
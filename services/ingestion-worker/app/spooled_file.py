@@ -0,0 +1,49 @@
+# FILE: services/ingestion-worker/app/spooled_file.py
+
+import tempfile
+from typing import Optional, Union
+
+
+class NamedSpooledTemporaryFile(tempfile.SpooledTemporaryFile):
+    """
+    SpooledTemporaryFile that rolls over to a named temporary file.
+
+    The standard class spills to an anonymous TemporaryFile, which other
+    processes cannot open. Extraction runs in a process pool, so once a
+    download grows past max_size it is moved to a NamedTemporaryFile whose
+    path the pool processes can memory-map. The file is removed on close.
+    """
+
+    # SHA-256 of the content, set by the writer once the download is complete
+    content_sha256: Optional[str] = None
+
+    def rollover(self):
+        """Move the buffered data to a named file on disk."""
+        if self._rolled:
+            return
+        buffer = self._file
+        self._file = tempfile.NamedTemporaryFile(**self._TemporaryFileArgs)
+        del self._TemporaryFileArgs
+
+        position = buffer.tell()
+        self._file.write(buffer.getvalue())
+        self._file.seek(position, 0)
+        self._rolled = True
+
+    @property
+    def rolled(self) -> bool:
+        """Whether the data has been spilled to disk."""
+        return self._rolled
+
+    def source(self) -> Union[bytes, str]:
+        """
+        Describe the content for the extractors.
+
+        Returns:
+            The path of the file on disk once rolled over, otherwise the
+            buffered bytes
+        """
+        if self._rolled:
+            self._file.flush()
+            return self._file.name
+        return self._file.getvalue()
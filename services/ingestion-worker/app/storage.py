@@ -0,0 +1,160 @@
+# FILE: services/ingestion-worker/app/storage.py
+
+import asyncio
+import gzip
+import json
+import zlib
+from typing import List, Optional, Tuple
+import aioboto3
+from botocore.config import Config
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Size of each uploaded part of a SectionsUpload (S3 requires at least 5 MiB
+# for every part but the last)
+UPLOAD_PART_SIZE = 8 * 1024 * 1024
+
+# Uncompressed JSON gathered before it is compressed off the event loop
+COMPRESS_BATCH_SIZE = 1024 * 1024
+
+
+def decode_sections(body: bytes) -> List[Tuple[Optional[int], str]]:
+    """Read sections written by SectionsUpload."""
+    return [(page_number, text) for page_number, text in json.loads(gzip.decompress(body))]
+
+
+def s3_client(max_connections: int = 10):
+    """
+    Create an S3 client for use as an async context manager.
+
+    Args:
+        max_connections: Size of the client's HTTP connection pool
+
+    Returns:
+        aioboto3 S3 client context manager
+    """
+    session = aioboto3.Session(
+        aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        region_name=settings.S3_REGION,
+    )
+    return session.client(
+        's3',
+        endpoint_url=settings.S3_ENDPOINT_URL,
+        use_ssl=settings.USE_SSL,
+        config=Config(max_pool_connections=max_connections)
+    )
+
+
+class SectionsUpload:
+    """
+    Stream (page_number, text) sections into an S3 object as gzip-compressed JSON.
+
+    Sections are compressed as they are written and sent as parts of a
+    multipart upload, so only about one part of compressed output is held
+    in memory whatever the size of the document. The object appears when
+    the upload is completed; an aborted upload leaves nothing behind.
+    """
+
+    def __init__(self, key: str, part_size: int = UPLOAD_PART_SIZE):
+        self.key = key
+        self.part_size = part_size
+        self._client = None
+        self._s3 = None
+        self._upload_id: Optional[str] = None
+        self._parts: List[dict] = []
+        self._compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # gzip container
+        self._pending: List[str] = ["["]
+        self._pending_size = 0
+        self._buffer = bytearray()
+        self._empty = True
+
+    async def start(self):
+        """Open the S3 client and begin the multipart upload."""
+        self._client = s3_client()
+        self._s3 = await self._client.__aenter__()
+        try:
+            response = await self._s3.create_multipart_upload(
+                Bucket=settings.S3_BUCKET_NAME,
+                Key=self.key,
+                ContentType="application/json",
+                ContentEncoding="gzip"
+            )
+        except BaseException:
+            await self._close()
+            raise
+        self._upload_id = response["UploadId"]
+
+    async def write(self, section: Tuple[Optional[int], str]):
+        """
+        Append one section.
+
+        Args:
+            section: (page_number, text) tuple
+        """
+        encoded = json.dumps(section)
+        self._pending.append(encoded if self._empty else "," + encoded)
+        self._empty = False
+        self._pending_size += len(encoded)
+        if self._pending_size >= COMPRESS_BATCH_SIZE:
+            await self._compress(final=False)
+            if len(self._buffer) >= self.part_size:
+                await self._upload_part()
+
+    async def complete(self):
+        """Upload the remaining output and complete the upload."""
+        self._pending.append("]")
+        await self._compress(final=True)
+        await self._upload_part()
+        await self._s3.complete_multipart_upload(
+            Bucket=settings.S3_BUCKET_NAME,
+            Key=self.key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts}
+        )
+        self._upload_id = None
+        await self._close()
+
+    async def abort(self):
+        """Discard the upload; errors are logged, since nothing depends on it."""
+        try:
+            if self._upload_id is not None:
+                await self._s3.abort_multipart_upload(
+                    Bucket=settings.S3_BUCKET_NAME,
+                    Key=self.key,
+                    UploadId=self._upload_id
+                )
+        except Exception as e:
+            logger.warning(f"Could not abort upload of {self.key}: {e}")
+        finally:
+            self._upload_id = None
+            await self._close()
+
+    async def _compress(self, final: bool):
+        text = "".join(self._pending)
+        self._pending, self._pending_size = [], 0
+
+        def compress() -> bytes:
+            output = self._compressor.compress(text.encode("utf-8"))
+            return output + self._compressor.flush() if final else output
+
+        self._buffer += await asyncio.to_thread(compress)
+
+    async def _upload_part(self):
+        part_number = len(self._parts) + 1
+        response = await self._s3.upload_part(
+            Bucket=settings.S3_BUCKET_NAME,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=bytes(self._buffer)
+        )
+        self._parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+        self._buffer = bytearray()
+
+    async def _close(self):
+        if self._client is not None:
+            client, self._client, self._s3 = self._client, None, None
+            await client.__aexit__(None, None, None)
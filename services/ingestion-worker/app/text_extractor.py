@@ -1,101 +1,264 @@
 # FILE: services/ingestion-worker/app/text_extractor.py
 
-from PyPDF2 import PdfReader
-from docx import Document
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
 import io
+import mmap
+import os
+from app.extractors import get_backend, format_for
 import logging
 
 logger = logging.getLogger(__name__)
 
+# File content as bytes, or the path of a file holding it
+DocumentSource = Union[bytes, str]
+
+# Bump whenever extraction output changes so cached extractions are not reused
+EXTRACTOR_VERSION = "1"
+
+
+class _MappedFile(mmap.mmap):
+    """Read-only memory map that also reports the file-object capabilities zipfile checks for."""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+
+@contextmanager
+def open_source(source: DocumentSource) -> Iterator[BinaryIO]:
+    """
+    Open a document source as a seekable binary stream.
+
+    Files are memory-mapped read-only, so their pages are loaded on demand
+    and shared through the page cache instead of being copied into each
+    process that reads them.
+
+    Args:
+        source: File content as bytes, or the path of a file holding it
+
+    Yields:
+        Readable, seekable stream over the content
+    """
+    if isinstance(source, (bytes, bytearray)):
+        yield io.BytesIO(source)
+        return
+
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            yield io.BytesIO(b"")
+            return
+        try:
+            mapped = _MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            # The mapping would not fit in the process's address-space limit
+            yield f
+            return
+        with mapped:
+            yield mapped
+
+
+def split_page_ranges(page_count: int, pages_per_range: int) -> List[Tuple[int, int]]:
+    """
+    Split a page count into consecutive half-open [start, end) ranges.
+
+    Args:
+        page_count: Total number of pages
+        pages_per_range: Maximum pages in each range
+
+    Returns:
+        List of (start, end) page index ranges in document order
+    """
+    pages_per_range = max(1, pages_per_range)
+    return [
+        (start, min(start + pages_per_range, page_count))
+        for start in range(0, page_count, pages_per_range)
+    ]
+
 
 class TextExtractor:
-    """Extract text from various document formats."""
+    """
+    Extract text from various document formats.
+
+    The work is delegated to the backend registered for the file's format
+    in app.extractors, selected by PDF_EXTRACTOR, DOCX_EXTRACTOR and
+    TEXT_EXTRACTOR unless a backend name is passed explicitly.
+    """
 
     @staticmethod
-    def extract_from_pdf(file_bytes: bytes) -> str:
+    def count_pdf_pages(source: DocumentSource, backend: Optional[str] = None) -> int:
         """
-        Extract text from PDF file.
+        Count the pages of a PDF file.
 
         Args:
-            file_bytes: PDF file as bytes
+            source: PDF file as bytes or a path
+            backend: PDF backend name (defaults to PDF_EXTRACTOR)
 
         Returns:
-            Extracted text content
+            Number of pages
         """
-        try:
-            reader = PdfReader(io.BytesIO(file_bytes))
-            text_parts = []
+        with open_source(source) as stream:
+            return get_backend('pdf', backend).count_pages(stream)
 
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    text_parts.append(text)
+    @staticmethod
+    def extract_pdf_pages(
+        source: DocumentSource,
+        start: int = 0,
+        end: Optional[int] = None,
+        backend: Optional[str] = None
+    ) -> List[Tuple[int, str]]:
+        """
+        Extract text from a range of PDF pages.
+
+        Args:
+            source: PDF file as bytes or a path
+            start: Index of the first page to extract
+            end: Index one past the last page to extract (defaults to the last page)
+            backend: PDF backend name (defaults to PDF_EXTRACTOR)
 
-            return "\n\n".join(text_parts)
+        Returns:
+            List of (page_number, text) tuples with 1-based page numbers,
+            skipping pages without text
+        """
+        try:
+            with open_source(source) as stream:
+                return get_backend('pdf', backend).extract_pages(stream, start, end)
         except Exception as e:
-            logger.error(f"Error extracting text from PDF: {e}")
+            logger.error(f"Error extracting text from PDF pages {start}-{end}: {e}")
             raise
 
     @staticmethod
-    def extract_from_docx(file_bytes: bytes) -> str:
+    def extract_from_pdf(source: DocumentSource, backend: Optional[str] = None) -> str:
         """
-        Extract text from DOCX file.
+        Extract text from PDF file.
 
         Args:
-            file_bytes: DOCX file as bytes
+            source: PDF file as bytes or a path
+            backend: PDF backend name (defaults to PDF_EXTRACTOR)
 
         Returns:
             Extracted text content
         """
-        try:
-            doc = Document(io.BytesIO(file_bytes))
-            text_parts = []
+        pages = TextExtractor.extract_pdf_pages(source, backend=backend)
+        return "\n\n".join(text for _, text in pages)
 
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_parts.append(paragraph.text)
+    @staticmethod
+    def extract_from_docx(source: DocumentSource, backend: Optional[str] = None) -> str:
+        """
+        Extract text from DOCX file.
+
+        Args:
+            source: DOCX file as bytes or a path
+            backend: DOCX backend name (defaults to DOCX_EXTRACTOR)
 
-            return "\n\n".join(text_parts)
+        Returns:
+            Extracted text content
+        """
+        try:
+            with open_source(source) as stream:
+                return get_backend('docx', backend).extract_text(stream)
         except Exception as e:
             logger.error(f"Error extracting text from DOCX: {e}")
             raise
 
     @staticmethod
-    def extract_from_txt(file_bytes: bytes) -> str:
+    def extract_from_txt(source: DocumentSource, backend: Optional[str] = None) -> str:
         """
         Extract text from TXT/MD file.
 
         Args:
-            file_bytes: Text file as bytes
+            source: Text file as bytes or a path
+            backend: Text backend name (defaults to TEXT_EXTRACTOR)
 
         Returns:
             Extracted text content
         """
-        try:
-            return file_bytes.decode('utf-8')
-        except UnicodeDecodeError:
-            # Try with latin-1 encoding as fallback
-            return file_bytes.decode('latin-1')
+        with open_source(source) as stream:
+            return get_backend('txt', backend).extract_text(stream)
 
     @staticmethod
-    def extract_text(file_bytes: bytes, file_extension: str) -> str:
+    def extract_text(
+        source: DocumentSource,
+        file_extension: str,
+        backend: Optional[str] = None
+    ) -> str:
         """
         Extract text based on file extension.
 
         Args:
-            file_bytes: File content as bytes
+            source: File content as bytes or a path
             file_extension: File extension (pdf, docx, txt, md, etc.)
+            backend: Backend name for the file's format (defaults to the configured one)
 
         Returns:
             Extracted text content
         """
-        ext = file_extension.lower()
+        document_format = format_for(file_extension)
 
-        if ext == 'pdf':
-            return TextExtractor.extract_from_pdf(file_bytes)
-        elif ext in ['docx', 'doc']:
-            return TextExtractor.extract_from_docx(file_bytes)
-        elif ext in ['txt', 'md']:
-            return TextExtractor.extract_from_txt(file_bytes)
+        if document_format == 'pdf':
+            return TextExtractor.extract_from_pdf(source, backend)
+        elif document_format == 'docx':
+            return TextExtractor.extract_from_docx(source, backend)
         else:
-            raise ValueError(f"Unsupported file extension: {ext}")
+            return TextExtractor.extract_from_txt(source, backend)
+
+    @staticmethod
+    def iter_sections(
+        source: DocumentSource,
+        file_extension: str,
+        backend: Optional[str] = None
+    ) -> Iterator[Tuple[Optional[int], str]]:
+        """
+        Lazily extract text as ordered sections.
+
+        PDFs yield one section per page. Other formats yield the blocks of
+        their backend (paragraphs and table rows for streaming DOCX
+        backends, the whole text otherwise), so a streaming backend's output
+        can be chunked while the file is still being parsed.
+
+        Args:
+            source: File content as bytes or a path
+            file_extension: File extension (pdf, docx, txt, md, etc.)
+            backend: Backend name for the file's format (defaults to the configured one)
+
+        Yields:
+            (page_number, text) tuples; page_number is None for formats without pages
+        """
+        if format_for(file_extension) == 'pdf':
+            yield from TextExtractor.extract_pdf_pages(source, backend=backend)
+            return
+
+        try:
+            with open_source(source) as stream:
+                for block in get_backend(file_extension, backend).iter_blocks(stream):
+                    yield None, block
+        except Exception as e:
+            logger.error(f"Error extracting text from {file_extension.upper()}: {e}")
+            raise
+
+    @staticmethod
+    def streams_sections(file_extension: str, backend: Optional[str] = None) -> bool:
+        """Whether iter_sections parses a file of this type incrementally (see ExtractorBackend.streams)."""
+        return format_for(file_extension) != 'pdf' and get_backend(file_extension, backend).streams
+
+    @staticmethod
+    def extract_sections(
+        source: DocumentSource,
+        file_extension: str,
+        backend: Optional[str] = None
+    ) -> List[Tuple[Optional[int], str]]:
+        """
+        Extract text as ordered sections, keeping page numbers where the format has them.
+
+        Args:
+            source: File content as bytes or a path
+            file_extension: File extension (pdf, docx, txt, md, etc.)
+            backend: Backend name for the file's format (defaults to the configured one)
+
+        Returns:
+            List of (page_number, text) tuples; page_number is None for formats without pages
+        """
+        return list(TextExtractor.iter_sections(source, file_extension, backend))
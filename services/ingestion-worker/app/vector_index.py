@@ -0,0 +1,196 @@
+# FILE: services/ingestion-worker/app/vector_index.py
+
+import asyncio
+import hashlib
+from typing import Dict, Optional, Tuple
+from sqlalchemy import text
+from app.database import engine
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Embedding columns that can be indexed. embedding_reduced has no fixed size,
+# so it is indexed through a cast to the configured tier size, and searches
+# must use the same expression to hit the index. embedding_bits is indexed
+# for Hamming distance.
+VECTOR_INDEX_COLUMNS = ("embedding", "embedding_half", "embedding_reduced", "embedding_bits")
+
+
+class VectorIndexManager:
+    """
+    HNSW indexes on the embedding columns of document_chunks.
+
+    Each configured column gets one index, built with CREATE INDEX
+    CONCURRENTLY so ingestion and search keep running while it builds.
+    Building is coordinated across workers with an advisory lock. An
+    invalid index left by an interrupted build is dropped and rebuilt, and
+    an index whose definition or build parameters (recorded in its comment)
+    differ from the configured ones is rebuilt under a temporary name and
+    swapped in, so search never loses its index.
+
+    Users listed in HNSW_PARTIAL_INDEX_USERS (the largest tenants) also get
+    a partial index per column, restricted with WHERE user_id = '<user>'.
+    The RAG service's search planner finds these by name and searches them
+    with the user ID inlined, so no graph traversal is spent on other
+    tenants' rows.
+    """
+
+    def __init__(self):
+        self.enabled = settings.HNSW_INDEX_ENABLED
+        self.columns = settings.HNSW_INDEX_COLUMNS
+        self.m = settings.HNSW_M
+        self.ef_construction = settings.HNSW_EF_CONSTRUCTION
+        self.partial_users = settings.HNSW_PARTIAL_INDEX_USERS
+        for column in self.columns:
+            if column not in VECTOR_INDEX_COLUMNS:
+                raise ValueError(f"Unknown HNSW index column '{column}', expected one of {VECTOR_INDEX_COLUMNS}")
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def index_name(column: str, user_id: Optional[str] = None) -> str:
+        """Index name; per-user names must match the RAG service's search planner."""
+        if user_id is None:
+            return f"ix_document_chunks_{column}_hnsw"
+        digest = hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:12]
+        return f"ix_document_chunks_{column}_hnsw_u_{digest}"
+
+    @staticmethod
+    def predicate(user_id: Optional[str]) -> str:
+        """WHERE clause of a per-user index (empty for the shared one)."""
+        if user_id is None:
+            return ""
+        quoted = user_id.replace("'", "''")
+        return f"WHERE user_id = '{quoted}'"
+
+    @staticmethod
+    def definition(column: str) -> Tuple[str, str]:
+        """Indexed expression and operator class of a column."""
+        if column == "embedding_half":
+            return "embedding_half", "halfvec_ip_ops"
+        if column == "embedding_bits":
+            return "embedding_bits", "bit_hamming_ops"
+        if column == "embedding_reduced":
+            dimensions = settings.EMBEDDING_REDUCED_DIMENSIONS
+            if not dimensions:
+                raise ValueError("Indexing embedding_reduced needs EMBEDDING_REDUCED_DIMENSIONS")
+            return f"(embedding_reduced::vector({dimensions}))", "vector_cosine_ops"
+        return "embedding", "vector_cosine_ops"
+
+    def spec(self, column: str, user_id: Optional[str] = None) -> str:
+        """Definition and build parameters of an index, kept as the index comment."""
+        expression, opclass = self.definition(column)
+        spec = f"hnsw ({expression} {opclass}) m={self.m} ef_construction={self.ef_construction}"
+        if user_id is not None:
+            spec += f" {self.predicate(user_id)}"
+        return spec
+
+    @staticmethod
+    async def _state(conn, name: str) -> Optional[Tuple[bool, Optional[str]]]:
+        """(valid, comment) of an index, or None if it does not exist."""
+        row = (await conn.execute(text("""
+            SELECT i.indisvalid, obj_description(c.oid, 'pg_class')
+            FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+            WHERE c.relname = :name
+        """), {"name": name})).first()
+        return (row[0], row[1]) if row else None
+
+    async def ensure_index(self, column: str, user_id: Optional[str] = None) -> str:
+        """
+        Create or rebuild the HNSW index of a column if needed.
+
+        Args:
+            column: Embedding column
+            user_id: Build the partial index of this user instead of the shared one
+
+        Returns:
+            What was done: exists, created, rebuilt or locked (another worker is building)
+        """
+        name = self.index_name(column, user_id)
+        expression, opclass = self.definition(column)
+        spec = self.spec(column, user_id)
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            locked = (await conn.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": name}
+            )).scalar()
+            if not locked:
+                return "locked"
+            try:
+                state = await self._state(conn, name)
+                if state and state[0] and state[1] == spec:
+                    return "exists"
+                if state and not state[0]:
+                    logger.warning(f"Dropping invalid index {name} left by an interrupted build")
+                    await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                    state = None
+
+                build_name = name if state is None else f"{name}_rebuild"
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}_rebuild"))
+                await conn.execute(text(
+                    f"SET maintenance_work_mem = '{settings.HNSW_MAINTENANCE_WORK_MEM}'"
+                ))
+                await conn.execute(text(
+                    f"SET max_parallel_maintenance_workers = {settings.HNSW_PARALLEL_WORKERS}"
+                ))
+                logger.info(f"Building HNSW index {build_name}: {spec}")
+                await conn.execute(text(f"""
+                    CREATE INDEX CONCURRENTLY {build_name}
+                    ON document_chunks USING hnsw ({expression} {opclass})
+                    WITH (m = {self.m}, ef_construction = {self.ef_construction})
+                    {self.predicate(user_id)}
+                """))
+                await conn.execute(text(
+                    f"COMMENT ON INDEX {build_name} IS '{spec.replace(chr(39), chr(39) * 2)}'"
+                ))
+                if build_name == name:
+                    return "created"
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                await conn.execute(text(f"ALTER INDEX {build_name} RENAME TO {name}"))
+                return "rebuilt"
+            finally:
+                try:
+                    await conn.execute(text("RESET maintenance_work_mem"))
+                    await conn.execute(text("RESET max_parallel_maintenance_workers"))
+                    await conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": name})
+                except Exception:
+                    # Closing the connection releases the session lock and settings
+                    await conn.invalidate()
+
+    async def ensure(self) -> Dict[str, str]:
+        """
+        Ensure the shared and per-user indexes of every configured column; failures are logged.
+
+        Returns:
+            Outcome per index name
+        """
+        results = {}
+        for column in self.columns:
+            for user_id in [None, *self.partial_users]:
+                name = self.index_name(column, user_id)
+                try:
+                    results[name] = await self.ensure_index(column, user_id)
+                    logger.info(f"HNSW index {name}: {results[name]}")
+                except Exception as e:
+                    results[name] = "failed"
+                    logger.error(f"HNSW index {name} failed: {e}")
+        return results
+
+    def start(self):
+        """Ensure the indexes in the background."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.ensure())
+
+    async def stop(self):
+        """Cancel a running build; the invalid index it leaves is rebuilt next time."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+vector_index_manager = VectorIndexManager()
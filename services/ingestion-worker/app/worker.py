@@ -0,0 +1,233 @@
+# FILE: services/ingestion-worker/app/worker.py
+
+import asyncio
+import hashlib
+import time
+from typing import List, Optional
+from sqlalchemy import text
+from app.database import AsyncSessionLocal
+from app.processor import document_processor
+from app.schemas import ProcessDocumentRequest
+from app.spooled_file import NamedSpooledTemporaryFile
+from app.storage import s3_client
+from app.scheduler import job_scheduler, classify_job, job_cost
+from app.job_queue import ingestion_queue
+from app.metrics import (
+    jobs_in_progress, documents_processed_total, stage_duration_seconds, document_bytes
+)
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def download_document(s3_key: str, s3=None) -> NamedSpooledTemporaryFile:
+    """
+    Download a document from S3 in fixed-size chunks.
+
+    The body is streamed into a spooled temporary file that stays in memory
+    up to DOWNLOAD_SPOOL_MAX_BYTES and spills to disk beyond that, so the
+    memory held per download is bounded regardless of the object size. The
+    caller owns the returned file and must close it, which deletes it. The
+    SHA-256 of the content is computed on the way in and set as
+    content_sha256 on the returned file.
+
+    Args:
+        s3_key: S3 object key
+        s3: Open S3 client to reuse; a new one is created if omitted
+
+    Returns:
+        Spooled file holding the document
+    """
+    if s3 is None:
+        async with s3_client() as s3:
+            return await download_document(s3_key, s3)
+
+    spool = NamedSpooledTemporaryFile(
+        max_size=settings.DOWNLOAD_SPOOL_MAX_BYTES,
+        prefix="ingest-",
+        dir=settings.DOWNLOAD_SPOOL_DIR or None
+    )
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        response = await s3.get_object(
+            Bucket=settings.S3_BUCKET_NAME,
+            Key=s3_key
+        )
+        async with response['Body'] as stream:
+            while True:
+                chunk = await stream.read(settings.DOWNLOAD_CHUNK_SIZE_BYTES)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                spool.write(chunk)
+                size += len(chunk)
+    except Exception:
+        spool.close()
+        raise
+
+    spool.content_sha256 = digest.hexdigest()
+    document_bytes.observe(size)
+
+    return spool
+
+
+async def run_document_job(job: ProcessDocumentRequest, s3=None) -> dict:
+    """
+    Download, process and store a document, then mark it completed.
+
+    Safe to run more than once for the same document: the processor
+    replaces any chunks left behind by an earlier delivery. Incremental
+    jobs only embed and write the chunks that changed.
+
+    Args:
+        job: Document job description
+        s3: Open S3 client to reuse; a new one is created if omitted
+
+    Returns:
+        Processing result dict
+    """
+    started = time.perf_counter()
+    with jobs_in_progress.track_inprogress():
+        try:
+            result = await _run_document_job(job, s3)
+        except Exception:
+            documents_processed_total.labels(outcome="failed").inc()
+            raise
+        finally:
+            stage_duration_seconds.labels(stage="total").observe(time.perf_counter() - started)
+            # Chunks may have been written or replaced even if the job failed
+            await ingestion_queue.announce_chunks_changed(job.user_id)
+    documents_processed_total.labels(outcome="success").inc()
+    return result
+
+
+async def _run_document_job(job: ProcessDocumentRequest, s3=None) -> dict:
+    """Download and process a document; see run_document_job."""
+    logger.info(f"Downloading document {job.document_id} from S3")
+    started = time.perf_counter()
+    spool = await download_document(job.s3_key, s3)
+    stage_duration_seconds.labels(stage="download").observe(time.perf_counter() - started)
+
+    with spool:
+        async with AsyncSessionLocal() as db:
+            process = (
+                document_processor.process_document_incremental
+                if job.incremental
+                else document_processor.process_document
+            )
+            result = await process(
+                document_id=job.document_id,
+                user_id=job.user_id,
+                source=spool.source(),
+                file_extension=job.file_extension,
+                db=db,
+                content_digest=spool.content_sha256
+            )
+
+            # Update document status in documents table (if it exists)
+            try:
+                await db.execute(
+                    text("""
+                        UPDATE documents
+                        SET status = 'completed',
+                            processed_at = NOW()
+                        WHERE id = :doc_id
+                    """),
+                    {"doc_id": job.document_id}
+                )
+                await db.commit()
+            except Exception as e:
+                logger.warning(f"Could not update document status: {e}")
+
+    return result
+
+
+async def mark_document_failed(document_id: str, error: str) -> None:
+    """
+    Record a processing failure on the documents table.
+
+    Args:
+        document_id: Document ID
+        error: Error message to store
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                text("""
+                    UPDATE documents
+                    SET status = 'failed',
+                        processing_error = :error
+                    WHERE id = :doc_id
+                """),
+                {"doc_id": document_id, "error": error}
+            )
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Could not mark document {document_id} as failed: {e}")
+
+
+async def schedule_document_job(
+    job: ProcessDocumentRequest,
+    s3=None,
+    default_lane: Optional[str] = None
+) -> dict:
+    """
+    Run a document job through the fair scheduler.
+
+    Args:
+        job: Document job description
+        s3: Optional open S3 client to reuse
+        default_lane: Lane used when the job does not set a priority
+
+    Returns:
+        Processing result dict
+    """
+    fields = job.model_dump()
+    if default_lane and not job.priority:
+        fields["priority"] = default_lane
+    return await job_scheduler.run(
+        classify_job(fields),
+        job.user_id,
+        job_cost(fields),
+        lambda: run_document_job(job, s3)
+    )
+
+
+async def run_document_batch(jobs: List[ProcessDocumentRequest]) -> List[dict]:
+    """
+    Process many documents concurrently and report the outcome of each.
+
+    Up to BATCH_CONCURRENCY documents are submitted to the fair scheduler at
+    once, in the bulk lane unless they set a priority, and share a single S3
+    client. Their chunks go through the shared embedding
+    coalescer, so small per-document batches are pooled into full-size
+    requests to the LLM Proxy. A failing document is marked failed and does
+    not affect the others.
+
+    Args:
+        jobs: Document job descriptions
+
+    Returns:
+        One result dict per job, in order, with status "success" or "failed"
+    """
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+    async with s3_client(max_connections=settings.BATCH_CONCURRENCY) as s3:
+
+        async def run_one(job: ProcessDocumentRequest) -> dict:
+            async with semaphore:
+                try:
+                    return await schedule_document_job(job, s3, default_lane="bulk")
+                except Exception as e:
+                    logger.error(f"Error processing document {job.document_id} in batch: {e}")
+                    await mark_document_failed(job.document_id, str(e))
+                    return {
+                        "status": "failed",
+                        "document_id": job.document_id,
+                        "error": str(e)
+                    }
+
+        return await asyncio.gather(*[run_one(job) for job in jobs])
@@ -0,0 +1,85 @@
+# FILE: services/ingestion-worker/benchmarks/bench_binary.py
+
+"""
+Measure recall of binary-quantized (bit) candidate search with full-precision re-ranking.
+
+Embeddings are quantized the way the writer stores embedding_bits (one
+bit per dimension, set where the component is positive). For each query,
+the rows nearest by Hamming distance over the bits are taken as
+candidates and re-ranked by exact cosine similarity, which is what the
+RAG service does with BINARY_SEARCH_CANDIDATES. Reports recall@k against
+exact top-k for each --candidates value, Hamming-only recall and bytes per
+row. Latency depends on pgvector's index rather than on NumPy, so it is
+not measured here; bench_hnsw covers the indexed search.
+
+By default the corpus is synthetic (clustered); its numbers only show the
+shape of the trade-off. With --database, full embeddings stored in
+document_chunks are used instead, holding out --queries of them as
+queries (needs the service environment).
+
+Usage (from services/ingestion-worker):
+    python -m benchmarks.bench_binary
+    python -m benchmarks.bench_binary --candidates 100 200 400 800 --k 10
+    python -m benchmarks.bench_binary --database --rows 100000
+"""
+
+import argparse
+import asyncio
+import numpy as np
+from benchmarks.bench_halfvec import DIMENSIONS, synthetic_corpus, top_k, unit
+from benchmarks.bench_matryoshka import recall, stored_corpus
+
+# Set bits per byte value
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+
+# Row payload of each type: varlena header and dim/bit-length fields + elements
+BYTES_PER_ROW = {"vector": 8 + 4 * DIMENSIONS, "bit": 8 + DIMENSIONS // 8}
+
+
+def quantize(matrix: np.ndarray) -> np.ndarray:
+    """Packed bits, most significant bit first (pgvector's binary_quantize layout)."""
+    return np.packbits(matrix > 0, axis=1)
+
+
+def hamming(query_bits: np.ndarray, corpus_bits: np.ndarray) -> np.ndarray:
+    """Hamming distance from one packed query to every packed row."""
+    return POPCOUNT[np.bitwise_xor(corpus_bits, query_bits)].sum(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", action="store_true", help="Use stored embeddings instead of synthetic ones")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[100, 200, 400, 800])
+    args = parser.parse_args()
+
+    if args.database:
+        data = asyncio.run(stored_corpus(args.rows + args.queries))
+        if len(data) <= args.queries:
+            print("Not enough stored embeddings")
+            return
+    else:
+        data = synthetic_corpus(args.rows + args.queries, args.clusters)
+    queries, corpus = unit(data[:args.queries]), unit(data[args.queries:])
+    print(f"{len(corpus):,} rows, {len(queries)} queries, k={args.k}")
+
+    full_scores = queries @ corpus.T
+    exact = top_k(full_scores, args.k)
+    corpus_bits = quantize(corpus)
+    distances = np.stack([hamming(bits, corpus_bits) for bits in quantize(queries)])
+
+    print(f"{'search':<12} {'bytes/row':>9} {'recall':>7}")
+    print(f"{'fp32':<12} {BYTES_PER_ROW['vector']:>9} {1.0:>7.3f}")
+    print(f"{'hamming':<12} {BYTES_PER_ROW['bit']:>9} {recall(top_k(-distances, args.k), exact):>7.3f}")
+    for candidates in args.candidates:
+        pool = top_k(-distances, max(candidates, args.k))
+        rescored = np.take_along_axis(full_scores, pool, axis=1)
+        best = np.take_along_axis(pool, top_k(rescored, args.k), axis=1)
+        print(f"{'rescore ' + str(candidates):<12} {'':>9} {recall(best, exact):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
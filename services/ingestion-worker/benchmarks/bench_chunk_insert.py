@@ -0,0 +1,114 @@
+# FILE: services/ingestion-worker/benchmarks/bench_chunk_insert.py
+
+"""
+Benchmark chunk insertion: ORM objects vs multi-row INSERT vs binary COPY.
+
+Writes synthetic chunks with random 1536-dimension embeddings into
+document_chunks under throwaway document IDs, reports rows/sec for each
+path and deletes the rows afterwards. Needs the service environment
+(.env or exported variables) pointing at a pgvector database.
+
+Usage (from services/ingestion-worker):
+    python -m benchmarks.bench_chunk_insert
+    python -m benchmarks.bench_chunk_insert --rows 500 --batch 64 --repeat 5
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from sqlalchemy import delete
+from app.database import AsyncSessionLocal, init_db
+from app.models import DocumentChunk
+from app.bulk_writer import ChunkBulkWriter
+from app.processor import chunk_id
+
+DIMENSIONS = 1536
+
+
+def make_rows(document_id: str, count: int) -> list:
+    text = "lorem ipsum dolor sit amet " * 36
+    return [
+        {
+            "id": chunk_id(document_id, index),
+            "document_id": document_id,
+            "user_id": "benchmark-user",
+            "chunk_index": index,
+            "chunk_text": text,
+            "chunk_size": len(text),
+            "embedding": [random.uniform(-1, 1) for _ in range(DIMENSIONS)],
+            "page_number": index // 3 + 1,
+            "minhash": None,
+            "lsh_bands": None,
+            "embedding_half": None,
+            "embedding_reduced": None,
+            "embedding_bits": None,
+        }
+        for index in range(count)
+    ]
+
+
+async def orm_path(rows: list, batch: int):
+    """The original path: one ORM object per chunk, one commit per document."""
+    async with AsyncSessionLocal() as db:
+        for row in rows:
+            db.add(DocumentChunk(**row))
+        await db.commit()
+
+
+async def insert_path(rows: list, batch: int):
+    writer = ChunkBulkWriter()
+    writer.use_copy = False
+    async with AsyncSessionLocal() as db:
+        for start in range(0, len(rows), batch):
+            await writer.write(rows[start:start + batch], db)
+
+
+async def copy_path(rows: list, batch: int):
+    writer = ChunkBulkWriter()
+    writer.use_copy = True
+    await writer.connect()
+    try:
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(rows), batch):
+                await writer.write(rows[start:start + batch], db)
+    finally:
+        await writer.disconnect()
+
+
+async def cleanup(document_ids: list):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(DocumentChunk).where(DocumentChunk.document_id.in_(document_ids)))
+        await db.commit()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500, help="Chunks per document")
+    parser.add_argument("--batch", type=int, default=64, help="Rows per write for INSERT/COPY")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    await init_db()
+    paths = [("orm", orm_path), ("insert", insert_path), ("copy", copy_path)]
+    document_ids = []
+
+    try:
+        for name, path in paths:
+            timings = []
+            for _ in range(args.repeat):
+                document_id = f"benchmark-{uuid.uuid4()}"
+                document_ids.append(document_id)
+                rows = make_rows(document_id, args.rows)
+                start = time.perf_counter()
+                await path(rows, args.batch)
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            print(f"{name:>6}: {args.rows / best:10.0f} rows/sec (best of {args.repeat}, {best:.3f}s)")
+    finally:
+        await cleanup(document_ids)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+# FILE: services/ingestion-worker/benchmarks/bench_chunker.py
+
+"""
+Compare the throughput of the native chunker and langchain's.
+
+Generates a multi-MB randomized document that exercises every separator
+level (paragraphs, lines, sentences, words, and unbroken runs longer than
+a chunk) and reports MB/s of NativeTextSplitter and
+RecursiveCharacterTextSplitter on it, and on text files passed with
+--file. That both return the same chunks is checked by
+tests/test_chunker.py.
+
+Usage (from services/ingestion-worker):
+    python -m benchmarks.bench_chunker
+    python -m benchmarks.bench_chunker --size-mb 4 --file /path/to/doc.txt
+"""
+
+import argparse
+import random
+import time
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.chunker import NativeTextSplitter, SEPARATORS
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog lorem ipsum dolor sit amet "
+    "consectetur adipiscing elit sed do eiusmod tempor incididunt labore"
+).split()
+
+
+def random_text(rng: random.Random, length: int) -> str:
+    """Build text mixing all separators, stray whitespace and long unbroken runs."""
+    parts = []
+    size = 0
+    while size < length:
+        roll = rng.random()
+        if roll < 0.70:
+            part = rng.choice(WORDS)
+        elif roll < 0.80:
+            part = ". "
+        elif roll < 0.88:
+            part = "\n"
+        elif roll < 0.94:
+            part = "\n\n"
+        elif roll < 0.97:
+            part = rng.choice(["  ", "\n\n\n", " \n ", "\t"])
+        else:
+            part = "x" * rng.randint(20, 1500)
+        parts.append(part)
+        parts.append(" " if rng.random() < 0.8 else "")
+        size += len(part) + 1
+    return "".join(parts)
+
+
+def throughput(splitter, text: str, repeat: int) -> float:
+    """Best-of-repeat throughput in MB/s."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        splitter.split_text(text)
+        best = min(best, time.perf_counter() - start)
+    return len(text.encode("utf-8")) / best / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=4.0, help="Size of the throughput document")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--file", action="append", default=[], help="Also time this text file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents = [("synthetic", random_text(rng, int(args.size_mb * 1e6)))]
+    for path in args.file:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            documents.append((path, f.read()))
+
+    for name, text in documents:
+        langchain = RecursiveCharacterTextSplitter(
+            chunk_size=1000, chunk_overlap=200, length_function=len, separators=SEPARATORS
+        )
+        native = NativeTextSplitter(1000, 200, SEPARATORS)
+        langchain_rate = throughput(langchain, text, args.repeat)
+        native_rate = throughput(native, text, args.repeat)
+        print(
+            f"{name}: {len(text) / 1e6:.1f}M chars | langchain {langchain_rate:7.2f} MB/s | "
+            f"native {native_rate:7.2f} MB/s | {native_rate / langchain_rate:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
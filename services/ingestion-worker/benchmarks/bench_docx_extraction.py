@@ -0,0 +1,147 @@
+# FILE: services/ingestion-worker/benchmarks/bench_docx_extraction.py
+
+"""
+Compare peak memory and throughput of the DOCX extractor backends.
+
+Writes a synthetic table-heavy DOCX (or uses one passed with --docx) and,
+for every DOCX backend, extracts it in a fresh process, either consuming
+the sections alone or feeding them through the IncrementalChunker the
+way the worker does without a process pool. Each run reports wall time,
+MB/s of uncompressed document.xml parsed, growth of the process's peak
+RSS over its post-import baseline, and the characters and chunks produced.
+
+Usage (from services/ingestion-worker):
+    python -m benchmarks.bench_docx_extraction
+    python -m benchmarks.bench_docx_extraction --paragraphs 50000 --table-rows 100000
+    python -m benchmarks.bench_docx_extraction --docx /path/to/large.docx
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+from app.extractors import backend_names, get_backend
+from benchmarks.bench_pdf_extraction import LOREM
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+
+RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships/officeDocument" Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+def paragraph_xml(text: str) -> str:
+    """A paragraph with its text split across a plain and a bold run, as editors write it."""
+    middle = len(text) // 2
+    return (
+        f'<w:p><w:pPr><w:pStyle w:val="Normal"/></w:pPr>'
+        f'<w:r><w:t xml:space="preserve">{escape(text[:middle])}</w:t></w:r>'
+        f'<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">{escape(text[middle:])}</w:t></w:r></w:p>'
+    )
+
+
+def write_synthetic_docx(path: str, paragraphs: int, table_rows: int, columns: int = 4):
+    """Write a DOCX of numbered paragraphs with a table after every 1000 of them."""
+    tables = max(1, paragraphs // 1000)
+    rows_per_table = table_rows // tables
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", RELATIONSHIPS)
+        with archive.open("word/document.xml", "w") as xml:
+            xml.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+            )
+            for index in range(paragraphs):
+                xml.write(paragraph_xml(f"Paragraph {index + 1}: {LOREM}").encode())
+                if rows_per_table and (index + 1) % (paragraphs // tables) == 0:
+                    table = index // (paragraphs // tables)
+                    rows = "".join(
+                        "<w:tr>" + "".join(
+                            f"<w:tc><w:tcPr><w:tcW w:w=\"2000\" w:type=\"dxa\"/></w:tcPr>"
+                            f"{paragraph_xml(f'table {table} row {row} column {column} value {row * column}')}</w:tc>"
+                            for column in range(columns)
+                        ) + "</w:tr>"
+                        for row in range(rows_per_table)
+                    )
+                    xml.write(f"<w:tbl>{rows}</w:tbl>".encode())
+            xml.write(b"<w:sectPr/></w:body></w:document>")
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(path: str, backend: str, chunk: bool, results):
+    """Extract (and optionally chunk) the file in this process and report the measurements."""
+    from app.chunker import TextChunker, IncrementalChunker
+    from app.text_extractor import TextExtractor
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    characters = chunks = 0
+    incremental = IncrementalChunker(TextChunker()) if chunk else None
+    for page_number, text in TextExtractor.iter_sections(path, "docx", backend):
+        characters += len(text)
+        if incremental is not None:
+            chunks += len(incremental.feed(page_number, text))
+    if incremental is not None:
+        chunks += len(incremental.finish())
+    elapsed = time.perf_counter() - start
+    results.put((elapsed, peak_rss_mb() - baseline, characters, chunks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docx", help="Benchmark this DOCX instead of a synthetic one")
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--table-rows", type=int, default=40000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.docx
+        if not path:
+            path = os.path.join(directory, "synthetic.docx")
+            write_synthetic_docx(path, args.paragraphs, args.table_rows)
+        size = os.path.getsize(path)
+        with zipfile.ZipFile(path) as archive:
+            xml_size = archive.getinfo("word/document.xml").file_size
+        print(f"{path}: {size / 1e6:.1f} MB on disk, document.xml {xml_size / 1e6:.1f} MB")
+
+        print(f"{'backend':<12} {'stage':<14} {'seconds':>8} {'XML MB/s':>8} {'peak RSS +MB':>13} {'chars':>11} {'chunks':>7}")
+        context = multiprocessing.get_context("spawn")
+        for name in backend_names("docx"):
+            if not get_backend("docx", name).available():
+                print(f"{name:<12} not installed")
+                continue
+            for chunk in (False, True):
+                results = context.Queue()
+                process = context.Process(target=run_backend, args=(path, name, chunk, results))
+                process.start()
+                elapsed, rss, characters, chunks = results.get()
+                process.join()
+                stage = "extract+chunk" if chunk else "extract"
+                print(
+                    f"{name:<12} {stage:<14} {elapsed:>8.2f} {xml_size / elapsed / 1e6:>8.2f} "
+                    f"{rss:>13.1f} {characters:>11,} {chunks if chunk else '-':>7}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# FILE: services/ingestion-worker/benchmarks/bench_extractors.py
+
+"""
+Time every registered extractor backend per format and check its output.
+
+Builds a fixture corpus of synthetic files with known text (multi-page
+PDFs, DOCX files with paragraphs and tables, UTF-8 and latin-1 text) and
+adds any files found under --corpus. Each installed backend extracts every
+file of its format; the report shows throughput and a word-level F1 score
+against the expected text (for corpus files, against the --reference
+backend's output). The fastest backend whose worst F1 is at least
+--min-f1 is recommended for each format.
+
+Usage (from services/ingestion-worker):
+    python -m benchmarks.bench_extractors
+    python -m benchmarks.bench_extractors --corpus /path/to/documents --repeat 5
+"""
+
+import argparse
+import io
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+from docx import Document
+from app.extractors import FORMAT_BY_EXTENSION, backend_names, get_backend
+from app.text_extractor import TextExtractor
+from benchmarks.bench_pdf_extraction import LOREM, synthetic_pdf
+
+# Fixture: (name, file extension, bytes, expected text or None to use the reference backend)
+Fixture = Tuple[str, str, bytes, str]
+
+
+def synthetic_docx(paragraphs: int, table_rows: int) -> Tuple[bytes, str]:
+    """Build a DOCX with numbered paragraphs followed by a table."""
+    doc = Document()
+    expected = []
+    for index in range(paragraphs):
+        text = f"Paragraph {index + 1}: {LOREM}"
+        doc.add_paragraph(text)
+        expected.append(text)
+    if table_rows:
+        table = doc.add_table(rows=table_rows, cols=3)
+        for row_index, row in enumerate(table.rows):
+            for column_index, cell in enumerate(row.cells):
+                cell.text = f"cell r{row_index + 1} c{column_index + 1} amount {row_index * 3 + column_index}"
+                expected.append(cell.text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue(), "\n".join(expected)
+
+
+def fixture_corpus(corpus_dir: str) -> List[Fixture]:
+    """Synthetic fixtures with known text plus the supported files under corpus_dir."""
+    fixtures: List[Fixture] = []
+
+    for pages in (10, 100):
+        lines = [
+            f"Page {page + 1} line {line + 1}: {LOREM}"
+            for page in range(pages) for line in range(40)
+        ]
+        fixtures.append((f"synthetic-{pages}p.pdf", "pdf", synthetic_pdf(pages), "\n".join(lines)))
+
+    for paragraphs, rows in ((200, 0), (2000, 300)):
+        body, expected = synthetic_docx(paragraphs, rows)
+        fixtures.append((f"synthetic-{paragraphs}p-{rows}r.docx", "docx", body, expected))
+
+    text = "\n\n".join(f"Línea {index}: {LOREM} — ünïcode" for index in range(50000))
+    fixtures.append(("synthetic-utf8.txt", "txt", text.encode("utf-8"), text))
+    fixtures.append(("synthetic-latin1.txt", "txt", text.replace("—", "-").encode("latin-1"),
+                     text.replace("—", "-")))
+
+    if corpus_dir:
+        for root, _, files in os.walk(corpus_dir):
+            for filename in sorted(files):
+                ext = filename.rsplit(".", 1)[-1].lower()
+                if ext in FORMAT_BY_EXTENSION:
+                    with open(os.path.join(root, filename), "rb") as f:
+                        fixtures.append((filename, ext, f.read(), None))
+    return fixtures
+
+
+def words(text: str) -> Counter:
+    return Counter(re.findall(r"\w+", text.lower()))
+
+
+def word_f1(actual: str, expected: str) -> float:
+    """F1 of the bag of words of the extracted text against the expected text."""
+    actual_words, expected_words = words(actual), words(expected)
+    if not expected_words:
+        return 1.0 if not actual_words else 0.0
+    overlap = sum((actual_words & expected_words).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(actual_words.values())
+    recall = overlap / sum(expected_words.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def extract(body: bytes, ext: str, backend: str) -> str:
+    return "\n\n".join(text for _, text in TextExtractor.extract_sections(body, ext, backend))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="", help="Directory of real documents to add to the fixtures")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per file (best is kept)")
+    parser.add_argument("--min-f1", type=float, default=0.98, help="Worst-case F1 a backend needs to be recommended")
+    parser.add_argument("--reference", nargs="*", default=["pdf=pypdf2", "docx=python-docx", "text=utf8"],
+                        help="Backend whose output is the expected text for corpus files, per format")
+    args = parser.parse_args()
+
+    references = dict(item.split("=", 1) for item in args.reference)
+    fixtures = fixture_corpus(args.corpus)
+
+    by_format: Dict[str, List[Fixture]] = {}
+    for fixture in fixtures:
+        by_format.setdefault(FORMAT_BY_EXTENSION[fixture[1]], []).append(fixture)
+
+    print(f"{'format':<6} {'backend':<12} {'files':>5} {'MB':>7} {'seconds':>8} {'MB/s':>8} {'min F1':>7}")
+    for document_format, files in by_format.items():
+        results = []
+        for name in backend_names(document_format):
+            backend = get_backend(files[0][1], name)
+            if not backend.available():
+                print(f"{document_format:<6} {name:<12} not installed ({backend.requires})")
+                continue
+
+            elapsed, size, scores = 0.0, 0, []
+            for filename, ext, body, expected in files:
+                if expected is None:
+                    expected = extract(body, ext, references[document_format])
+                best = float("inf")
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    text = extract(body, ext, name)
+                    best = min(best, time.perf_counter() - start)
+                elapsed += best
+                size += len(body)
+                scores.append(word_f1(text, expected))
+
+            rate = size / elapsed / 1e6
+            results.append((name, rate, min(scores)))
+            print(
+                f"{document_format:<6} {name:<12} {len(files):>5} {size / 1e6:>7.2f} "
+                f"{elapsed:>8.3f} {rate:>8.2f} {min(scores):>7.3f}"
+            )
+
+        correct = [result for result in results if result[2] >= args.min_f1]
+        if correct:
+            fastest = max(correct, key=lambda result: result[1])
+            print(f"  -> {document_format}: fastest correct backend is {fastest[0]}")
+        else:
+            print(f"  -> {document_format}: no backend reached F1 {args.min_f1}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# FILE: services/ingestion-worker/benchmarks/bench_halfvec.py
+
+"""
+Compare fp32 cosine search with unit-normalized halfvec inner-product search.
+
+Offline (default), builds a clustered synthetic corpus of 1536-dimension
+embeddings, stores a unit-normalized float16 copy the way the writer does,
+and reports recall@k of inner-product top-k over the fp16 copy against
+exact fp32 cosine top-k, the largest score error, and bytes per row.
+
+With --database, samples chunks that have both columns in document_chunks
+and uses their fp32 embeddings as queries within the owning user's chunks:
+both SQL queries the RAG service can issue are timed and their top-k
+overlap is reported. Needs the service environment (.env or exported
+variables) and chunks written with EMBEDDING_STORAGE=both or backfilled
+by scripts.backfill_halfvec.
+
+Usage (from services/ingestion-worker):
+    python -m benchmarks.bench_halfvec
+    python -m benchmarks.bench_halfvec --rows 200000 --queries 500 --k 10
+    python -m benchmarks.bench_halfvec --database --queries 100
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import numpy as np
+
+DIMENSIONS = 1536
+
+# Row payload of each type: varlena header and dim/unused fields + elements
+BYTES_PER_ROW = {"vector": 8 + 4 * DIMENSIONS, "halfvec": 8 + 2 * DIMENSIONS}
+
+VECTOR_QUERY = """
+    SELECT id FROM document_chunks
+    WHERE user_id = :user_id AND embedding IS NOT NULL
+    ORDER BY embedding <=> CAST(:embedding AS vector)
+    LIMIT :k
+"""
+
+HALFVEC_QUERY = """
+    SELECT id FROM document_chunks
+    WHERE user_id = :user_id AND embedding_half IS NOT NULL
+    ORDER BY embedding_half <#> CAST(:embedding AS halfvec)
+    LIMIT :k
+"""
+
+
+def synthetic_corpus(rows: int, clusters: int, seed: int = 7) -> np.ndarray:
+    """Embeddings grouped around random topic centers, like chunks of related documents."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIMENSIONS)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=rows)
+    noise = rng.standard_normal((rows, DIMENSIONS)).astype(np.float32)
+    return centers[assignment] + 0.8 * noise
+
+
+def unit(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=-1, keepdims=True)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores per row, in no particular order."""
+    return np.argpartition(-scores, k, axis=1)[:, :k]
+
+
+def offline(args):
+    rng = np.random.default_rng(11)
+    corpus = synthetic_corpus(args.rows, args.clusters)
+    picks = rng.integers(0, args.rows, size=args.queries)
+    queries = corpus[picks] + 0.5 * rng.standard_normal((args.queries, DIMENSIONS)).astype(np.float32)
+
+    start = time.perf_counter()
+    half = unit(corpus).astype(np.float16)
+    print(f"Normalized and converted {args.rows:,} rows to float16 in {time.perf_counter() - start:.2f}s")
+
+    unit_queries = unit(queries)
+    exact = unit_queries @ unit(corpus).T
+    # pgvector computes halfvec distances in float32 over the float16 elements
+    approx = unit_queries.astype(np.float16).astype(np.float32) @ half.astype(np.float32).T
+
+    exact_top = top_k(exact, args.k)
+    approx_top = top_k(approx, args.k)
+    recalls = [
+        len(set(a) & set(e)) / args.k for a, e in zip(approx_top, exact_top)
+    ]
+    error = float(np.max(np.abs(exact - approx)))
+
+    print(f"recall@{args.k}: mean {statistics.mean(recalls):.4f}, min {min(recalls):.2f} "
+          f"over {args.queries} queries")
+    print(f"max |cosine - halfvec inner product|: {error:.2e}")
+    for name, size in BYTES_PER_ROW.items():
+        print(f"{name:<8} {size:>6} bytes/row  {size * args.rows / 1e6:>9.1f} MB for {args.rows:,} rows")
+
+
+async def database(args):
+    from sqlalchemy import text
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        sample = (await db.execute(text("""
+            SELECT user_id, embedding FROM document_chunks
+            WHERE embedding IS NOT NULL AND embedding_half IS NOT NULL
+            ORDER BY random() LIMIT :n
+        """), {"n": args.queries})).fetchall()
+        if not sample:
+            print("No chunks with both embedding and embedding_half; run scripts.backfill_halfvec first")
+            return
+
+        timings = {"vector": [], "halfvec": []}
+        recalls = []
+        for user_id, embedding in sample:
+            query = np.asarray(embedding, dtype=np.float32)
+            results = {}
+            for name, sql, vector in (
+                ("vector", VECTOR_QUERY, query),
+                ("halfvec", HALFVEC_QUERY, unit(query)),
+            ):
+                params = {"user_id": user_id, "embedding": str(vector.tolist()), "k": args.k}
+                start = time.perf_counter()
+                rows = (await db.execute(text(sql), params)).fetchall()
+                timings[name].append(time.perf_counter() - start)
+                results[name] = {row[0] for row in rows}
+            if results["vector"]:
+                recalls.append(len(results["vector"] & results["halfvec"]) / len(results["vector"]))
+
+        sizes = (await db.execute(text("""
+            SELECT avg(pg_column_size(embedding)), avg(pg_column_size(embedding_half))
+            FROM document_chunks WHERE embedding IS NOT NULL AND embedding_half IS NOT NULL
+        """))).one()
+
+    print(f"{'column':<8} {'median ms':>10} {'p95 ms':>8} {'bytes/row':>10}")
+    for (name, samples), size in zip(timings.items(), sizes):
+        samples = sorted(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{name:<8} {statistics.median(samples) * 1000:>10.2f} {p95 * 1000:>8.2f} {float(size):>10.0f}")
+    print(f"halfvec top-{args.k} overlap with fp32: mean {statistics.mean(recalls):.4f}, "
+          f"min {min(recalls):.2f} over {len(recalls)} queries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", action="store_true", help="Measure on document_chunks instead of synthetic data")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.database:
+        asyncio.run(database(args))
+    else:
+        offline(args)
+
+
+if __name__ == "__main__":
+    main()
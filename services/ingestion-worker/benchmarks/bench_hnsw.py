@@ -0,0 +1,112 @@
+# FILE: services/ingestion-worker/benchmarks/bench_hnsw.py
+
+"""
+Measure recall and latency of HNSW search per hnsw.ef_search value.
+
+Samples stored chunks as queries and, for each, runs the RAG service's
+per-user top-k search once exactly (index scans disabled) and once through
+the HNSW index for every --ef-search value, each in its own transaction
+with SET LOCAL. Reports median and p95 latency and recall@k against the
+exact result, which is what the search_quality levels of the RAG service
+trade between. Users with few chunks can come back short of k rows from
+the index (the user filter is applied after the scan); those are counted
+in the "short" column. Needs the service environment and an index built
+by the workers or scripts.build_vector_index.
+
+Usage (from services/ingestion-worker):
+    python -m benchmarks.bench_hnsw
+    python -m benchmarks.bench_hnsw --column embedding_half --ef-search 20 40 100 200 --k 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import numpy as np
+from sqlalchemy import text
+from app.database import AsyncSessionLocal
+from benchmarks.bench_halfvec import unit
+
+QUERIES = {
+    "embedding": """
+        SELECT id FROM document_chunks
+        WHERE user_id = :user_id AND embedding IS NOT NULL
+        ORDER BY embedding <=> CAST(:embedding AS vector)
+        LIMIT :k
+    """,
+    "embedding_half": """
+        SELECT id FROM document_chunks
+        WHERE user_id = :user_id AND embedding_half IS NOT NULL
+        ORDER BY embedding_half <#> CAST(:embedding AS halfvec)
+        LIMIT :k
+    """,
+}
+
+
+async def timed_search(sql: str, params: dict, settings: dict):
+    """Run a search in its own transaction with the given SET LOCAL settings."""
+    async with AsyncSessionLocal() as db:
+        for name, value in settings.items():
+            await db.execute(text(f"SET LOCAL {name} = {value}"))
+        start = time.perf_counter()
+        rows = (await db.execute(text(sql), params)).fetchall()
+        elapsed = time.perf_counter() - start
+        await db.rollback()
+    return elapsed, [row[0] for row in rows]
+
+
+def summarize(label: str, timings, recalls, short: int):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{label:<10} {statistics.median(timings) * 1000:>10.2f} {p95 * 1000:>8.2f} "
+        f"{statistics.mean(recalls):>8.4f} {short:>6}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--column", choices=sorted(QUERIES), default="embedding")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[20, 40, 100, 200])
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        sample = (await db.execute(text(f"""
+            SELECT user_id, COALESCE(embedding, embedding_half::vector) FROM document_chunks
+            WHERE {args.column} IS NOT NULL
+            ORDER BY random() LIMIT :n
+        """), {"n": args.queries})).fetchall()
+    if not sample:
+        print(f"No chunks with {args.column}")
+        return
+
+    sql = QUERIES[args.column]
+    exact_times, exact_results = [], []
+    by_ef = {ef: ([], [], 0) for ef in args.ef_search}
+    for user_id, embedding in sample:
+        query = np.asarray(embedding, dtype=np.float32)
+        if args.column == "embedding_half":
+            query = unit(query)
+        params = {"user_id": user_id, "embedding": str(query.tolist()), "k": args.k}
+
+        elapsed, exact = await timed_search(sql, params, {"enable_indexscan": "off"})
+        exact_times.append(elapsed)
+        exact_results.append(exact)
+        for ef in args.ef_search:
+            elapsed, found = await timed_search(sql, params, {"hnsw.ef_search": ef})
+            timings, recalls, short = by_ef[ef]
+            timings.append(elapsed)
+            recalls.append(len(set(found) & set(exact)) / len(exact) if exact else 1.0)
+            by_ef[ef] = (timings, recalls, short + (len(found) < len(exact)))
+
+    print(f"{len(sample)} queries on {args.column}, k={args.k}")
+    print(f"{'ef_search':<10} {'median ms':>10} {'p95 ms':>8} {'recall':>8} {'short':>6}")
+    summarize("exact", exact_times, [1.0], 0)
+    for ef, (timings, recalls, short) in by_ef.items():
+        summarize(str(ef), timings, recalls, short)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+# FILE: services/ingestion-worker/benchmarks/bench_matryoshka.py
+
+"""
+Measure recall of reduced-dimension (Matryoshka) search, with and without re-scoring.
+
+For each candidate tier size, embeddings are shortened the way the writer
+stores embedding_reduced (leading dimensions, re-normalized) and the
+top-k by cosine over the short vectors is compared with exact top-k over
+the full 1536 dimensions. Each tier is also measured with full-dimension
+re-scoring of the best --candidates short-vector hits, which is what the
+RAG service does with RESCORE_CANDIDATES. Scan time per query (NumPy,
+brute force) and bytes per row show the cost side.
+
+By default the corpus is synthetic, with per-dimension variance decaying
+along the vector to mimic how text-embedding-3 models front-load
+information; its numbers only show the shape of the trade-off. With
+--database, full embeddings stored in document_chunks are used instead,
+holding out --queries of them as queries (needs the service environment).
+
+Usage (from services/ingestion-worker):
+    python -m benchmarks.bench_matryoshka
+    python -m benchmarks.bench_matryoshka --dimensions 128 256 512 --candidates 20 50 100
+    python -m benchmarks.bench_matryoshka --database --rows 100000
+"""
+
+import argparse
+import asyncio
+import time
+import numpy as np
+from benchmarks.bench_halfvec import DIMENSIONS, top_k, unit
+
+
+def synthetic_corpus(rows: int, clusters: int, seed: int = 7) -> np.ndarray:
+    """Clustered embeddings whose leading dimensions carry the most variance."""
+    rng = np.random.default_rng(seed)
+    decay = (1.0 / np.sqrt(1 + np.arange(DIMENSIONS) / 64)).astype(np.float32)
+    centers = rng.standard_normal((clusters, DIMENSIONS)).astype(np.float32) * decay
+    assignment = rng.integers(0, clusters, size=rows)
+    noise = rng.standard_normal((rows, DIMENSIONS)).astype(np.float32) * decay
+    return centers[assignment] + 0.8 * noise
+
+
+async def stored_corpus(rows: int) -> np.ndarray:
+    """Full embeddings of up to `rows` stored chunks."""
+    from sqlalchemy import text
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(text("""
+            SELECT COALESCE(embedding, embedding_half::vector) FROM document_chunks
+            WHERE embedding IS NOT NULL OR embedding_half IS NOT NULL
+            ORDER BY random() LIMIT :rows
+        """), {"rows": rows})
+        return np.array([np.asarray(row[0], dtype=np.float32) for row in result], dtype=np.float32)
+
+
+def recall(found: np.ndarray, exact: np.ndarray) -> float:
+    k = exact.shape[1]
+    return float(np.mean([len(set(a) & set(e)) / k for a, e in zip(found, exact)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", action="store_true", help="Use stored embeddings instead of synthetic ones")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[128, 256, 512, 768])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[50, 100])
+    args = parser.parse_args()
+
+    if args.database:
+        data = asyncio.run(stored_corpus(args.rows + args.queries))
+        if len(data) <= args.queries:
+            print("Not enough stored embeddings")
+            return
+    else:
+        data = synthetic_corpus(args.rows + args.queries, args.clusters)
+    queries, corpus = unit(data[:args.queries]), unit(data[args.queries:])
+    print(f"{len(corpus):,} rows, {len(queries)} queries, k={args.k}")
+
+    start = time.perf_counter()
+    full_scores = queries @ corpus.T
+    full_ms = (time.perf_counter() - start) / len(queries) * 1000
+    exact = top_k(full_scores, args.k)
+
+    header = f"{'dims':>5} {'bytes/row':>9} {'scan ms':>8} {'recall':>7}"
+    header += "".join(f" {'rescore ' + str(c):>12}" for c in args.candidates)
+    print(header)
+    print(f"{DIMENSIONS:>5} {8 + 4 * DIMENSIONS:>9} {full_ms:>8.3f} {1.0:>7.3f}")
+
+    for dims in args.dimensions:
+        short_corpus, short_queries = unit(corpus[:, :dims]), unit(queries[:, :dims])
+        start = time.perf_counter()
+        short_scores = short_queries @ short_corpus.T
+        short_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        line = f"{dims:>5} {8 + 4 * dims:>9} {short_ms:>8.3f} {recall(top_k(short_scores, args.k), exact):>7.3f}"
+        for candidates in args.candidates:
+            pool = top_k(short_scores, max(candidates, args.k))
+            rescored = np.take_along_axis(full_scores, pool, axis=1)
+            best = np.take_along_axis(pool, top_k(rescored, args.k), axis=1)
+            line += f" {recall(best, exact):>12.3f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
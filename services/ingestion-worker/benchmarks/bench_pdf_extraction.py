@@ -0,0 +1,122 @@
+# FILE: services/ingestion-worker/benchmarks/bench_pdf_extraction.py
+
+"""
+Benchmark serial vs page-parallel PDF text extraction.
+
+Extracts synthetic PDFs (or a PDF passed with --pdf) once serially and then
+page-parallel with a range of process counts, printing wall time and speedup.
+
+Usage (from services/ingestion-worker):
+    python -m benchmarks.bench_pdf_extraction
+    python -m benchmarks.bench_pdf_extraction --pages 100 500 1000 --workers 1 2 4 8
+    python -m benchmarks.bench_pdf_extraction --pdf /path/to/large.pdf
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+from app.text_extractor import TextExtractor, split_page_ranges
+
+LOREM = (
+    "Lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua"
+)
+
+
+def synthetic_pdf(pages: int, lines_per_page: int = 40) -> bytes:
+    """Build an uncompressed multi-page PDF with Helvetica text on every page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the kids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        lines = [f"Page {page + 1} line {line + 1}: {LOREM}" for line in range(lines_per_page)]
+        stream = "BT /F1 9 Tf 11 TL 36 806 Td " + " ".join(f"({text}) '" for text in lines) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), pages
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def extract_parallel(
+    executor: ProcessPoolExecutor,
+    file_bytes: bytes,
+    page_count: int,
+    pages_per_task: int
+) -> List[Tuple[int, str]]:
+    """Extract page ranges concurrently and reassemble them in order."""
+    futures = [
+        executor.submit(TextExtractor.extract_pdf_pages, file_bytes, start, end)
+        for start, end in split_page_ranges(page_count, pages_per_task)
+    ]
+    return [page for future in futures for page in future.result()]
+
+
+def bench(file_bytes: bytes, workers: List[int], pages_per_task: int):
+    page_count = TextExtractor.count_pdf_pages(file_bytes)
+
+    start = time.perf_counter()
+    serial = TextExtractor.extract_pdf_pages(file_bytes)
+    serial_time = time.perf_counter() - start
+    print(f"{page_count:>6} pages | serial      | {serial_time:8.2f}s |   1.00x")
+
+    for count in workers:
+        with ProcessPoolExecutor(max_workers=count) as executor:
+            # Warm the pool so process start-up is not part of the measurement
+            list(executor.map(abs, range(count)))
+            start = time.perf_counter()
+            pages = extract_parallel(executor, file_bytes, page_count, pages_per_task)
+            elapsed = time.perf_counter() - start
+
+        assert pages == serial, "parallel extraction differs from serial output"
+        print(
+            f"{page_count:>6} pages | {count:>2} workers  | {elapsed:8.2f}s | "
+            f"{serial_time / elapsed:6.2f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="Benchmark this PDF instead of synthetic ones")
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--pages-per-task", type=int, default=25)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+    print(f"CPU cores: {cores}, pages per task: {args.pages_per_task}")
+
+    if args.pdf:
+        with open(args.pdf, "rb") as f:
+            bench(f.read(), workers, args.pages_per_task)
+        return
+
+    for pages in args.pages:
+        bench(synthetic_pdf(pages), workers, args.pages_per_task)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# FILE: services/ingestion-worker/scripts/backfill_binary.py
+
+"""
+Fill embedding_bits with the binary quantization of each chunk's embedding.
+
+Sets embedding_bits to pgvector's binary_quantize() of the stored
+embedding (from the fp32 column, or from embedding_half for chunks stored
+with EMBEDDING_STORAGE=halfvec): one bit per dimension, set where the
+component is positive, exactly as the writer computes it. Set
+EMBEDDING_BINARY on the workers first, run the script until nothing is
+left, add embedding_bits to HNSW_INDEX_COLUMNS, then set
+BINARY_SEARCH_CANDIDATES on the RAG service.
+
+Each batch commits on its own, so the script can be stopped and resumed
+and runs alongside the workers.
+
+Usage (from services/ingestion-worker):
+    python -m scripts.backfill_binary
+    python -m scripts.backfill_binary --batch 2000
+"""
+
+import argparse
+import asyncio
+from sqlalchemy import text
+from app.database import init_db
+from scripts.backfill_halfvec import run_batches
+
+BACKFILL = text("""
+    UPDATE document_chunks
+    SET embedding_bits = binary_quantize(COALESCE(embedding, embedding_half::vector))::bit(1536)
+    WHERE id IN (
+        SELECT id FROM document_chunks
+        WHERE (embedding IS NOT NULL OR embedding_half IS NOT NULL)
+        AND embedding_bits IS NULL
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=5000, help="Rows updated per transaction")
+    args = parser.parse_args()
+
+    await init_db()
+    converted = await run_batches(BACKFILL, args.batch, "binary")
+    print(f"Wrote binary-quantized embeddings for {converted:,} chunks")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+# FILE: services/ingestion-worker/scripts/backfill_halfvec.py
+
+"""
+Backfill embedding_half for chunks stored with an fp32 embedding only.
+
+Migration to compact storage (needs pgvector 0.7+; the workers update the
+extension at startup if their role owns it, otherwise run
+ALTER EXTENSION vector UPDATE as its owner first):
+
+    1. Set EMBEDDING_STORAGE=both on the ingestion workers, so new chunks
+       get both columns.
+    2. Run this script until it reports nothing left to convert.
+    3. Set VECTOR_STORAGE=halfvec on the RAG service.
+    4. Set EMBEDDING_STORAGE=halfvec on the workers and, once searches are
+       confirmed healthy, run the script again with --drop-vector to null
+       the fp32 column and reclaim its space (VACUUM afterwards).
+
+Each batch normalizes the vectors in Postgres (l2_normalize) and commits on
+its own, so the script can be stopped and resumed at any point and runs
+alongside the workers.
+
+Usage (from services/ingestion-worker):
+    python -m scripts.backfill_halfvec
+    python -m scripts.backfill_halfvec --batch 2000 --drop-vector
+"""
+
+import argparse
+import asyncio
+import time
+from sqlalchemy import text
+from app.database import AsyncSessionLocal, init_db
+
+BACKFILL = text("""
+    UPDATE document_chunks
+    SET embedding_half = l2_normalize(embedding)::halfvec(1536)
+    WHERE id IN (
+        SELECT id FROM document_chunks
+        WHERE embedding IS NOT NULL AND embedding_half IS NULL
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+DROP_VECTOR = text("""
+    UPDATE document_chunks
+    SET embedding = NULL
+    WHERE id IN (
+        SELECT id FROM document_chunks
+        WHERE embedding IS NOT NULL AND embedding_half IS NOT NULL
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+async def run_batches(statement, batch: int, label: str, **params) -> int:
+    """Run an UPDATE in committed batches until it touches no rows."""
+    total = 0
+    start = time.perf_counter()
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(statement, {"batch": batch, **params})
+            await db.commit()
+        if not result.rowcount:
+            break
+        total += result.rowcount
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {total:,} rows ({total / elapsed:,.0f} rows/s)")
+    return total
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=5000, help="Rows updated per transaction")
+    parser.add_argument("--drop-vector", action="store_true",
+                        help="Afterwards, null the fp32 embedding of every chunk that has embedding_half")
+    args = parser.parse_args()
+
+    await init_db()
+    converted = await run_batches(BACKFILL, args.batch, "converted")
+    print(f"Converted {converted:,} chunks to halfvec")
+
+    if args.drop_vector:
+        dropped = await run_batches(DROP_VECTOR, args.batch, "dropped fp32")
+        print(f"Dropped fp32 embeddings of {dropped:,} chunks; run VACUUM document_chunks to reclaim space")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+# FILE: services/ingestion-worker/scripts/backfill_reduced.py
+
+"""
+Fill embedding_reduced with the Matryoshka prefix of each chunk's embedding.
+
+Sets embedding_reduced to the first --dimensions components of the stored
+embedding, re-normalized (from the fp32 column, or from embedding_half for
+chunks stored with EMBEDDING_STORAGE=halfvec). Chunks whose reduced vector
+is missing or has another size are rewritten, so the script also moves
+a deployment from one tier size to another. Set
+EMBEDDING_REDUCED_DIMENSIONS on the workers first, run the script until
+nothing is left, then set SEARCH_DIMENSIONS on the RAG service.
+
+Each batch commits on its own, so the script can be stopped and resumed
+and runs alongside the workers.
+
+Usage (from services/ingestion-worker):
+    python -m scripts.backfill_reduced --dimensions 256
+    python -m scripts.backfill_reduced --dimensions 512 --batch 2000
+"""
+
+import argparse
+import asyncio
+from sqlalchemy import text
+from app.database import init_db
+from scripts.backfill_halfvec import run_batches
+
+BACKFILL = text("""
+    UPDATE document_chunks
+    SET embedding_reduced = l2_normalize(
+        subvector(COALESCE(embedding, embedding_half::vector), 1, :dimensions)
+    )
+    WHERE id IN (
+        SELECT id FROM document_chunks
+        WHERE (embedding IS NOT NULL OR embedding_half IS NOT NULL)
+        AND (embedding_reduced IS NULL OR vector_dims(embedding_reduced) != :dimensions)
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dimensions", type=int, required=True, help="Reduced embedding size, e.g. 256 or 512")
+    parser.add_argument("--batch", type=int, default=5000, help="Rows updated per transaction")
+    args = parser.parse_args()
+
+    await init_db()
+    converted = await run_batches(BACKFILL, args.batch, "reduced", dimensions=args.dimensions)
+    print(f"Wrote {args.dimensions}-dimension embeddings for {converted:,} chunks")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
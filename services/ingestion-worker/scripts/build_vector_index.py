@@ -0,0 +1,52 @@
+# FILE: services/ingestion-worker/scripts/build_vector_index.py
+
+"""
+Build or rebuild the HNSW indexes of document_chunks in the foreground.
+
+Workers do the same in the background at startup (HNSW_INDEX_ENABLED);
+this script is for building ahead of a deploy, or after changing
+HNSW_M / HNSW_EF_CONSTRUCTION or the reduced tier size, while watching
+the progress that Postgres reports in pg_stat_progress_create_index.
+
+Usage (from services/ingestion-worker):
+    python -m scripts.build_vector_index
+    HNSW_INDEX_COLUMNS='["embedding_half"]' python -m scripts.build_vector_index
+"""
+
+import argparse
+import asyncio
+from sqlalchemy import text
+from app.database import AsyncSessionLocal, init_db
+from app.vector_index import vector_index_manager
+
+
+async def report_progress(interval: float):
+    """Print the phase and block/tuple progress of running index builds."""
+    while True:
+        await asyncio.sleep(interval)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(text("""
+                SELECT c.relname, p.phase, p.blocks_done, p.blocks_total, p.tuples_done, p.tuples_total
+                FROM pg_stat_progress_create_index p JOIN pg_class c ON c.oid = p.index_relid
+            """))).fetchall()
+        for name, phase, blocks_done, blocks_total, tuples_done, tuples_total in rows:
+            print(f"{name}: {phase} (blocks {blocks_done}/{blocks_total}, tuples {tuples_done}/{tuples_total})")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--progress-interval", type=float, default=30.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+
+    await init_db()
+    progress = asyncio.create_task(report_progress(args.progress_interval))
+    try:
+        results = await vector_index_manager.ensure()
+    finally:
+        progress.cancel()
+    for name, result in results.items():
+        print(f"{name}: {result}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+# FILE: services/ingestion-worker/tests/test_chunker.py
+
+"""NativeTextSplitter must return exactly what RecursiveCharacterTextSplitter returns."""
+
+import random
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.chunker import NativeTextSplitter, SEPARATORS
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog lorem ipsum dolor sit amet "
+    "consectetur adipiscing elit sed do eiusmod tempor incididunt labore"
+).split()
+
+# (chunk_size, chunk_overlap) pairs, including the service default
+CONFIGS = [(1000, 200), (200, 50), (100, 0), (50, 49), (37, 10), (10, 3)]
+
+
+def random_text(rng: random.Random, length: int) -> str:
+    """Text mixing all separators, stray whitespace and long unbroken runs."""
+    parts = []
+    size = 0
+    while size < length:
+        roll = rng.random()
+        if roll < 0.70:
+            part = rng.choice(WORDS)
+        elif roll < 0.80:
+            part = ". "
+        elif roll < 0.88:
+            part = "\n"
+        elif roll < 0.94:
+            part = "\n\n"
+        elif roll < 0.97:
+            part = rng.choice(["  ", "\n\n\n", " \n ", "\t"])
+        else:
+            part = "x" * rng.randint(20, 1500)
+        parts.append(part)
+        parts.append(" " if rng.random() < 0.8 else "")
+        size += len(part) + 1
+    return "".join(parts)
+
+
+def assert_matches_langchain(text: str, chunk_size: int, chunk_overlap: int):
+    expected = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=SEPARATORS
+    ).split_text(text)
+    native = NativeTextSplitter(chunk_size, chunk_overlap, SEPARATORS)
+    assert native.split_text(text) == expected
+    for start, chunk in native.iter_chunks(text):
+        assert text.startswith(chunk, start)
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", CONFIGS)
+def test_random_documents_match_langchain(chunk_size, chunk_overlap):
+    rng = random.Random(chunk_size * 1000 + chunk_overlap)
+    for _ in range(40):
+        assert_matches_langchain(random_text(rng, rng.randint(0, 4000)), chunk_size, chunk_overlap)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   \n\n\t ",
+    "short",
+    "x" * 100,  # Exactly one chunk
+    "x" * 101,  # One character over
+    "word " * 20,
+    "  leading and trailing whitespace  ",
+    "\n\n".join(["paragraph"] * 30),
+])
+def test_boundaries_match_langchain(text):
+    assert_matches_langchain(text, 100, 20)
+
+
+def test_overlap_repeats_the_end_of_the_previous_chunk():
+    text = " ".join(f"w{index:02d}" for index in range(60))
+    chunks = NativeTextSplitter(40, 15, SEPARATORS).split_text(text)
+    assert len(chunks) > 1
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[0] in previous.split()
+    assert_matches_langchain(text, 40, 15)
+
+
+def test_falls_back_to_characters_for_unbroken_runs():
+    text = "intro. " + "y" * 250 + "\n\n" + "z" * 45
+    chunks = NativeTextSplitter(50, 0, SEPARATORS).split_text(text)
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert "".join(chunk for chunk in chunks if set(chunk) == {"y"}) == "y" * 250
+    assert_matches_langchain(text, 50, 0)
+    assert_matches_langchain(text, 50, 10)
+
+
+def test_offsets_point_at_each_chunk():
+    text = random_text(random.Random(3), 20000)
+    native = NativeTextSplitter(300, 60, SEPARATORS)
+    offsets = [start for start, _ in native.iter_chunks(text)]
+    assert offsets == sorted(offsets)
+    for start, chunk in native.iter_chunks(text):
+        assert text[start:start + len(chunk)] == chunk
@@ -44,13 +44,25 @@ class RedisCache:
         param_hash = hashlib.sha256(sorted_params.encode()).hexdigest()[:16]
         return f"{prefix}:{param_hash}"
 
-    async def get_embedding(self, text: str, model: str) -> Optional[list[float]]:
+    def _embedding_key(self, text: str, model: str, dimensions: Optional[int]) -> str:
+        """Cache key of an embedding; full-size keys are unchanged from before dimensions existed."""
+        if dimensions:
+            return self._generate_cache_key("embedding", text=text, model=model, dimensions=dimensions)
+        return self._generate_cache_key("embedding", text=text, model=model)
+
+    async def get_embedding(
+        self,
+        text: str,
+        model: str,
+        dimensions: Optional[int] = None
+    ) -> Optional[list[float]]:
         """
         Retrieve cached embedding for text.
 
         Args:
             text: Input text
             model: Embedding model name
+            dimensions: Requested embedding dimensions (None for full size)
 
         Returns:
             Cached embedding vector or None if not found
@@ -59,11 +71,7 @@ class RedisCache:
             return None
 
         try:
-            cache_key = self._generate_cache_key(
-                "embedding",
-                text=text,
-                model=model
-            )
+            cache_key = self._embedding_key(text, model, dimensions)
 
             cached = await self.redis_client.get(cache_key)
             if cached:
@@ -74,7 +82,13 @@ class RedisCache:
             print(f"Cache get error: {e}")
             return None
 
-    async def set_embedding(self, text: str, model: str, embedding: list[float]) -> bool:
+    async def set_embedding(
+        self,
+        text: str,
+        model: str,
+        embedding: list[float],
+        dimensions: Optional[int] = None
+    ) -> bool:
         """
         Cache embedding for text.
 
@@ -82,6 +96,7 @@ class RedisCache:
             text: Input text
             model: Embedding model name
             embedding: Embedding vector to cache
+            dimensions: Requested embedding dimensions (None for full size)
 
         Returns:
             True if successful, False otherwise
@@ -90,11 +105,7 @@ class RedisCache:
             return False
 
         try:
-            cache_key = self._generate_cache_key(
-                "embedding",
-                text=text,
-                model=model
-            )
+            cache_key = self._embedding_key(text, model, dimensions)
 
             await self.redis_client.setex(
                 cache_key,
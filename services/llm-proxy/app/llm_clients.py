@@ -65,7 +65,8 @@ class OpenAIClient:
     async def create_embeddings(
         self,
         texts: List[str],
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        dimensions: Optional[int] = None
     ) -> List[List[float]]:
         """
         Generate embeddings using OpenAI API.
@@ -73,6 +74,8 @@ class OpenAIClient:
         Args:
             texts: List of text strings to embed
             model: Embedding model name
+            dimensions: Shorten embeddings to this many dimensions (the
+                Matryoshka prefix, re-normalized); full size if None
 
         Returns:
             List of embedding vectors
@@ -81,9 +84,11 @@ class OpenAIClient:
             raise ValueError("OpenAI API key not configured")
 
         try:
+            kwargs = {"dimensions": dimensions} if dimensions else {}
             response = await self.client.embeddings.create(
                 model=model or settings.DEFAULT_EMBEDDING_MODEL,
-                input=texts
+                input=texts,
+                **kwargs
             )
 
             return [item.embedding for item in response.data]
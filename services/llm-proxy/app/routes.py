@@ -1,6 +1,7 @@
 # FILE: services/llm-proxy/app/routes.py
 
 from fastapi import APIRouter, HTTPException, status
+from openai import BadRequestError
 from app.schemas import (
     ChatCompletionRequest,
     ChatCompletionResponse,
@@ -120,39 +121,49 @@ async def create_embeddings(request: EmbeddingRequest):
     Generate embeddings for text using OpenAI.
 
     Currently only supports OpenAI embedding models.
-    Embeddings are cached for performance.
+    Embeddings are cached for performance, separately per requested dimensions.
     """
     try:
         model = request.model or settings.DEFAULT_EMBEDDING_MODEL
-        embeddings = []
+        embeddings = [None] * len(request.texts)
         cache_hits = 0
+        missing = []
 
         # Check cache for each text
-        for text in request.texts:
-            cached_embedding = await cache.get_embedding(text=text, model=model)
+        for index, text in enumerate(request.texts):
+            cached_embedding = await cache.get_embedding(
+                text=text, model=model, dimensions=request.dimensions
+            )
             if cached_embedding:
-                embeddings.append(cached_embedding)
+                embeddings[index] = cached_embedding
                 cache_hits += 1
             else:
-                # Generate embedding via API
-                text_embeddings = await openai_client.create_embeddings(
-                    texts=[text],
-                    model=model
-                )
-                embedding = text_embeddings[0]
-                embeddings.append(embedding)
+                missing.append(index)
+
+        # Generate all cache misses in a single API call
+        if missing:
+            generated = await openai_client.create_embeddings(
+                texts=[request.texts[index] for index in missing],
+                model=model,
+                dimensions=request.dimensions
+            )
+            for index, embedding in zip(missing, generated):
+                embeddings[index] = embedding
 
                 # Cache the embedding
-                await cache.set_embedding(text=text, model=model, embedding=embedding)
+                await cache.set_embedding(
+                    text=request.texts[index], model=model, embedding=embedding, dimensions=request.dimensions
+                )
 
         return EmbeddingResponse(
             embeddings=embeddings,
             model=model,
+            dimensions=request.dimensions,
             num_embeddings=len(embeddings),
             cache_hits=cache_hits
         )
 
-    except ValueError as e:
+    except (ValueError, BadRequestError) as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -33,11 +33,17 @@ class EmbeddingRequest(BaseModel):
     """Request schema for embeddings."""
     texts: List[str] = Field(..., description="List of texts to embed")
     model: Optional[str] = Field(None, description="Embedding model name")
+    dimensions: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Shorten embeddings to this many dimensions (text-embedding-3 models only)"
+    )
 
 
 class EmbeddingResponse(BaseModel):
     """Response schema for embeddings."""
     embeddings: List[List[float]]
     model: str
+    dimensions: Optional[int] = Field(None, description="Requested embedding dimensions, if shortened")
     num_embeddings: int
     cache_hits: int = Field(0, description="Number of embeddings served from cache")
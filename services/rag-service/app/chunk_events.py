@@ -0,0 +1,80 @@
+# FILE: services/rag-service/app/chunk_events.py
+
+import asyncio
+from typing import Callable, List, Optional, Tuple
+import redis.asyncio as redis
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+ChangeHandler = Callable[[str], None]
+ResetHandler = Callable[[], None]
+
+
+class ChunkEventListener:
+    """
+    Subscriber to the chunk change announcements on CHUNK_EVENTS_CHANNEL.
+
+    The ingestion worker publishes a user ID after every document job and
+    the document service after every delete. Each message is passed to the
+    registered change handlers; when the subscription breaks (and messages
+    may have been missed) the reset handlers run instead.
+    """
+
+    def __init__(self):
+        self._handlers: List[Tuple[ChangeHandler, ResetHandler]] = []
+        self._redis: Optional[redis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, on_change: ChangeHandler, on_reset: ResetHandler):
+        """
+        Register handlers; call before connect.
+
+        Args:
+            on_change: Called with the user ID of every announcement
+            on_reset: Called when announcements may have been missed
+        """
+        self._handlers.append((on_change, on_reset))
+
+    async def connect(self):
+        """Start listening if anything subscribed."""
+        if not self._handlers or self._listener is not None:
+            return
+        self._redis = await redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def disconnect(self):
+        """Stop listening."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def _listen(self):
+        """Dispatch announcements; resubscribe after connection errors."""
+        while True:
+            try:
+                pubsub = self._redis.pubsub()
+                await pubsub.subscribe(settings.CHUNK_EVENTS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        for on_change, _ in self._handlers:
+                            on_change(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Chunk event subscription failed, retrying: {e}")
+                for _, on_reset in self._handlers:
+                    on_reset()
+                await asyncio.sleep(5)
+
+
+# Singleton instance
+chunk_events = ChunkEventListener()
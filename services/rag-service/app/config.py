@@ -1,7 +1,7 @@
 # FILE: services/rag-service/app/config.py
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -28,6 +28,51 @@ class Settings(BaseSettings):
     TOP_K_RESULTS: int = 5
     SIMILARITY_THRESHOLD: float = 0.7
     MAX_CONTEXT_LENGTH: int = 4000
+    # Embedding column searched: vector (fp32, cosine distance) or
+    # halfvec (unit-normalized fp16 embedding_half, inner product)
+    VECTOR_STORAGE: str = "vector"
+    # Search the reduced-dimension column (embedding_reduced) with this many
+    # dimensions; 0 searches the full column
+    SEARCH_DIMENSIONS: int = 0
+    # Re-rank this many reduced-dimension candidates by the full column; 0 = off
+    RESCORE_CANDIDATES: int = 0
+    # Two-stage binary search: take this many candidates by Hamming distance
+    # from embedding_bits (needs EMBEDDING_BINARY on the ingestion workers)
+    # and re-rank them by the full column; 0 = off, overrides the reduced tier
+    BINARY_SEARCH_CANDIDATES: int = 0
+    # HNSW candidate list size (hnsw.ef_search) per search quality: higher is
+    # better recall and slower; raised to the number of rows requested if lower
+    HNSW_EF_SEARCH: Dict[str, int] = {"fast": 20, "balanced": 40, "accurate": 200}
+    DEFAULT_SEARCH_QUALITY: str = "balanced"
+
+    # Search strategy planner
+    EXACT_SEARCH_MAX_CHUNKS: int = 20000  # Exact scan at or below this many chunks
+    PLANNER_CACHE_TTL_SECONDS: int = 300  # Chunk counts and partial index list
+    HNSW_ITERATIVE_SCAN: str = "relaxed_order"  # off, relaxed_order, strict_order (pgvector 0.8+)
+    HNSW_MAX_SCAN_TUPLES: int = 20000
+
+    # In-process brute-force search for large tenants (see hot_tenant_cache.py)
+    HOT_TENANT_CACHE_ENABLED: bool = False
+    HOT_TENANT_CACHE_MB: int = 1024  # Memory budget for cached embedding matrices
+    HOT_TENANT_CACHE_TTL_SECONDS: int = 3600
+    HOT_TENANT_MIN_CHUNKS: int = 20000  # Smaller tenants are served by the exact SQL scan
+    HOT_TENANT_USERS: List[str] = []  # Always cached when they fit, whatever their size
+    CHUNK_EVENTS_CHANNEL: str = "chunks:changed"  # Published by ingestion-worker and document-service
+
+    # Vector search backend for large tenants: pgvector (HNSW) or ivfpq
+    # (per-tenant IVF-PQ shards on local disk, see ivfpq_shards.py)
+    VECTOR_SEARCH_BACKEND: str = "pgvector"
+    IVFPQ_DIR: str = "/var/lib/rag/ivfpq"
+    IVFPQ_MIN_CHUNKS: int = 20000  # Smaller tenants are served by the exact SQL scan
+    IVFPQ_LISTS: int = 0  # Coarse lists per shard; 0 = 4 * sqrt(chunks)
+    IVFPQ_SUBQUANTIZERS: int = 96  # Bytes per PQ code; must divide 1536
+    IVFPQ_TRAIN_SAMPLE: int = 30000
+    IVFPQ_TRAIN_ITERATIONS: int = 10
+    # Lists scanned per search quality, and candidates re-scored exactly in Postgres
+    IVFPQ_NPROBE: Dict[str, int] = {"fast": 8, "balanced": 16, "accurate": 48}
+    IVFPQ_RESCORE_CANDIDATES: int = 200
+    # Retrain once new, appended and deleted chunks exceed this fraction of a shard
+    IVFPQ_REBUILD_FRACTION: float = 0.2
 
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
@@ -0,0 +1,246 @@
+# FILE: services/rag-service/app/hot_tenant_cache.py
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import text
+from app.database import AsyncSessionLocal
+from app.chunk_events import chunk_events
+from app.config import settings
+from app.metrics import hot_tenant_cache_bytes, hot_tenant_cache_events_total, hot_tenant_cache_tenants
+import logging
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 1536
+FETCH_BATCH = 1000  # Rows fetched and parsed at a time while loading (~17 MB of vector text)
+ROW_BYTES = DIMENSIONS * 4 + 2 * np.dtype(object).itemsize  # TenantMatrix.nbytes per chunk
+
+
+class TenantMatrix(NamedTuple):
+    """Unit-normalized embeddings of one tenant, one row per chunk."""
+
+    chunk_ids: np.ndarray  # object array of chunk IDs
+    document_ids: np.ndarray  # object array of document IDs
+    matrix: np.ndarray  # float32, C-contiguous, shape (chunks, dimensions)
+    loaded_at: float
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + self.chunk_ids.nbytes + self.document_ids.nbytes
+
+
+class HotTenantCache:
+    """
+    In-process brute-force vector search for tenants whose corpus fits in RAM.
+
+    A tenant with at least HOT_TENANT_MIN_CHUNKS chunks (or one listed in
+    HOT_TENANT_USERS) has its full-dimension embeddings loaded, unit
+    normalized, into one float32 matrix; a query is then one matrix-vector
+    product and an argpartition, exact and without a pgvector scan. Only
+    the texts of the top-k chunks are fetched from Postgres, by primary key.
+
+    Matrices are loaded in the background on the first search that misses,
+    which itself takes the SQL path. Rows are streamed into a preallocated
+    matrix, and room for it is made before loading by evicting tenants
+    least recently used first, so cached and loading matrices together
+    stay within HOT_TENANT_CACHE_MB. Tenants are dropped when the ingestion
+    worker or document service announce changed chunks on the
+    CHUNK_EVENTS_CHANNEL pub/sub channel, or when older than
+    HOT_TENANT_CACHE_TTL_SECONDS (in case an announcement was missed).
+    """
+
+    def __init__(self):
+        self.enabled = settings.HOT_TENANT_CACHE_ENABLED
+        self.budget = settings.HOT_TENANT_CACHE_MB * 1024 * 1024
+        self.ttl = settings.HOT_TENANT_CACHE_TTL_SECONDS
+        self.min_chunks = settings.HOT_TENANT_MIN_CHUNKS
+        self.users = set(settings.HOT_TENANT_USERS)
+        self._tenants: "OrderedDict[str, TenantMatrix]" = OrderedDict()
+        self._generation: Dict[str, int] = {}
+        self._loading: Set[str] = set()
+        self._bytes = 0
+        self._reserved = 0  # Budget held by loads in flight
+
+    def start(self):
+        """Subscribe to chunk change announcements (see ChunkEventListener)."""
+        if self.enabled:
+            chunk_events.subscribe(self.invalidate, self.clear)
+
+    def clear(self):
+        """Drop every matrix."""
+        for user_id in list(self._tenants):
+            self._drop(user_id)
+
+    def _drop(self, user_id: str):
+        tenant = self._tenants.pop(user_id, None)
+        if tenant is not None:
+            self._bytes -= tenant.nbytes
+            hot_tenant_cache_bytes.set(self._bytes)
+            hot_tenant_cache_tenants.set(len(self._tenants))
+
+    def invalidate(self, user_id: str):
+        """Drop a tenant's matrix and discard any load of it still in flight."""
+        self._generation[user_id] = self._generation.get(user_id, 0) + 1
+        if user_id in self._tenants:
+            self._drop(user_id)
+            hot_tenant_cache_events_total.labels(event="invalidate").inc()
+
+    def wants(self, user_id: str, chunks: int) -> bool:
+        """Whether a tenant of this size should be cached."""
+        if not self.enabled or chunks * DIMENSIONS * 4 > self.budget:
+            return False
+        return user_id in self.users or chunks >= self.min_chunks
+
+    def get(self, user_id: str) -> Optional[TenantMatrix]:
+        """A tenant's fresh matrix, marked as recently used, or None."""
+        tenant = self._tenants.get(user_id)
+        if tenant is None:
+            return None
+        if time.monotonic() - tenant.loaded_at > self.ttl:
+            self._drop(user_id)
+            return None
+        self._tenants.move_to_end(user_id)
+        return tenant
+
+    def schedule_load(self, user_id: str, full_column: str):
+        """Load a tenant's matrix in the background, once at a time per tenant."""
+        if user_id in self._loading:
+            return
+        self._loading.add(user_id)
+        hot_tenant_cache_events_total.labels(event="miss").inc()
+        asyncio.create_task(self._load(user_id, full_column))
+
+    def _reserve(self, user_id: str, nbytes: int) -> bool:
+        """
+        Hold budget for a load, evicting least recently used tenants as needed.
+
+        Args:
+            user_id: Tenant being loaded (its current matrix is dropped)
+            nbytes: Size of the matrix to load
+
+        Returns:
+            False if it cannot fit next to the loads already in flight
+        """
+        self._drop(user_id)
+        if self._reserved + nbytes > self.budget:
+            return False
+        while self._tenants and self._bytes + self._reserved + nbytes > self.budget:
+            evicted = next(iter(self._tenants))
+            self._drop(evicted)
+            hot_tenant_cache_events_total.labels(event="evict").inc()
+        self._reserved += nbytes
+        return True
+
+    async def _load(self, user_id: str, full_column: str):
+        generation = self._generation.get(user_id, 0)
+        reserved = 0
+        try:
+            started = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                chunks = (await db.execute(text(f"""
+                    SELECT count(*) FROM document_chunks
+                    WHERE user_id = :user_id AND {full_column} IS NOT NULL
+                """), {"user_id": user_id})).scalar()
+                if not chunks or not self._reserve(user_id, chunks * ROW_BYTES):
+                    return
+                reserved = chunks * ROW_BYTES
+
+                matrix = np.empty((chunks, DIMENSIONS), dtype=np.float32)
+                chunk_ids, document_ids = [], []
+                result = await db.stream(text(f"""
+                    SELECT id, document_id, {full_column}::vector::text
+                    FROM document_chunks
+                    WHERE user_id = :user_id AND {full_column} IS NOT NULL
+                """), {"user_id": user_id})
+                async for batch in result.partitions(FETCH_BATCH):
+                    if len(chunk_ids) + len(batch) > chunks:
+                        return  # Chunks added since counting; the next search retries
+                    await asyncio.to_thread(self._parse, matrix, len(chunk_ids), batch)
+                    chunk_ids.extend(row[0] for row in batch)
+                    document_ids.extend(row[1] for row in batch)
+
+            if self._generation.get(user_id, 0) != generation or not chunk_ids:
+                return  # Chunks changed while loading, or nothing to cache
+            tenant = await asyncio.to_thread(self._build, chunk_ids, document_ids, matrix)
+
+            self._drop(user_id)
+            self._tenants[user_id] = tenant
+            self._bytes += tenant.nbytes
+            hot_tenant_cache_bytes.set(self._bytes)
+            hot_tenant_cache_tenants.set(len(self._tenants))
+            hot_tenant_cache_events_total.labels(event="load").inc()
+            logger.info(
+                f"Cached {len(chunk_ids)} embeddings of user {user_id} "
+                f"({tenant.nbytes / 1e6:.1f} MB) in {time.perf_counter() - started:.2f}s"
+            )
+        except Exception as e:
+            logger.warning(f"Loading hot tenant {user_id} failed: {e}")
+        finally:
+            self._reserved -= reserved
+            self._loading.discard(user_id)
+
+    @staticmethod
+    def _parse(matrix: np.ndarray, offset: int, rows):
+        """Parse the pgvector text of fetched rows into matrix rows from `offset`."""
+        for index, row in enumerate(rows, offset):
+            matrix[index] = np.fromstring(row[2][1:-1], dtype=np.float32, sep=",")
+
+    @staticmethod
+    def _build(chunk_ids: List[str], document_ids: List[str], matrix: np.ndarray) -> TenantMatrix:
+        """Normalize a filled matrix in place into a tenant matrix."""
+        if len(chunk_ids) < len(matrix):
+            matrix = matrix[:len(chunk_ids)].copy()  # Chunks deleted since counting
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        return TenantMatrix(
+            chunk_ids=np.array(chunk_ids, dtype=object),
+            document_ids=np.array(document_ids, dtype=object),
+            matrix=matrix,
+            loaded_at=time.monotonic()
+        )
+
+    def search(
+        self,
+        user_id: str,
+        query_embedding: List[float],
+        top_k: int,
+        document_ids: Optional[List[str]] = None
+    ) -> Optional[List[Tuple[str, float]]]:
+        """
+        Exact top-k by cosine similarity over a cached tenant.
+
+        Args:
+            user_id: User ID
+            query_embedding: Full-dimension query embedding
+            top_k: Number of results
+            document_ids: Optional document filter
+
+        Returns:
+            (chunk_id, similarity) pairs, best first, or None if the tenant is not cached
+        """
+        tenant = self.get(user_id)
+        if tenant is None or len(query_embedding) != tenant.matrix.shape[1]:
+            return None
+        hot_tenant_cache_events_total.labels(event="hit").inc()
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = tenant.matrix @ query
+        if document_ids:
+            scores = np.where(np.isin(tenant.document_ids, document_ids), scores, -np.inf)
+
+        k = min(top_k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            (tenant.chunk_ids[index], float(scores[index]))
+            for index in best
+            if np.isfinite(scores[index])
+        ]
+
+
+# Singleton instance
+hot_tenant_cache = HotTenantCache()
@@ -0,0 +1,202 @@
+# FILE: services/rag-service/app/ivfpq.py
+
+from typing import Optional, Tuple
+import numpy as np
+
+CODEBOOK_SIZE = 256  # 8-bit codes, one byte per subquantizer
+ASSIGN_BATCH = 8192  # Rows per distance matrix while assigning
+
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    """Rows scaled to unit length (zero rows are left as they are)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray, spherical: bool = False) -> np.ndarray:
+    """
+    Nearest centroid of each row.
+
+    Args:
+        vectors: float32 rows
+        centroids: float32 centroids
+        spherical: Largest inner product (unit vectors) instead of smallest L2 distance
+
+    Returns:
+        int32 centroid index per row
+    """
+    labels = np.empty(len(vectors), dtype=np.int32)
+    squared = None if spherical else np.einsum("ij,ij->i", centroids, centroids)
+    for start in range(0, len(vectors), ASSIGN_BATCH):
+        scores = vectors[start:start + ASSIGN_BATCH] @ centroids.T
+        if spherical:
+            labels[start:start + ASSIGN_BATCH] = np.argmax(scores, axis=1)
+        else:
+            # |x - c|^2 without the |x|^2 term, which does not change the argmin
+            labels[start:start + ASSIGN_BATCH] = np.argmin(squared - 2 * scores, axis=1)
+    return labels
+
+
+def kmeans(
+    vectors: np.ndarray,
+    k: int,
+    iterations: int = 10,
+    spherical: bool = False,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Lloyd's k-means.
+
+    Args:
+        vectors: float32 training rows (at least k)
+        k: Number of centroids
+        iterations: Assignment/update rounds
+        spherical: Cluster unit vectors by inner product, keeping centroids unit length
+        seed: Random seed for initialization and empty-cluster reseeding
+
+    Returns:
+        float32 centroids, shape (k, dimensions)
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = assign(vectors, centroids, spherical)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=k)
+        present = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+        sums = np.add.reduceat(vectors[order], starts, axis=0)
+        centroids[present] = sums / counts[present, None]
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        if spherical:
+            centroids = unit(centroids)
+    return centroids.astype(np.float32)
+
+
+class IvfPq:
+    """
+    Inverted file with product-quantized residuals, for unit vectors.
+
+    Coarse centroids split the vectors into lists (spherical k-means); the
+    residual of each vector from its list centroid is cut into
+    `subquantizers` equal slices, each replaced by the index of its nearest
+    entry in that slice's 256-entry codebook. A vector is stored as one
+    byte per slice.
+
+    Scoring is asymmetric and by inner product: the query stays exact, so
+    q . x is approximated by q . centroid + sum of q_slice . codebook[code],
+    which needs one lookup table per query shared by every list.
+    """
+
+    def __init__(self, centroids: np.ndarray, codebooks: np.ndarray):
+        self.centroids = centroids  # (lists, dimensions)
+        self.codebooks = codebooks  # (subquantizers, CODEBOOK_SIZE, dimensions / subquantizers)
+
+    @property
+    def lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @property
+    def subquantizers(self) -> int:
+        return self.codebooks.shape[0]
+
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        lists: int,
+        subquantizers: int,
+        iterations: int = 10,
+        seed: int = 0
+    ) -> "IvfPq":
+        """
+        Train coarse centroids and residual codebooks.
+
+        Args:
+            vectors: Unit-normalized float32 training sample (at least CODEBOOK_SIZE and `lists` rows)
+            lists: Number of coarse centroids
+            subquantizers: Number of residual slices; must divide the dimensions
+            iterations: k-means rounds for both quantizers
+            seed: Random seed
+
+        Returns:
+            Trained index
+        """
+        dimensions = vectors.shape[1]
+        if dimensions % subquantizers:
+            raise ValueError(f"{subquantizers} subquantizers do not divide {dimensions} dimensions")
+        if len(vectors) < max(lists, CODEBOOK_SIZE):
+            raise ValueError(f"Need at least {max(lists, CODEBOOK_SIZE)} training vectors, got {len(vectors)}")
+
+        centroids = kmeans(vectors, lists, iterations, spherical=True, seed=seed)
+        residuals = vectors - centroids[assign(vectors, centroids, spherical=True)]
+        width = dimensions // subquantizers
+        codebooks = np.stack([
+            kmeans(
+                np.ascontiguousarray(residuals[:, part * width:(part + 1) * width]),
+                CODEBOOK_SIZE, iterations, seed=seed + part
+            )
+            for part in range(subquantizers)
+        ])
+        return cls(centroids, codebooks)
+
+    def encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        List and PQ code of each vector.
+
+        Args:
+            vectors: Unit-normalized float32 rows
+
+        Returns:
+            (int32 list per row, uint8 codes of shape (rows, subquantizers))
+        """
+        lists = assign(vectors, self.centroids, spherical=True)
+        residuals = vectors - self.centroids[lists]
+        width = self.codebooks.shape[2]
+        codes = np.empty((len(vectors), self.subquantizers), dtype=np.uint8)
+        for part in range(self.subquantizers):
+            codes[:, part] = assign(
+                np.ascontiguousarray(residuals[:, part * width:(part + 1) * width]),
+                self.codebooks[part]
+            )
+        return lists, codes
+
+    def tables(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Per-query scoring tables.
+
+        Args:
+            query: Unit-normalized float32 query
+
+        Returns:
+            (inner product with each coarse centroid,
+             inner product of each query slice with each codebook entry, shape (subquantizers, CODEBOOK_SIZE))
+        """
+        slices = query.reshape(self.subquantizers, -1)
+        return self.centroids @ query, np.einsum("mkd,md->mk", self.codebooks, slices)
+
+    @staticmethod
+    def score(table: np.ndarray, coarse: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Approximate inner products of rows given their coarse scores and codes."""
+        return coarse + table[np.arange(table.shape[0]), codes].sum(axis=1)
+
+    @staticmethod
+    def probe(coarse: np.ndarray, nprobe: int) -> np.ndarray:
+        """The `nprobe` lists whose centroids are closest to the query."""
+        nprobe = min(nprobe, len(coarse))
+        return np.argpartition(-coarse, nprobe - 1)[:nprobe]
+
+
+def top(scores: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices of the k highest scores (where `mask` is true), best first."""
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    return best[np.isfinite(scores[best])]
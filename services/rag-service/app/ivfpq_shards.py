@@ -0,0 +1,437 @@
+# FILE: services/rag-service/app/ivfpq_shards.py
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set
+import numpy as np
+from sqlalchemy import text
+from app.database import AsyncSessionLocal
+from app.chunk_events import chunk_events
+from app.config import settings
+from app.ivfpq import IvfPq, top, unit
+from app.metrics import ivfpq_shard_events_total, ivfpq_sync_duration_seconds
+import logging
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 1536
+SEARCH_BACKENDS = ("pgvector", "ivfpq")
+FETCH_BATCH = 10000  # Rows fetched and encoded at a time while building
+MIN_POINTS_PER_LIST = 39  # Training vectors per coarse centroid
+
+
+def row_keys(ids: np.ndarray, versions: np.ndarray) -> np.ndarray:
+    """Combine chunk IDs and row versions into one bytes key per row."""
+    return np.char.add(np.char.add(ids, b"@"), versions.astype("S20"))
+
+
+class Segment(NamedTuple):
+    """Encoded chunks, one row each."""
+
+    ids: np.ndarray  # Chunk IDs, fixed-width bytes
+    document_ids: np.ndarray  # Document IDs, fixed-width bytes
+    versions: np.ndarray  # int64 xmin of the row when it was encoded
+    lists: np.ndarray  # int32 coarse list
+    codes: np.ndarray  # uint8 PQ codes, shape (rows, subquantizers)
+
+    @classmethod
+    def empty(cls, subquantizers: int) -> "Segment":
+        return cls(
+            ids=np.empty(0, dtype="S1"),
+            document_ids=np.empty(0, dtype="S1"),
+            versions=np.empty(0, dtype=np.int64),
+            lists=np.empty(0, dtype=np.int32),
+            codes=np.empty((0, subquantizers), dtype=np.uint8)
+        )
+
+    def keys(self) -> np.ndarray:
+        """ID and row version of each row, as comparable fixed-width bytes."""
+        return row_keys(self.ids, self.versions)
+
+    @classmethod
+    def concat(cls, segments: List["Segment"]) -> "Segment":
+        return cls(*(np.concatenate(parts) for parts in zip(*segments)))
+
+    def take(self, rows: np.ndarray) -> "Segment":
+        return Segment(*(part[rows] for part in self))
+
+
+class IvfPqShard(NamedTuple):
+    """
+    One tenant's IVF-PQ index.
+
+    The base segment was encoded when the shard was built; it is sorted by
+    list (rows of list l are offsets[l]:offsets[l + 1]) and memory-mapped
+    from disk. Chunks added since are encoded with the same quantizers into
+    the small delta segment, kept in memory and saved next to the base.
+    `live` marks the base and delta rows whose chunk still exists in the
+    version that was encoded.
+    """
+
+    path: Path
+    column: str
+    index: IvfPq
+    base: Segment
+    offsets: np.ndarray
+    delta: Segment
+    live: np.ndarray  # bool, base rows then delta rows
+
+    def search(
+        self,
+        query: np.ndarray,
+        candidates: int,
+        nprobe: int,
+        document_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Chunk IDs with the highest approximate inner product, best first.
+
+        Args:
+            query: Unit-normalized float32 query
+            candidates: Number of IDs to return
+            nprobe: Number of coarse lists scanned
+            document_ids: Optional document filter
+
+        Returns:
+            Chunk IDs
+        """
+        coarse, table = self.index.tables(query)
+        probe = IvfPq.probe(coarse, nprobe)
+        base_rows = np.concatenate([
+            np.arange(self.offsets[part], self.offsets[part + 1]) for part in probe
+        ])
+        delta_rows = np.flatnonzero(np.isin(self.delta.lists, probe))
+        base = self.base.take(base_rows)
+        delta = self.delta.take(delta_rows)
+
+        scores = np.concatenate((
+            IvfPq.score(table, coarse[base.lists], base.codes),
+            IvfPq.score(table, coarse[delta.lists], delta.codes)
+        ))
+        mask = np.concatenate((self.live[base_rows], self.live[len(self.base.ids) + delta_rows]))
+        if document_ids:
+            wanted = np.array([document_id.encode() for document_id in document_ids])
+            mask &= np.isin(np.concatenate((base.document_ids, delta.document_ids)), wanted)
+        ids = np.concatenate((base.ids, delta.ids))
+        return [ids[row].decode() for row in top(scores, candidates, mask)]
+
+
+class IvfPqShardStore:
+    """
+    Per-tenant IVF-PQ index files on local disk, searched in process.
+
+    With VECTOR_SEARCH_BACKEND=ivfpq, tenants with at least
+    IVFPQ_MIN_CHUNKS chunks get a shard under IVFPQ_DIR, built in the
+    background on their first search (which, like any search before the
+    shard is ready, takes the SQL path). Each replica builds and keeps its
+    own shards, so search capacity grows with the number of replicas
+    instead of landing on Postgres; the retriever only re-scores the
+    shard's candidates exactly by primary key.
+
+    When chunks change (CHUNK_EVENTS_CHANNEL), the shard is synced: the
+    tenant's chunk IDs and row versions (xmin) are compared with the
+    shard's, new and rewritten chunks are encoded into the delta segment,
+    and deleted chunks and the old codes of rewritten ones are masked out.
+    Chunk IDs are deterministic, so a re-embedded chunk keeps its ID and is
+    only recognised by its row version. Once new, appended and dead rows
+    together exceed IVFPQ_REBUILD_FRACTION of the base, the shard is rebuilt (retrained) in a new version directory
+    and swapped in. Shards found on disk at startup are synced before use.
+    """
+
+    def __init__(self):
+        self.enabled = settings.VECTOR_SEARCH_BACKEND == "ivfpq"
+        self.root = Path(settings.IVFPQ_DIR)
+        self.subquantizers = settings.IVFPQ_SUBQUANTIZERS
+        if settings.VECTOR_SEARCH_BACKEND not in SEARCH_BACKENDS:
+            raise ValueError(
+                f"Unknown VECTOR_SEARCH_BACKEND '{settings.VECTOR_SEARCH_BACKEND}', expected one of {SEARCH_BACKENDS}"
+            )
+        if DIMENSIONS % self.subquantizers:
+            raise ValueError(f"IVFPQ_SUBQUANTIZERS must divide {DIMENSIONS}, got {self.subquantizers}")
+        self._shards: Dict[str, IvfPqShard] = {}
+        self._checked: Set[str] = set()  # Users whose directory has been looked at
+        self._dirty: Set[str] = set()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._builds = asyncio.Semaphore(1)  # One sync at a time per replica
+
+    def start(self):
+        """Subscribe to chunk change announcements (see ChunkEventListener)."""
+        if self.enabled:
+            self.root.mkdir(parents=True, exist_ok=True)
+            chunk_events.subscribe(self.on_change, self.on_reset)
+
+    async def stop(self):
+        """Cancel running syncs; a half-written version directory is ignored on open."""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    def wants(self, chunks: int) -> bool:
+        """Whether a tenant of this size should have a shard."""
+        return self.enabled and chunks >= settings.IVFPQ_MIN_CHUNKS
+
+    def tenant_dir(self, user_id: str) -> Path:
+        return self.root / hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:16]
+
+    def get(self, user_id: str, column: str) -> Optional[IvfPqShard]:
+        """A tenant's shard over `column`, opened from disk on first use, or None."""
+        if user_id not in self._shards and user_id not in self._checked:
+            self._checked.add(user_id)
+            shard = self._open(user_id)
+            if shard is not None:
+                self._shards[user_id] = shard
+                # Chunks may have changed while nothing was listening
+                self.schedule_sync(user_id, shard.column)
+        shard = self._shards.get(user_id)
+        return shard if shard is not None and shard.column == column else None
+
+    def schedule_sync(self, user_id: str, column: str):
+        """Build or update a tenant's shard in the background."""
+        if time.monotonic() < self._retry_at.get(user_id, 0):
+            return
+        self._dirty.add(user_id)
+        if user_id not in self._tasks:
+            self._tasks[user_id] = asyncio.create_task(self._sync_loop(user_id, column))
+
+    def on_change(self, user_id: str):
+        shard = self._shards.get(user_id)
+        if shard is not None:
+            self.schedule_sync(user_id, shard.column)
+        elif user_id in self._tasks:
+            # A first build is running and may have read the chunks before
+            # this change; its sync loop appends the difference afterwards
+            self._dirty.add(user_id)
+
+    def on_reset(self):
+        for user_id, shard in list(self._shards.items()):
+            self.schedule_sync(user_id, shard.column)
+        self._dirty.update(self._tasks)
+
+    async def search(
+        self,
+        user_id: str,
+        query_embedding: List[float],
+        candidates: int,
+        nprobe: int,
+        document_ids: Optional[List[str]] = None
+    ) -> Optional[List[str]]:
+        """
+        Approximate top candidates from a tenant's shard.
+
+        Args:
+            user_id: User ID
+            query_embedding: Full-dimension query embedding
+            candidates: Number of chunk IDs to return
+            nprobe: Number of coarse lists scanned
+            document_ids: Optional document filter
+
+        Returns:
+            Chunk IDs, best first, or None if the tenant has no shard
+        """
+        shard = self._shards.get(user_id)
+        if shard is None or len(query_embedding) != DIMENSIONS:
+            return None
+        ivfpq_shard_events_total.labels(event="hit").inc()
+        query = unit(np.asarray(query_embedding, dtype=np.float32))
+        return await asyncio.to_thread(shard.search, query, candidates, nprobe, document_ids)
+
+    async def _sync_loop(self, user_id: str, column: str):
+        try:
+            while user_id in self._dirty:
+                self._dirty.discard(user_id)
+                async with self._builds:
+                    await self._sync(user_id, column)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            ivfpq_shard_events_total.labels(event="failed").inc()
+            self._retry_at[user_id] = time.monotonic() + settings.PLANNER_CACHE_TTL_SECONDS
+            logger.warning(f"Syncing IVF-PQ shard of user {user_id} failed: {e}")
+        finally:
+            self._tasks.pop(user_id, None)
+
+    async def _sync(self, user_id: str, column: str):
+        """Append new chunks to a tenant's shard, or (re)build it."""
+        shard = self._shards.get(user_id)
+        if shard is None or shard.column != column:
+            await self._build(user_id, column)
+            return
+
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(text(f"""
+                SELECT id, xmin::text FROM document_chunks
+                WHERE user_id = :user_id AND {column} IS NOT NULL
+            """), {"user_id": user_id})
+            rows = result.fetchall()
+        current_ids = np.array([row[0].encode() for row in rows], dtype="S")
+        current = row_keys(current_ids, np.array([int(row[1]) for row in rows], dtype=np.int64))
+        known = np.concatenate((shard.base.keys(), shard.delta.keys()))
+        # Rows of deleted chunks and superseded codes of rewritten ones are dead
+        live = np.isin(known, current)
+        new_ids = current_ids[~np.isin(current, known)]
+        stale = len(new_ids) + len(shard.delta.ids) + int((~live).sum())
+        if stale > settings.IVFPQ_REBUILD_FRACTION * len(shard.base.ids):
+            await self._build(user_id, column)
+            return
+
+        delta = shard.delta
+        if len(new_ids):
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(text(f"""
+                    SELECT id, document_id, xmin::text, {column}::vector::text
+                    FROM document_chunks
+                    WHERE id = ANY(:ids) AND {column} IS NOT NULL
+                """), {"ids": [chunk_id.decode() for chunk_id in new_ids]})
+                rows = result.fetchall()
+            added = await asyncio.to_thread(self._encode, shard.index, rows)
+            delta = Segment.concat([delta, added])
+            live = np.concatenate((live, np.ones(len(added.ids), dtype=bool)))
+            await asyncio.to_thread(self._write_delta, shard.path, delta)
+            ivfpq_shard_events_total.labels(event="append").inc()
+            ivfpq_sync_duration_seconds.labels(operation="append").observe(time.perf_counter() - started)
+        self._shards[user_id] = shard._replace(delta=delta, live=live)
+
+    async def _build(self, user_id: str, column: str):
+        """Train, encode every chunk, write a new version directory and swap it in."""
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            chunks = (await db.execute(text(f"""
+                SELECT count(*) FROM document_chunks
+                WHERE user_id = :user_id AND {column} IS NOT NULL
+            """), {"user_id": user_id})).scalar()
+            result = await db.execute(text(f"""
+                SELECT {column}::vector::text FROM document_chunks
+                WHERE user_id = :user_id AND {column} IS NOT NULL
+                ORDER BY random() LIMIT :sample
+            """), {"user_id": user_id, "sample": settings.IVFPQ_TRAIN_SAMPLE})
+            sample = await asyncio.to_thread(self._parse, [row[0] for row in result])
+        lists = settings.IVFPQ_LISTS or int(4 * math.sqrt(chunks))
+        lists = max(1, min(lists, len(sample) // MIN_POINTS_PER_LIST))
+        index = await asyncio.to_thread(
+            IvfPq.train, sample, lists, self.subquantizers, settings.IVFPQ_TRAIN_ITERATIONS
+        )
+        del sample
+
+        segments = []
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(text(f"""
+                SELECT id, document_id, xmin::text, {column}::vector::text
+                FROM document_chunks
+                WHERE user_id = :user_id AND {column} IS NOT NULL
+            """), {"user_id": user_id})
+            async for batch in result.partitions(FETCH_BATCH):
+                segments.append(await asyncio.to_thread(self._encode, index, batch))
+        shard = await asyncio.to_thread(self._write, user_id, column, index, segments)
+        self._shards[user_id] = shard
+        self._checked.add(user_id)
+        ivfpq_shard_events_total.labels(event="build").inc()
+        ivfpq_sync_duration_seconds.labels(operation="build").observe(time.perf_counter() - started)
+        logger.info(
+            f"Built IVF-PQ shard of user {user_id}: {len(shard.base.ids)} chunks, {index.lists} lists, "
+            f"{index.subquantizers} bytes per code, in {time.perf_counter() - started:.1f}s"
+        )
+
+    @staticmethod
+    def _parse(texts: List[str]) -> np.ndarray:
+        """Unit-normalized float32 matrix from pgvector text values."""
+        matrix = np.empty((len(texts), DIMENSIONS), dtype=np.float32)
+        for index, value in enumerate(texts):
+            matrix[index] = np.fromstring(value[1:-1], dtype=np.float32, sep=",")
+        return unit(matrix)
+
+    def _encode(self, index: IvfPq, rows) -> Segment:
+        """Encode (id, document_id, xmin text, vector text) rows."""
+        if not rows:
+            return Segment.empty(self.subquantizers)
+        lists, codes = index.encode(self._parse([row[3] for row in rows]))
+        return Segment(
+            ids=np.array([row[0].encode() for row in rows]),
+            document_ids=np.array([row[1].encode() for row in rows]),
+            versions=np.array([int(row[2]) for row in rows], dtype=np.int64),
+            lists=lists,
+            codes=codes
+        )
+
+    def _write(self, user_id: str, column: str, index: IvfPq, segments: List[Segment]) -> IvfPqShard:
+        """Save a freshly built shard as a new version directory, remove older ones and open it."""
+        base = Segment.concat([Segment.empty(self.subquantizers), *segments])
+        base = base.take(np.argsort(base.lists, kind="stable"))
+        offsets = np.searchsorted(base.lists, np.arange(index.lists + 1)).astype(np.int64)
+
+        tenant = self.tenant_dir(user_id)
+        version = tenant / str(time.time_ns())
+        staging = version.with_suffix(".tmp")
+        staging.mkdir(parents=True)
+        arrays = {
+            "centroids": index.centroids, "codebooks": index.codebooks, "offsets": offsets,
+            "ids": base.ids, "document_ids": base.document_ids, "versions": base.versions,
+            "lists": base.lists, "codes": base.codes,
+        }
+        for name, array in arrays.items():
+            np.save(staging / f"{name}.npy", array)
+        # Written last: a directory without meta.json is incomplete
+        (staging / "meta.json").write_text(json.dumps({
+            "user_id": user_id, "column": column, "chunks": len(base.ids),
+            "lists": index.lists, "subquantizers": index.subquantizers,
+        }))
+        os.rename(staging, version)
+        for old in tenant.iterdir():
+            if old != version:
+                # Open memory maps of the old version stay valid after unlinking
+                shutil.rmtree(old, ignore_errors=True)
+        return self._load(version, column)
+
+    def _open(self, user_id: str) -> Optional[IvfPqShard]:
+        """The newest complete shard version of a tenant on disk."""
+        tenant = self.tenant_dir(user_id)
+        if not tenant.is_dir():
+            return None
+        for version in sorted(tenant.iterdir(), key=lambda path: path.name, reverse=True):
+            try:
+                meta = json.loads((version / "meta.json").read_text())
+                if meta["user_id"] == user_id and meta["subquantizers"] == self.subquantizers:
+                    return self._load(version, meta["column"])
+            except (OSError, ValueError, KeyError) as e:
+                logger.debug(f"Skipping IVF-PQ shard version {version}: {e}")
+        return None
+
+    def _load(self, version: Path, column: str) -> IvfPqShard:
+        def array(name: str) -> np.ndarray:
+            return np.load(version / f"{name}.npy", mmap_mode="r")
+
+        # Versions written before row versions were tracked lack versions.npy
+        # and are skipped by _open, so the tenant is rebuilt
+        base = Segment(*(array(name) for name in Segment._fields))
+        delta = Segment.empty(self.subquantizers)
+        if (version / "delta.npz").exists():
+            with np.load(version / "delta.npz") as saved:
+                delta = Segment(*(saved[name] for name in Segment._fields))
+        return IvfPqShard(
+            path=version,
+            column=column,
+            index=IvfPq(np.load(version / "centroids.npy"), np.load(version / "codebooks.npy")),
+            base=base,
+            offsets=np.load(version / "offsets.npy"),
+            delta=delta,
+            live=np.ones(len(base.ids) + len(delta.ids), dtype=bool)
+        )
+
+    @staticmethod
+    def _write_delta(version: Path, delta: Segment):
+        staging = version / "delta.npz.tmp"
+        with open(staging, "wb") as file:
+            np.savez(file, **delta._asdict())
+        os.replace(staging, version / "delta.npz")
+
+
+# Singleton instance
+ivfpq_shards = IvfPqShardStore()
@@ -5,6 +5,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.routes import router as rag_router
 from app.cache import cache
+from app.hot_tenant_cache import hot_tenant_cache
+from app.ivfpq_shards import ivfpq_shards
+from app.chunk_events import chunk_events
 from app.metrics import MetricsMiddleware
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
@@ -31,11 +34,17 @@ app.add_middleware(
 async def startup_event():
     """Initialize connections on startup."""
     await cache.connect()
+    hot_tenant_cache.start()
+    ivfpq_shards.start()
+    await chunk_events.connect()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close connections on shutdown."""
+    await chunk_events.disconnect()
+    await ivfpq_shards.stop()
+    hot_tenant_cache.clear()
     await cache.disconnect()
 
 
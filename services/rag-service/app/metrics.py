@@ -59,7 +59,45 @@ cache_misses_total = Counter(
 # Vector search metrics
 vector_search_duration_seconds = Histogram(
     'rag_vector_search_duration_seconds',
-    'Vector similarity search duration'
+    'Vector similarity search duration',
+    ['strategy']  # exact, partial_index, hnsw_iterative, hot_cache, ivfpq
+)
+
+vector_search_strategy_total = Counter(
+    'rag_vector_search_strategy_total',
+    'Vector searches by planned strategy',
+    ['strategy']  # none, exact, partial_index, hnsw_iterative, hot_cache, ivfpq
+)
+
+# Hot-tenant cache metrics
+hot_tenant_cache_events_total = Counter(
+    'rag_hot_tenant_cache_events_total',
+    'Hot-tenant cache events',
+    ['event']  # hit, miss, load, evict, invalidate
+)
+
+hot_tenant_cache_bytes = Gauge(
+    'rag_hot_tenant_cache_bytes',
+    'Memory held by cached tenant embedding matrices'
+)
+
+hot_tenant_cache_tenants = Gauge(
+    'rag_hot_tenant_cache_tenants',
+    'Tenants held in the hot-tenant cache'
+)
+
+# IVF-PQ shard metrics
+ivfpq_shard_events_total = Counter(
+    'rag_ivfpq_shard_events_total',
+    'IVF-PQ shard events',
+    ['event']  # hit, build, append, failed
+)
+
+ivfpq_sync_duration_seconds = Histogram(
+    'rag_ivfpq_sync_duration_seconds',
+    'IVF-PQ shard build and append duration',
+    ['operation'],  # build, append
+    buckets=[0.1, 0.5, 1, 5, 15, 60, 120, 300, 600, 1800]
 )
 
 vector_search_results = Histogram(
@@ -4,12 +4,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text
 from app.models import DocumentChunk
 from app.config import settings
+from app.metrics import vector_search_duration_seconds, vector_search_results, vector_search_strategy_total
+from app.search_planner import SearchPlan, search_planner
+from app.hot_tenant_cache import hot_tenant_cache
+from app.ivfpq_shards import ivfpq_shards
 import httpx
-from typing import List, Optional
+import math
+import time
+from typing import List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Largest hnsw.ef_search pgvector accepts; iterative scans go past it if needed
+HNSW_MAX_EF_SEARCH = 1000
+
 
 class VectorRetriever:
     """Retrieve relevant document chunks using vector similarity search."""
@@ -26,12 +35,16 @@ class VectorRetriever:
         """
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
+                payload = {
+                    "texts": [query],
+                    "model": "text-embedding-3-small"
+                }
+                if not self.full_query():
+                    # Only the reduced tier is searched, so the short vector is enough
+                    payload["dimensions"] = settings.SEARCH_DIMENSIONS
                 response = await client.post(
                     f"{settings.LLM_PROXY_URL}/llm/embeddings",
-                    json={
-                        "texts": [query],
-                        "model": "text-embedding-3-small"
-                    }
+                    json=payload
                 )
                 response.raise_for_status()
                 data = response.json()
@@ -40,33 +53,175 @@ class VectorRetriever:
             logger.error(f"Error generating query embedding: {e}")
             raise
 
+    @staticmethod
+    def _normalize(vector: List[float]) -> List[float]:
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    @staticmethod
+    def full_column() -> str:
+        """Full-dimension embedding column results are ranked by."""
+        return "embedding_half" if settings.VECTOR_STORAGE == "halfvec" else "embedding"
+
+    def index_column(self) -> str:
+        """Embedding column the ANN index is searched on."""
+        if settings.BINARY_SEARCH_CANDIDATES:
+            return "embedding_bits"
+        return "embedding_reduced" if settings.SEARCH_DIMENSIONS else self.full_column()
+
+    @staticmethod
+    def full_query() -> bool:
+        """Whether query embeddings are full-dimension (see generate_query_embedding)."""
+        if settings.BINARY_SEARCH_CANDIDATES:
+            return True
+        return not (settings.SEARCH_DIMENSIONS and not settings.RESCORE_CANDIDATES)
+
+    def _full_distance(self, query_embedding: List[float]) -> Tuple[str, str, str, str]:
+        """Full column, its distance and similarity SQL against :embedding, and the :embedding value."""
+        # Convert embedding to string format that pgvector expects: "[0.1,0.2,...]"
+        # Note: Use Python's str() on the list which creates proper format
+        if settings.VECTOR_STORAGE == "halfvec":
+            distance = "embedding_half <#> CAST(:embedding AS halfvec)"
+            return "embedding_half", distance, f"-({distance})", str(self._normalize(query_embedding))
+        distance = "embedding <=> CAST(:embedding AS vector)"
+        return "embedding", distance, f"1 - ({distance})", str(query_embedding)
+
+    async def plan_search(
+        self,
+        user_id: str,
+        document_ids: Optional[List[str]],
+        db: AsyncSession
+    ) -> SearchPlan:
+        """
+        Choose the search strategy for a user's query (see SearchPlanner).
+
+        Called before the query embedding is generated, so that users without
+        processed chunks skip the embedding call altogether.
+        """
+        plan = await search_planner.plan(
+            user_id, document_ids, db, self.full_column(), self.index_column()
+        )
+        if plan.strategy != "none" and self.full_query() and (hot_tenant_cache.enabled or ivfpq_shards.enabled):
+            full_column = self.full_column()
+            user_chunks = plan.chunks if not document_ids else await search_planner.count_chunks(
+                user_id, full_column, None, db
+            )
+            if hot_tenant_cache.get(user_id) is not None:
+                plan = SearchPlan("hot_cache", plan.chunks)
+            elif hot_tenant_cache.wants(user_id, user_chunks):
+                hot_tenant_cache.schedule_load(user_id, full_column)
+            if plan.strategy in ("partial_index", "hnsw_iterative") and ivfpq_shards.enabled:
+                if ivfpq_shards.get(user_id, full_column) is not None:
+                    plan = SearchPlan("ivfpq", plan.chunks)
+                elif ivfpq_shards.wants(user_chunks):
+                    ivfpq_shards.schedule_sync(user_id, full_column)
+        vector_search_strategy_total.labels(strategy=plan.strategy).inc()
+        logger.info(f"Search plan for user {user_id}: {plan.strategy} over {plan.chunks} chunks")
+        return plan
+
     async def search_similar_chunks(
         self,
         user_id: str,
         query_embedding: List[float],
         top_k: int = None,
         document_ids: Optional[List[str]] = None,
-        db: AsyncSession = None
+        search_quality: Optional[str] = None,
+        db: AsyncSession = None,
+        plan: Optional[SearchPlan] = None
     ) -> List[dict]:
         """
         Search for similar chunks using cosine similarity.
 
+        With VECTOR_STORAGE=halfvec the unit-normalized half-precision
+        column embedding_half is searched instead: the query is normalized
+        too, so the negative inner product distance (<#>) orders rows the
+        same way as cosine distance while scanning half the bytes.
+
+        With SEARCH_DIMENSIONS set, the reduced-dimension column
+        embedding_reduced (the re-normalized Matryoshka prefix of each
+        embedding) is searched with the same prefix of the query. With
+        RESCORE_CANDIDATES also set, that many candidates are taken from
+        the reduced column and re-ranked by the full-dimension column.
+
+        With BINARY_SEARCH_CANDIDATES set (which takes precedence over the
+        reduced tier), that many candidates are taken by Hamming distance
+        from embedding_bits, the bit(1536) sign quantization of each
+        embedding, against binary_quantize() of the query, and re-ranked by
+        exact similarity on the full-dimension column.
+
+        The search runs as the plan's strategy: an exact scan of the full
+        column with index scans disabled, the user's partial HNSW index, the
+        shared index with an iterative scan, the hot-tenant cache, or the
+        user's IVF-PQ shard, whose candidates are re-scored exactly.
+
         Args:
             user_id: User ID (for filtering)
             query_embedding: Query embedding vector
             top_k: Number of results to return
             document_ids: Optional list of document IDs to filter
+            search_quality: fast, balanced or accurate; sets hnsw.ef_search
+                for this transaction, or the lists an IVF-PQ search scans
+                (defaults to DEFAULT_SEARCH_QUALITY)
             db: Database session
+            plan: Search plan from plan_search (planned here if not given)
 
         Returns:
             List of similar chunks with similarity scores
         """
         top_k = top_k or settings.TOP_K_RESULTS
+        plan = plan or await self.plan_search(user_id, document_ids, db)
+        if plan.strategy == "none":
+            return []
+        if plan.strategy == "hot_cache":
+            started = time.perf_counter()
+            hits = hot_tenant_cache.search(user_id, query_embedding, top_k, document_ids)
+            if hits is not None:
+                rows = await self._fetch_chunks(hits, db)
+                vector_search_duration_seconds.labels(strategy=plan.strategy).observe(time.perf_counter() - started)
+                vector_search_results.observe(len(rows))
+                return self._filter_rows(rows)
+            # Evicted or invalidated since planning
+            plan = await search_planner.plan(
+                user_id, document_ids, db, self.full_column(), self.index_column()
+            )
+        if plan.strategy == "ivfpq":
+            started = time.perf_counter()
+            quality = search_quality or settings.DEFAULT_SEARCH_QUALITY
+            candidates = await ivfpq_shards.search(
+                user_id,
+                query_embedding,
+                max(top_k, settings.IVFPQ_RESCORE_CANDIDATES),
+                settings.IVFPQ_NPROBE[quality],
+                document_ids
+            )
+            if candidates is not None:
+                rows = await self._rescore(user_id, candidates, query_embedding, top_k, db)
+                vector_search_duration_seconds.labels(strategy=plan.strategy).observe(time.perf_counter() - started)
+                vector_search_results.observe(len(rows))
+                return self._filter_rows(rows)
+            plan = await search_planner.plan(
+                user_id, document_ids, db, self.full_column(), self.index_column()
+            )
+
+        # Small tenants are scanned exactly, so candidate stages only apply to index searches
+        binary = settings.BINARY_SEARCH_CANDIDATES if plan.strategy != "exact" else 0
+        dimensions = 0 if binary else settings.SEARCH_DIMENSIONS
+        if plan.strategy == "exact" and len(query_embedding) > dimensions:
+            # Small enough to rank every row by the full column
+            dimensions = 0
+        rescore = bool(dimensions and settings.RESCORE_CANDIDATES)
+        if rescore and len(query_embedding) <= dimensions:
+            logger.warning("Query embedding is already reduced, skipping full-dimension re-scoring")
+            rescore = False
 
         # Build query with pgvector cosine similarity
-        # Convert embedding to string format that pgvector expects: "[0.1,0.2,...]"
-        # Note: Use Python's str() on the list which creates proper format
-        embedding_str = str(query_embedding)
+        column, distance, similarity, embedding_str = self._full_distance(query_embedding)
+
+        user_filter = "user_id = :user_id"
+        if plan.strategy == "partial_index":
+            # A literal, so the planner can prove the partial index predicate
+            quoted = user_id.replace("'", "''")
+            user_filter = f"user_id = '{quoted}'"
 
         if document_ids:
             doc_filter = "AND document_id = ANY(:doc_ids)"
@@ -86,28 +241,145 @@ class VectorRetriever:
                 "threshold": settings.SIMILARITY_THRESHOLD
             }
 
-        query = text(f"""
-            SELECT
-                id,
-                document_id,
-                chunk_text,
-                chunk_index,
-                1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
-            FROM document_chunks
-            WHERE user_id = :user_id
-            {doc_filter}
-            AND embedding IS NOT NULL
-            ORDER BY embedding <=> CAST(:embedding AS vector)
-            LIMIT :top_k
-        """)
-
-        logger.info(f"Executing vector search query with params: user_id={user_id}, top_k={top_k}, threshold={settings.SIMILARITY_THRESHOLD}, doc_ids={document_ids}")
+        if dimensions:
+            params["reduced"] = str(self._normalize(query_embedding[:dimensions]))
+            # Same expression as the HNSW index on the reduced column
+            reduced_distance = (
+                f"(embedding_reduced::vector({dimensions})) <=> CAST(:reduced AS vector({dimensions}))"
+            )
+            if not rescore:
+                column, distance = "embedding_reduced", reduced_distance
+                similarity = f"1 - ({distance})"
+
+        if binary:
+            params["candidates"] = max(top_k, binary)
+            candidate_column = "embedding_bits"
+            # Same quantization as the writer: one bit per dimension, set where positive
+            candidate_distance = "embedding_bits <~> binary_quantize(CAST(:embedding AS vector))"
+        elif rescore:
+            params["candidates"] = max(top_k, settings.RESCORE_CANDIDATES)
+            candidate_column, candidate_distance = "embedding_reduced", reduced_distance
+
+        if binary or rescore:
+            query = text(f"""
+                WITH candidates AS (
+                    SELECT id
+                    FROM document_chunks
+                    WHERE {user_filter}
+                    {doc_filter}
+                    AND {candidate_column} IS NOT NULL
+                    ORDER BY {candidate_distance}
+                    LIMIT :candidates
+                )
+                SELECT
+                    id,
+                    document_id,
+                    chunk_text,
+                    chunk_index,
+                    {similarity} AS similarity
+                FROM document_chunks
+                WHERE id IN (SELECT id FROM candidates)
+                AND {column} IS NOT NULL
+                ORDER BY {distance}
+                LIMIT :top_k
+            """)
+        else:
+            query = text(f"""
+                SELECT
+                    id,
+                    document_id,
+                    chunk_text,
+                    chunk_index,
+                    {similarity} AS similarity
+                FROM document_chunks
+                WHERE {user_filter}
+                {doc_filter}
+                AND {column} IS NOT NULL
+                ORDER BY {distance}
+                LIMIT :top_k
+            """)
+
+        # Settings local to this transaction
+        if plan.strategy == "exact":
+            search_settings = {"enable_indexscan": "off"}
+        else:
+            # Rows the HNSW scan must produce: the candidate list bounds the result size
+            quality = search_quality or settings.DEFAULT_SEARCH_QUALITY
+            ef_search = max(settings.HNSW_EF_SEARCH[quality], params.get("candidates", top_k))
+            ef_search = min(ef_search, HNSW_MAX_EF_SEARCH)
+            search_settings = {"hnsw.ef_search": str(ef_search)}
+            if plan.strategy == "hnsw_iterative" and settings.HNSW_ITERATIVE_SCAN != "off":
+                search_settings["hnsw.iterative_scan"] = settings.HNSW_ITERATIVE_SCAN
+                search_settings["hnsw.max_scan_tuples"] = str(settings.HNSW_MAX_SCAN_TUPLES)
+        for name, value in search_settings.items():
+            await db.execute(
+                text("SELECT set_config(:name, :value, true)"),
+                {"name": name, "value": value}
+            )
+
+        logger.info(f"Executing vector search query with params: user_id={user_id}, top_k={top_k}, threshold={settings.SIMILARITY_THRESHOLD}, doc_ids={document_ids}, strategy={plan.strategy}")
 
+        started = time.perf_counter()
         result = await db.execute(query, params)
         rows = result.fetchall()
+        vector_search_duration_seconds.labels(strategy=plan.strategy).observe(time.perf_counter() - started)
+        vector_search_results.observe(len(rows))
 
         logger.info(f"Vector search returned {len(rows)} rows")
 
+        # relaxed_order iterative scans can return rows slightly out of order
+        rows.sort(key=lambda row: float(row[4]), reverse=True)
+        return self._filter_rows(rows)
+
+    async def _rescore(
+        self,
+        user_id: str,
+        candidates: List[str],
+        query_embedding: List[float],
+        top_k: int,
+        db: AsyncSession
+    ) -> List[tuple]:
+        """Rows of the top_k candidate chunks, ranked exactly by the full column."""
+        if not candidates:
+            return []
+        column, _, similarity, embedding_str = self._full_distance(query_embedding)
+        # Sorted here rather than with ORDER BY ... LIMIT, which could tempt
+        # the planner into an HNSW scan filtered by the IDs
+        result = await db.execute(
+            text(f"""
+                SELECT id, document_id, chunk_text, chunk_index, {similarity} AS similarity
+                FROM document_chunks
+                WHERE id = ANY(:ids) AND user_id = :user_id AND {column} IS NOT NULL
+            """),
+            {"ids": candidates, "user_id": user_id, "embedding": embedding_str}
+        )
+        rows = result.fetchall()
+        rows.sort(key=lambda row: float(row[4]), reverse=True)
+        return rows[:top_k]
+
+    @staticmethod
+    async def _fetch_chunks(hits: List[Tuple[str, float]], db: AsyncSession) -> List[tuple]:
+        """Rows of the chunks found by the hot-tenant cache, in hit order."""
+        if not hits:
+            return []
+        result = await db.execute(
+            text("""
+                SELECT id, document_id, chunk_text, chunk_index
+                FROM document_chunks
+                WHERE id = ANY(:ids)
+            """),
+            {"ids": [chunk_id for chunk_id, _ in hits]}
+        )
+        by_id = {row[0]: row for row in result.fetchall()}
+        return [
+            (*by_id[chunk_id], similarity)
+            for chunk_id, similarity in hits
+            if chunk_id in by_id
+        ]
+
+    @staticmethod
+    def _filter_rows(rows) -> List[dict]:
+        """Chunks of (id, document_id, text, index, similarity) rows that pass the similarity threshold."""
         chunks = []
         for row in rows:
             similarity = float(row[4])
@@ -27,11 +27,13 @@ async def ask_question(
 
     Steps:
     1. Check cache for previous identical query
-    2. Generate query embedding
-    3. Retrieve similar chunks via vector search
-    4. Build context from retrieved chunks
-    5. Generate answer using LLM with context
-    6. Cache the result
+    2. Plan the search (skipped entirely if the user has no chunks)
+    3. Generate query embedding
+    4. Retrieve similar chunks via vector search
+    5. Build context from retrieved chunks
+    6. Generate answer using LLM with context
+    7. Build the response
+    8. Cache the result
     """
     try:
         # 1. Check cache first
@@ -45,18 +47,31 @@ async def ask_question(
         if cached_result:
             logger.info("Returning cached result")
             return QuestionResponse(**cached_result, cached=True)
-        # 1. Generate query embedding
+
+        # 2. Plan the search; users without processed chunks skip the embedding call
+        plan = await vector_retriever.plan_search(current_user['id'], request.document_ids, db)
+        if plan.strategy == "none":
+            return QuestionResponse(
+                question=request.question,
+                answer="I couldn't find any relevant information in your documents to answer this question.",
+                retrieved_chunks=[],
+                total_chunks_found=0
+            )
+
+        # 3. Generate query embedding
         logger.info(f"Generating embedding for query: {request.question[:50]}...")
         query_embedding = await vector_retriever.generate_query_embedding(request.question)
 
-        # 2. Retrieve similar chunks
+        # 4. Retrieve similar chunks
         logger.info(f"Searching for similar chunks")
         similar_chunks = await vector_retriever.search_similar_chunks(
             user_id=current_user['id'],
             query_embedding=query_embedding,
             top_k=request.top_k,
             document_ids=request.document_ids,
-            db=db
+            search_quality=request.search_quality,
+            db=db,
+            plan=plan
         )
 
         if not similar_chunks:
@@ -67,7 +82,7 @@ async def ask_question(
                 total_chunks_found=0
             )
 
-        # 3. Build context from retrieved chunks
+        # 5. Build context from retrieved chunks
         context_parts = []
         total_length = 0
 
@@ -80,7 +95,7 @@ async def ask_question(
 
         context = "\n\n".join(context_parts)
 
-        # 4. Generate answer using LLM
+        # 6. Generate answer using LLM
         logger.info("Generating answer with LLM")
         system_prompt = """You are a helpful assistant that answers questions based on provided document context.
 Only use information from the context provided. If the context doesn't contain enough information to answer the question, say so.
@@ -106,7 +121,7 @@ Be concise and accurate."""
             llm_response = response.json()
             answer = llm_response["content"]
 
-        # 5. Build response
+        # 7. Build response
         retrieved_chunks_response = [
             RetrievedChunk(
                 chunk_id=chunk["chunk_id"],
@@ -126,7 +141,7 @@ Be concise and accurate."""
             cached=False
         )
 
-        # 6. Cache the result
+        # 8. Cache the result
         await cache.set_query_result(
             query=request.question,
             document_id=document_id_filter,
@@ -1,7 +1,7 @@
 # FILE: services/rag-service/app/schemas.py
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 
 class QuestionRequest(BaseModel):
@@ -9,6 +9,10 @@ class QuestionRequest(BaseModel):
     question: str = Field(..., min_length=1, description="Question to ask about documents")
     document_ids: Optional[List[str]] = Field(None, description="Limit search to specific documents")
     top_k: Optional[int] = Field(None, ge=1, le=20, description="Number of chunks to retrieve")
+    search_quality: Optional[Literal["fast", "balanced", "accurate"]] = Field(
+        None,
+        description="Vector search recall/latency trade-off (defaults to the service setting)"
+    )
 
 
 class RetrievedChunk(BaseModel):
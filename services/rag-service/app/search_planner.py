@@ -0,0 +1,134 @@
+# FILE: services/rag-service/app/search_planner.py
+
+import hashlib
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# hot_cache and ivfpq are chosen by the retriever when the tenant is held by
+# the hot-tenant cache or has an IVF-PQ shard
+SEARCH_STRATEGIES = ("none", "exact", "partial_index", "hnsw_iterative", "hot_cache", "ivfpq")
+
+
+def partial_index_name(column: str, user_id: str) -> str:
+    """
+    Name of the per-user HNSW index on a column.
+
+    Must match the ingestion worker's VectorIndexManager, which builds
+    these indexes for the users in HNSW_PARTIAL_INDEX_USERS.
+    """
+    digest = hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:12]
+    return f"ix_document_chunks_{column}_hnsw_u_{digest}"
+
+
+class SearchPlan(NamedTuple):
+    """How one vector search is executed."""
+
+    strategy: str  # One of SEARCH_STRATEGIES
+    chunks: int  # Searchable chunks in scope (user, or the requested documents)
+
+
+class SearchPlanner:
+    """
+    Choose how to run a user's vector search from the size of what it covers.
+
+    - none: the user (or the requested documents) has no embedded chunks, so
+      the query embedding and the search are skipped.
+    - exact: at most EXACT_SEARCH_MAX_CHUNKS chunks; index scans are turned
+      off so Postgres scans the user's rows and sorts them, which is exact
+      and, at this size, about as fast as the index.
+    - partial_index: the user has a dedicated HNSW index (built by the
+      ingestion worker with a WHERE user_id = ... predicate), so every
+      candidate the graph returns belongs to the user.
+    - hnsw_iterative: the shared HNSW index with pgvector's iterative scan,
+      which keeps walking the graph until enough rows pass the user filter
+      (without it, a global index returns at most ef_search rows before
+      filtering, often fewer than k).
+
+    Chunk counts are cached in process for PLANNER_CACHE_TTL_SECONDS; zero
+    counts are not cached, so a user's first processed document is found
+    at once. The set of partial indexes is refreshed on the same interval.
+    """
+
+    def __init__(self):
+        self.ttl = settings.PLANNER_CACHE_TTL_SECONDS
+        self.exact_max_chunks = settings.EXACT_SEARCH_MAX_CHUNKS
+        self._counts: Dict[Tuple[str, str, Tuple[str, ...]], Tuple[float, int]] = {}
+        self._partial_indexes: Optional[set] = None
+        self._partial_indexes_at = 0.0
+
+    async def count_chunks(
+        self,
+        user_id: str,
+        column: str,
+        document_ids: Optional[List[str]],
+        db: AsyncSession
+    ) -> int:
+        """Chunks of a user (or of some of their documents) with an embedding in `column`."""
+        scope = tuple(sorted(document_ids or ()))
+        key = (user_id, column, scope)
+        cached = self._counts.get(key)
+        now = time.monotonic()
+        if cached and cached[0] > now:
+            return cached[1]
+
+        doc_filter = "AND document_id = ANY(:doc_ids)" if scope else ""
+        count = (await db.execute(text(f"""
+            SELECT count(*) FROM document_chunks
+            WHERE user_id = :user_id {doc_filter} AND {column} IS NOT NULL
+        """), {"user_id": user_id, "doc_ids": list(scope)})).scalar()
+        if count:
+            self._counts[key] = (now + self.ttl, count)
+        return count
+
+    async def has_partial_index(self, column: str, user_id: str, db: AsyncSession) -> bool:
+        """Whether a valid per-user HNSW index exists for the user on `column`."""
+        now = time.monotonic()
+        if self._partial_indexes is None or now - self._partial_indexes_at > self.ttl:
+            rows = await db.execute(text("""
+                SELECT c.relname
+                FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+                WHERE c.relname LIKE 'ix\\_document\\_chunks\\_%\\_hnsw\\_u\\_%' AND i.indisvalid
+            """))
+            self._partial_indexes = {row[0] for row in rows}
+            self._partial_indexes_at = now
+        return partial_index_name(column, user_id) in self._partial_indexes
+
+    async def plan(
+        self,
+        user_id: str,
+        document_ids: Optional[List[str]],
+        db: AsyncSession,
+        full_column: str,
+        index_column: str
+    ) -> SearchPlan:
+        """
+        Pick the strategy for a search.
+
+        Args:
+            user_id: User ID
+            document_ids: Optional document filter
+            db: Database session
+            full_column: Full-dimension column the results are ranked by
+            index_column: Column the ANN index covers (differs when the reduced tier is searched)
+
+        Returns:
+            The plan
+        """
+        chunks = await self.count_chunks(user_id, full_column, document_ids, db)
+        if not chunks:
+            return SearchPlan("none", 0)
+        if chunks <= self.exact_max_chunks:
+            return SearchPlan("exact", chunks)
+        if await self.has_partial_index(index_column, user_id, db):
+            return SearchPlan("partial_index", chunks)
+        return SearchPlan("hnsw_iterative", chunks)
+
+
+# Singleton instance
+search_planner = SearchPlanner()
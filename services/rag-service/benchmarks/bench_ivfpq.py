@@ -0,0 +1,202 @@
+# FILE: services/rag-service/benchmarks/bench_ivfpq.py
+
+"""
+Measure recall and latency of IVF-PQ shard search against exact and pgvector search.
+
+Offline (default), builds a clustered synthetic corpus of 1536-dimension
+embeddings, trains and writes a shard the way the RAG service does (to a
+temporary directory, memory-mapped on open) and, for every --nprobe
+value, reports median and p95 latency of the shard search plus exact
+re-scoring of its candidates, and recall@k against brute-force top-k,
+both from the PQ ranking alone and after re-scoring.
+
+With --database, builds the shard of one user (--user, or the user with
+the most chunks) from document_chunks, samples that user's embeddings as
+queries, and runs the retriever's search once exactly (index scans off),
+and per search quality through pgvector HNSW (iterative scan) and through
+the IVF-PQ shard with re-scoring in Postgres. Needs the service
+environment (.env or exported variables) and an HNSW index built by the
+ingestion workers.
+
+Usage (from services/rag-service):
+    python -m benchmarks.bench_ivfpq
+    python -m benchmarks.bench_ivfpq --rows 200000 --lists 1024 --nprobe 8 16 32 64
+    python -m benchmarks.bench_ivfpq --database --queries 100
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+DIMENSIONS = 1536
+
+
+def synthetic_corpus(rows: int, clusters: int, seed: int = 7) -> np.ndarray:
+    """Embeddings grouped around random topic centers, like chunks of related documents."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIMENSIONS)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=rows)
+    noise = rng.standard_normal((rows, DIMENSIONS)).astype(np.float32)
+    return centers[assignment] + 0.8 * noise
+
+
+def summarize(label: str, timings, recalls, extra: str = ""):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{label:<18} {statistics.median(timings) * 1000:>10.2f} {p95 * 1000:>8.2f} "
+        f"{statistics.mean(recalls):>8.4f} {extra}"
+    )
+
+
+def offline(args):
+    from app.ivfpq import IvfPq, unit
+    from app.ivfpq_shards import Segment, ivfpq_shards
+
+    rng = np.random.default_rng(11)
+    corpus = unit(synthetic_corpus(args.rows, args.clusters))
+    ids = [f"chunk-{row}" for row in range(args.rows)]
+    picks = rng.integers(0, args.rows, size=args.queries)
+    queries = unit(corpus[picks] + 0.5 * rng.standard_normal((args.queries, DIMENSIONS)).astype(np.float32))
+
+    lists = args.lists or int(4 * np.sqrt(args.rows))
+    sample = corpus[rng.choice(args.rows, min(args.rows, args.train_sample), replace=False)]
+    start = time.perf_counter()
+    index = IvfPq.train(sample, lists, args.subquantizers, args.iterations)
+    print(f"Trained {lists} lists x {args.subquantizers} subquantizers on {len(sample):,} rows "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    row_lists, codes = index.encode(corpus)
+    print(f"Encoded {args.rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+    ivfpq_shards.root = Path(tempfile.mkdtemp(prefix="bench-ivfpq-"))
+    ivfpq_shards.subquantizers = args.subquantizers
+    encoded = Segment(
+        ids=np.array([chunk_id.encode() for chunk_id in ids]),
+        document_ids=np.full(args.rows, b"doc"),
+        lists=row_lists,
+        codes=codes
+    )
+    shard = ivfpq_shards._write("bench", "embedding", index, [encoded])
+    position = {chunk_id: row for row, chunk_id in enumerate(ids)}
+
+    exact_times, exact_top = [], []
+    for query in queries:
+        start = time.perf_counter()
+        scores = corpus @ query
+        best = np.argpartition(-scores, args.k)[:args.k]
+        exact_times.append(time.perf_counter() - start)
+        exact_top.append(set(best))
+
+    print(f"{args.queries} queries, k={args.k}, {args.candidates} candidates re-scored")
+    print(f"{'search':<18} {'median ms':>10} {'p95 ms':>8} {'recall':>8} PQ-only recall")
+    summarize("exact (numpy)", exact_times, [1.0])
+    for nprobe in args.nprobe:
+        timings, recalls, pq_recalls = [], [], []
+        for query, exact in zip(queries, exact_top):
+            start = time.perf_counter()
+            found = [position[chunk_id] for chunk_id in shard.search(query, args.candidates, nprobe)]
+            rescored = np.asarray(found)[np.argsort(-(corpus[found] @ query))[:args.k]]
+            timings.append(time.perf_counter() - start)
+            recalls.append(len(set(rescored) & exact) / args.k)
+            pq_recalls.append(len(set(found[:args.k]) & exact) / args.k)
+        summarize(f"ivfpq nprobe={nprobe}", timings, recalls, f"{statistics.mean(pq_recalls):.4f}")
+
+    print(f"bytes/row: fp32 {4 * DIMENSIONS}, PQ code {args.subquantizers} "
+          f"(+ id and list), shard in {shard.path}")
+
+
+async def database(args):
+    from sqlalchemy import text
+    from app.config import settings
+    from app.database import AsyncSessionLocal
+    from app.ivfpq_shards import ivfpq_shards
+    from app.retriever import vector_retriever
+    from app.search_planner import SearchPlan
+
+    # Compare rankings, not what passes the service's threshold
+    settings.SIMILARITY_THRESHOLD = -1.0
+    ivfpq_shards.root = Path(args.dir or tempfile.mkdtemp(prefix="bench-ivfpq-"))
+    column = vector_retriever.full_column()
+
+    async with AsyncSessionLocal() as db:
+        user_id = args.user or (await db.execute(text(f"""
+            SELECT user_id FROM document_chunks WHERE {column} IS NOT NULL
+            GROUP BY user_id ORDER BY count(*) DESC LIMIT 1
+        """))).scalar()
+        if user_id is None:
+            print(f"No chunks with {column}")
+            return
+        sample = (await db.execute(text(f"""
+            SELECT {column}::vector::text FROM document_chunks
+            WHERE user_id = :user_id AND {column} IS NOT NULL
+            ORDER BY random() LIMIT :n
+        """), {"user_id": user_id, "n": args.queries})).fetchall()
+    queries = [[float(x) for x in row[0][1:-1].split(",")] for row in sample]
+
+    start = time.perf_counter()
+    await ivfpq_shards._build(user_id, column)
+    shard = ivfpq_shards.get(user_id, column)
+    print(f"Built shard of user {user_id} ({len(shard.base.ids):,} chunks, {shard.index.lists} lists) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    async def timed(plan: SearchPlan, query, quality):
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            chunks = await vector_retriever.search_similar_chunks(
+                user_id, query, args.k, None, quality, db, plan
+            )
+            elapsed = time.perf_counter() - start
+            await db.rollback()
+        return elapsed, {chunk["chunk_id"] for chunk in chunks}
+
+    chunks = len(shard.base.ids)
+    exact_times, exact_results = [], []
+    for query in queries:
+        elapsed, found = await timed(SearchPlan("exact", chunks), query, None)
+        exact_times.append(elapsed)
+        exact_results.append(found)
+
+    print(f"{len(queries)} queries, k={args.k}")
+    print(f"{'search':<18} {'median ms':>10} {'p95 ms':>8} {'recall':>8}")
+    summarize("exact", exact_times, [1.0])
+    for strategy, label in (("hnsw_iterative", "hnsw"), ("ivfpq", "ivfpq")):
+        for quality in settings.HNSW_EF_SEARCH:
+            timings, recalls = [], []
+            for query, exact in zip(queries, exact_results):
+                elapsed, found = await timed(SearchPlan(strategy, chunks), query, quality)
+                timings.append(elapsed)
+                recalls.append(len(found & exact) / len(exact) if exact else 1.0)
+            summarize(f"{label} {quality}", timings, recalls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", action="store_true", help="Measure on document_chunks instead of synthetic data")
+    parser.add_argument("--user", help="User whose chunks are indexed (--database)")
+    parser.add_argument("--dir", help="Shard directory (--database; default: a temporary directory)")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=0, help="Coarse lists (default 4 * sqrt(rows))")
+    parser.add_argument("--subquantizers", type=int, default=96)
+    parser.add_argument("--train-sample", type=int, default=30000)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 48])
+    args = parser.parse_args()
+
+    if args.database:
+        asyncio.run(database(args))
+    else:
+        offline(args)
+
+
+if __name__ == "__main__":
+    main()